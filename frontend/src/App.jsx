@@ -67,12 +67,12 @@ function App() {
         }
 
         if (activeTab === 'ontology') {
-            fetch('/api/admin/learnings', { headers }).then(res => res.json()).then(setLearnings).catch(console.error);
-            fetch('/api/admin/entities', { headers }).then(res => res.json()).then(setEntities).catch(console.error);
+            fetch('/api/admin/learnings', { headers }).then(res => res.json()).then(data => setLearnings(data.learnings || [])).catch(console.error);
+            fetch('/api/admin/entities', { headers }).then(res => res.json()).then(data => setEntities(data.entities || [])).catch(console.error);
         }
 
         if (activeTab === 'memories') {
-            fetch('/api/admin/memories?limit=200', { headers }).then(res => res.json()).then(setMemories).catch(console.error);
+            fetch('/api/admin/memories?limit=200', { headers }).then(res => res.json()).then(data => setMemories(data.memories || [])).catch(console.error);
         }
 
         if (activeTab === 'jobs' || true) { // Always fetch jobs to keep sidebar count fresh
@@ -318,7 +318,7 @@ function App() {
             const res = await fetch(`/api/admin/review/assertions/pending?${params}`, { headers });
             const data = await res.json();
             setPendingAssertions(data.assertions || []);
-            setPendingCount(data.total || 0);
+            setPendingCount(data.estimated_total || 0);
         } catch (err) {
             console.error(err);
         } finally {
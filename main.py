@@ -19,6 +19,11 @@ async def lifespan(app: FastAPI):
     # Startup
     init_db()
     start_scheduler()
+
+    # Condensation workers (in-process; a dedicated pool can run via
+    # `python -m src.engine.worker` with CONDENSE_EMBEDDED_WORKERS=0)
+    from src.engine.worker import start_embedded_workers, stop_embedded_workers
+    start_embedded_workers()
     
     # Init Qdrant Collections
     from src.db.session import QDRANT_URL, QDRANT_API_KEY
@@ -63,6 +68,7 @@ async def lifespan(app: FastAPI):
 
     yield
     # Shutdown logic if needed
+    stop_embedded_workers()
 
 # Initialize App
 app = FastAPI(title="Condensate Memory System", lifespan=lifespan)
@@ -75,6 +81,9 @@ app.include_router(mcp_router, prefix="/mcp", tags=["mcp"])
 from src.server.router_api import router as memory_router
 app.include_router(memory_router, prefix="/api/v1", tags=["memory"])
 
+from src.server.episodic_api import router as episodic_router
+app.include_router(episodic_router)
+
 from src.server.v1_api import router as v1_router
 app.include_router(v1_router) # already has /v1 prefix
 
@@ -84,6 +93,12 @@ app.include_router(ingest_router)
 from src.server.review_api import router as review_router
 app.include_router(review_router)
 
+from src.server.provenance_api import router as provenance_router
+app.include_router(provenance_router)
+
+from src.server.replay_api import router as replay_router
+app.include_router(replay_router)
+
 # Serve Frontend
 # Check if frontend build exists
 FRONTEND_DIR = os.path.join(os.getcwd(), "frontend", "dist")
@@ -1,5 +1,6 @@
+import json
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, Union
 from .types import EpisodicItem, RetrieveRequest, RetrieveResponse
 
 class CondensateClient:
@@ -34,6 +35,37 @@ class CondensateClient:
         resp.raise_for_status()
         return resp.json()["id"]
 
+    def add_items(self, items: Iterable[Union[EpisodicItem, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Bulk-ingest memory items in a single streamed NDJSON upload.
+
+        Items are serialized lazily while the request body is sent, so any
+        iterable (e.g. a generator reading a chat export) can be uploaded
+        without holding it in memory.
+
+        Args:
+            items: EpisodicItem objects or plain dicts with the same fields
+                (project_id may be omitted; it defaults to the API key's project)
+
+        Returns:
+            Dictionary with 'stored', 'rejected', 'ids' (one per input line,
+            None where rejected) and 'errors' ({'line', 'error'} entries).
+        """
+        def lines() -> Iterator[bytes]:
+            for item in items:
+                if isinstance(item, EpisodicItem):
+                    item = item.model_dump(mode='json')
+                yield (json.dumps(item, default=str) + "\n").encode("utf-8")
+
+        resp = self.client.post(
+            "/api/v1/episodic/bulk",
+            content=lines(),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=httpx.Timeout(30.0, read=None, write=None),
+        )
+        resp.raise_for_status()
+        return resp.json()
+
     def retrieve(self, query: str, project_id: Optional[str] = None, skip_llm: bool = False) -> Dict[str, Any]:
         """
         Retrieve knowledge based on a query.
@@ -24,6 +24,16 @@ export interface Assertion {
     formatted_statement?: string; // For display convenience
 }
 
+/**
+ * One page of assertions. Pass nextCursor back to get the next page;
+ * it is null on the last page.
+ */
+export interface AssertionPage {
+    assertions: Assertion[];
+    nextCursor: string | null;
+    estimatedTotal?: number | null; // Planner estimate, not an exact count
+}
+
 export class CondensatesClient {
     private client: AxiosInstance;
 
@@ -48,25 +58,32 @@ export class CondensatesClient {
     }
 
     /**
-     * Search for Assertions (formerly Learnings).
+     * Search for Assertions (formerly Learnings), newest first.
      * @param query The search query.
-     * @param limit Max results.
+     * @param limit Max results per page.
+     * @param cursor The nextCursor of the previous page.
      */
-    async queryAssertions(query?: string, limit: number = 20): Promise<Assertion[]> {
-        // Currently admin.py exposes GET /learnings (returns all) or POST /vectors (search)
+    async queryAssertions(query?: string, limit: number = 20, cursor?: string): Promise<AssertionPage> {
+        // Currently admin.py exposes GET /learnings (keyset-paged) or POST /vectors (search)
         // For semantic search we might use a different endpoint in future, but for now:
-        const response = await this.client.get('/api/admin/learnings');
+        const response = await this.client.get('/api/admin/learnings', {
+            params: { limit, ...(cursor && { cursor }) }
+        });
 
         // Transform response to match Assertion interface if needed
-        // The API returns: { id, statement, confidence, status... }
-        return response.data.map((r: any) => ({
-            id: r.id,
-            project_id: r.project_id,
-            predicate: 'unknown', // API view might just return 'statement' string
-            formatted_statement: r.statement,
-            confidence: r.confidence,
-            status: r.status
-        }));
+        // The API returns: { learnings: [{ id, statement, confidence, status... }], next_cursor, estimated_total }
+        return {
+            assertions: response.data.learnings.map((r: any) => ({
+                id: r.id,
+                project_id: r.project_id,
+                predicate: 'unknown', // API view might just return 'statement' string
+                formatted_statement: r.statement,
+                confidence: r.confidence,
+                status: r.status
+            })),
+            nextCursor: response.data.next_cursor ?? null,
+            estimatedTotal: response.data.estimated_total
+        };
     }
 }
 
@@ -0,0 +1,60 @@
+import os
+import re
+from typing import List, Dict, Any
+
+# bge-small-en-v1.5 truncates at 512 word-piece tokens. Whitespace words split
+# into ~1.3 word pieces on average, so the default window leaves headroom.
+EMBED_CHUNK_TOKENS = int(os.getenv("EMBED_CHUNK_TOKENS", "320"))
+EMBED_CHUNK_OVERLAP = int(os.getenv("EMBED_CHUNK_OVERLAP", "48"))
+
+_TOKEN_RE = re.compile(r"\S+")
+
+
+def _token_cost(word: str) -> int:
+    """
+    Approximate word-piece count for a whitespace token without loading the
+    tokenizer: long identifiers, URLs and code split into several pieces.
+    """
+    return max(1, (len(word) + 5) // 6)
+
+
+def chunk_text(text: str, max_tokens: int = None, overlap: int = None) -> List[Dict[str, Any]]:
+    """
+    Split text into overlapping windows that fit the embedding model.
+
+    Returns a list of {"index", "start", "end", "text"} dicts where start/end
+    are character offsets into the original text. Short texts come back as a
+    single chunk spanning the whole string.
+    """
+    max_tokens = max_tokens or EMBED_CHUNK_TOKENS
+    overlap = EMBED_CHUNK_OVERLAP if overlap is None else overlap
+    overlap = min(overlap, max_tokens // 2)
+
+    words = [(m.start(), m.end(), _token_cost(m.group(0))) for m in _TOKEN_RE.finditer(text)]
+    if not words or sum(w[2] for w in words) <= max_tokens:
+        return [{"index": 0, "start": 0, "end": len(text), "text": text}]
+
+    chunks = []
+    i = 0
+    while i < len(words):
+        # Grow the window until the token budget is spent
+        budget = 0
+        j = i
+        while j < len(words) and (budget + words[j][2] <= max_tokens or j == i):
+            budget += words[j][2]
+            j += 1
+
+        start, end = words[i][0], words[j - 1][1]
+        chunks.append({"index": len(chunks), "start": start, "end": end, "text": text[start:end]})
+        if j >= len(words):
+            break
+
+        # Step back far enough to carry `overlap` tokens into the next window
+        carried = 0
+        k = j
+        while k > i + 1 and carried + words[k - 1][2] <= overlap:
+            k -= 1
+            carried += words[k][2]
+        i = k
+
+    return chunks
@@ -9,6 +9,8 @@ from fastembed import TextEmbedding
 
 from src.db.models import EpisodicItem, Project
 from src.db.schemas import EpisodicItemCreate
+from src.agents.chunking import chunk_text
+from src.db.qdrant import episodic_collection, ensure_collection, EPISODIC_COLLECTION
 
 logger = logging.getLogger("IngressAgent")
 
@@ -18,69 +20,149 @@ class IngressAgent:
         self.qdrant = qdrant
         # Initialize embedding model (using fastembed as per requirements)
         self.embedding_model = TextEmbedding()
+        # Points of items stored with commit=False, upserted by index_pending()
+        # once the caller has committed
+        self._pending_points: Dict[str, List[models.PointStruct]] = {}
 
-    def process_memory(self, data: EpisodicItemCreate) -> EpisodicItem:
+    def process_memory(self, data: EpisodicItemCreate, commit: bool = True) -> EpisodicItem:
         """
         Clean, Validate, and Store a new episodic item.
         """
-        # 1. Resolve Project ID
+        return self.process_memories([data], commit=commit)[0]
+
+    def process_memories(self, batch_data: List[EpisodicItemCreate], commit: bool = True) -> List[EpisodicItem]:
+        """
+        Store a micro-batch of episodic items: one embed call for every chunk
+        of every item, one Postgres commit and one Qdrant upsert per collection.
+        With commit=False the rows are only flushed, so the caller can commit
+        them together with its own writes (e.g. the condensation queue rows),
+        and their vectors are held back: call index_pending() after the
+        commit, or discard_pending() after a rollback, so Qdrant never holds
+        points for rows that were not committed.
+        """
+        if not batch_data:
+            return []
+
+        # 1. Resolve Project IDs (once per project in the batch)
+        projects: Dict[str, uuid.UUID] = {}
+        for data in batch_data:
+            if data.project_id not in projects:
+                projects[data.project_id] = self._resolve_project(data.project_id, commit=commit)
+
+        # 2. Generate Vectors (for episodic_chunks)
+        # Long items are split into overlapping windows so content past the
+        # model's 512-token limit is still embedded; all windows of all items
+        # go through a single batched embed call.
+        chunked = [chunk_text(data.text) for data in batch_data]
+        flat_texts = [c["text"] for chunks in chunked for c in chunks]
+        flat_vectors = [v.tolist() for v in self.embedding_model.embed(flat_texts)]
+        
+        # 3. Store in Postgres
+        new_items = []
+        for data in batch_data:
+            item_id = uuid.uuid4()
+            new_item = EpisodicItem(
+                id=item_id,
+                project_id=projects[data.project_id],
+                source=data.source,
+                text=data.text,
+                metadata_=data.metadata,
+                occurred_at=data.occurred_at or datetime.datetime.utcnow(),
+                qdrant_point_id=str(item_id)
+            )
+            self.db.add(new_item)
+            new_items.append(new_item)
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+        
+        # 4. Store in Qdrant (episodic_chunks)
+        points_by_collection: Dict[str, List[models.PointStruct]] = {}
+        offset = 0
+        for data, new_item, chunks in zip(batch_data, new_items, chunked):
+            vectors = flat_vectors[offset:offset + len(chunks)]
+            offset += len(chunks)
+            project_uuid = projects[data.project_id]
+            points_by_collection.setdefault(episodic_collection(str(project_uuid)), []).extend(
+                models.PointStruct(
+                    id=self._chunk_point_id(new_item.id, chunk["index"]),
+                    vector=vector,
+                    payload={
+                        "text": chunk["text"],
+                        "item_id": str(new_item.id),
+                        "chunk_index": chunk["index"],
+                        "chunk_start": chunk["start"],
+                        "chunk_end": chunk["end"],
+                        "chunk_count": len(chunks),
+                        "project_id": str(project_uuid),
+                        "source": data.source,
+                        "metadata": data.metadata,
+                        "occurred_at": new_item.occurred_at.isoformat()
+                    }
+                )
+                for chunk, vector in zip(chunks, vectors)
+            )
+
+        if commit:
+            self._upsert(points_by_collection)
+        else:
+            for collection, points in points_by_collection.items():
+                self._pending_points.setdefault(collection, []).extend(points)
+        return new_items
+
+    def index_pending(self) -> None:
+        """
+        Upsert the vectors of items stored with commit=False (after the commit).
+        """
+        pending, self._pending_points = self._pending_points, {}
+        self._upsert(pending)
+
+    def discard_pending(self) -> None:
+        """
+        Drop the vectors of items stored with commit=False (after a rollback).
+        """
+        self._pending_points = {}
+
+    def _upsert(self, points_by_collection: Dict[str, List[models.PointStruct]]) -> None:
+        for collection, points in points_by_collection.items():
+            try:
+                if collection != EPISODIC_COLLECTION:
+                    ensure_collection(self.qdrant, collection)
+                self.qdrant.upsert(collection_name=collection, points=points)
+            except Exception as e:
+                logger.error(f"Failed to upsert to Qdrant: {e}")
+                # Identify if we should rollback Postgres? 
+                # For now, we keep it in PG.
+
+    def _resolve_project(self, project_id: str, commit: bool = True) -> uuid.UUID:
         try:
-            project_uuid = uuid.UUID(data.project_id)
+            project_uuid = uuid.UUID(project_id)
         except ValueError:
             # Handle name-based lookup or generation
-            project_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, data.project_id)
+            project_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, project_id)
             
         # Ensure Project Exists (Optional safe-guard)
         project = self.db.query(Project).filter(Project.id == project_uuid).first()
         if not project:
-            logger.info(f"Auto-creating project {data.project_id}")
-            project = Project(id=project_uuid, name=data.project_id)
+            logger.info(f"Auto-creating project {project_id}")
+            project = Project(id=project_uuid, name=project_id)
             self.db.add(project)
-            self.db.commit()
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
+        return project_uuid
 
-        # 2. Generate Vectors (for episodic_chunks)
-        vector_generator = self.embedding_model.embed([data.text])
-        vector = list(vector_generator)[0].tolist()
-        
-        # 3. Store in Postgres
-        item_id = uuid.uuid4()
-        new_item = EpisodicItem(
-            id=item_id,
-            project_id=project_uuid,
-            source=data.source,
-            text=data.text,
-            metadata_=data.metadata,
-            occurred_at=data.occurred_at or datetime.datetime.utcnow(),
-            qdrant_point_id=str(item_id)
-        )
-        self.db.add(new_item)
-        self.db.commit()
-        self.db.refresh(new_item)
-        
-        # 4. Store in Qdrant (episodic_chunks)
-        try:
-            self.qdrant.upsert(
-                collection_name="episodic_chunks",
-                points=[
-                    models.PointStruct(
-                        id=str(item_id),
-                        vector=vector,
-                        payload={
-                            "text": data.text,
-                            "project_id": str(project_uuid),
-                            "source": data.source,
-                            "metadata": data.metadata,
-                            "occurred_at": new_item.occurred_at.isoformat()
-                        }
-                    )
-                ]
-            )
-        except Exception as e:
-            logger.error(f"Failed to upsert to Qdrant: {e}")
-            # Identify if we should rollback Postgres? 
-            # For now, we keep it in PG.
-            
-        return new_item
+    @staticmethod
+    def _chunk_point_id(item_id: uuid.UUID, index: int) -> str:
+        """
+        The first chunk keeps the item's own ID (== qdrant_point_id); later
+        chunks get deterministic IDs derived from it so re-ingestion is idempotent.
+        """
+        if index == 0:
+            return str(item_id)
+        return str(uuid.uuid5(item_id, f"chunk:{index}"))
 
     async def process_and_condense(self, data: EpisodicItemCreate) -> EpisodicItem:
         """
@@ -94,9 +176,7 @@ class IngressAgent:
         """
         Process multiple items at once to optimize throughput.
         """
-        items = []
-        for data in batch_data:
-            items.append(self.process_memory(data))
+        items = self.process_memories(batch_data)
 
         if not items:
             return []
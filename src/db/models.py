@@ -107,7 +107,12 @@ class Assertion(Base):
     first_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     last_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     
-    provenance: Mapped[List[Dict[str, Any]]] = mapped_column(JSONB, default=[]) # [{episodic_id, quote}]
+    # Legacy inline evidence and envelopes; new evidence goes to assertion_evidence
+    provenance: Mapped[List[Dict[str, Any]]] = mapped_column(JSONB, default=[])
+
+    # Dedup key: hash of the normalized triple + entity IDs + polarity,
+    # unique per project (see src/learn/assertion_store.py)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
     # Cognitive Dynamics
     strength: Mapped[float] = mapped_column(Float, default=1.0, index=True) # Hebbian weight
@@ -184,6 +189,7 @@ class Relation(Base):
     strength: Mapped[float] = mapped_column(Float, default=1.0, index=True) # Hebbian weight
     access_count: Mapped[int] = mapped_column(Integer, default=0)
     last_accessed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    decayed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True) # last time decay was materialized
 
     project: Mapped["Project"] = relationship(back_populates="relations")
 
@@ -305,5 +311,160 @@ class FetchedArtifact(Base):
     
     metadata_: Mapped[Dict[str, Any]] = mapped_column("metadata", JSONB, default={})
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Downstream progress: set once the artifact's episodic item exists and
+    # once it is on the condensation queue. Unqueued artifacts are re-fed on
+    # the job's next run.
+    embedded_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    queued_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     run: Mapped["IngestJobRun"] = relationship(back_populates="artifacts")
+
+
+class CondensationTask(Base):
+    """
+    Durable condensation work item (one per episodic item), claimed by
+    workers with SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    __tablename__ = "condensation_queue"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    item_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    status: Mapped[str] = mapped_column(String, default="pending") # pending, running, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # pending: not before this time (retry backoff); running: lease expiry (visibility timeout)
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    locked_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ProofEnvelope(Base):
+    """
+    Signed record of one distillation: method, model, the Merkle root over
+    the hashes of its input episodic items and an HMAC signature over them.
+    Evidence rows carry the inclusion proof of their item.
+    """
+    __tablename__ = "proof_envelopes"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+
+    method: Mapped[str] = mapped_column(String, nullable=False)
+    model: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    inputs: Mapped[Optional[List[str]]] = mapped_column(JSONB, nullable=True) # legacy: sha256 of each input text
+    merkle_root: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    leaf_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    timestamp: Mapped[str] = mapped_column(String, nullable=False) # ISO string, part of the signed payload
+    signature: Mapped[str] = mapped_column(String, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AssertionEvidence(Base):
+    """
+    Append-only evidence for an assertion: the episodic item it was drawn
+    from, an optional quote and the proof envelope it was signed under.
+    One row per (assertion, episodic item).
+    """
+    __tablename__ = "assertion_evidence"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    assertion_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("assertions.id", ondelete="CASCADE"), nullable=False)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+
+    episodic_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    quote: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    envelope_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("proof_envelopes.id"), nullable=True)
+    # Inclusion proof of the item's text hash under the envelope's Merkle root
+    proof: Mapped[Optional[List[List[str]]]] = mapped_column(JSONB, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ProvenanceAudit(Base):
+    """
+    Background verification of a project's provenance (envelope signatures
+    and input hashes). `checkpoint` is the last assertion fully checked, so
+    an interrupted audit resumes after it.
+    """
+    __tablename__ = "provenance_audits"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+
+    status: Mapped[str] = mapped_column(String, default="queued") # queued, running, completed, failed
+    checkpoint: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    stats: Mapped[Dict[str, Any]] = mapped_column(JSONB, default={}) # assertions, evidence, mismatches
+    error_log: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True) # heartbeat, set per chunk
+    ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class ProvenanceMismatch(Base):
+    """
+    One failed check found by a provenance audit.
+    """
+    __tablename__ = "provenance_mismatches"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    audit_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("provenance_audits.id", ondelete="CASCADE"),
+                                                nullable=False, index=True)
+
+    kind: Mapped[str] = mapped_column(String, nullable=False) # envelope_signature, input_hash, missing_proof, missing_item
+    assertion_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    evidence_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    envelope_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    detail: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ReplayRun(Base):
+    """
+    Re-distillation of episodic memory into a shadow schema (a copy of the
+    semantic tables), cut over to the live tables project by project.
+    """
+    __tablename__ = "replay_runs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    shadow_schema: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    status: Mapped[str] = mapped_column(String, default="running") # running, dropped
+    note: Mapped[Optional[str]] = mapped_column(String, nullable=True) # e.g. the model being rolled out
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    partitions: Mapped[List["ReplayPartition"]] = relationship(back_populates="run", cascade="all, delete-orphan")
+
+
+class ReplayPartition(Base):
+    """
+    One project's share of a replay, claimed by one worker at a time.
+    Items are replayed in (occurred_at, id) order; the checkpoint is the
+    last item distilled.
+    """
+    __tablename__ = "replay_partitions"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    run_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("replay_runs.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    status: Mapped[str] = mapped_column(String, default="pending") # pending, running, done, failed, cut_over
+    checkpoint_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    checkpoint_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    items_done: Mapped[int] = mapped_column(Integer, default=0)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # running: lease expiry; pending: not before (retry backoff)
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    locked_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    run: Mapped["ReplayRun"] = relationship(back_populates="partitions")
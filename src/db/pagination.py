@@ -0,0 +1,68 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+PAGE_MAX = 1000
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Inverse of encode_cursor. Raises ValueError on a malformed cursor.
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+
+
+def keyset_page(db: Session, stmt, sort_col, id_col, limit: int, cursor: Optional[str] = None,
+                descending: bool = True) -> Tuple[List, Optional[str]]:
+    """
+    One page of `stmt` (a select of one entity) ordered by (sort_col, id),
+    newest first unless `descending` is False. Each page is an index range
+    scan after the previous page's last row, so deep pages cost the same
+    as the first. Returns the rows and the cursor of the next page (None on
+    the last page). Raises ValueError on a malformed cursor.
+
+    sort_col is one of the NOT NULL-in-practice timestamps (column
+    defaults); rows where it is NULL are not reachable past the first page.
+    """
+    limit = max(1, min(limit, PAGE_MAX))
+    if cursor:
+        key, after = tuple_(sort_col, id_col), tuple_(*decode_cursor(cursor))
+        stmt = stmt.where(key < after if descending else key > after)
+    order = (sort_col.desc(), id_col.desc()) if descending else (sort_col, id_col)
+    rows = list(db.execute(stmt.order_by(*order).limit(limit + 1)).scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], sort_col.key), rows[-1].id)
+
+
+def estimated_count(db: Session, stmt) -> Optional[int]:
+    """
+    The planner's row estimate for `stmt` (EXPLAIN, nothing is executed),
+    so the cost does not grow with the result. None if it cannot be had.
+    The EXPLAIN runs in a savepoint, so a failure leaves the caller's
+    transaction usable.
+    """
+    try:
+        sql = stmt.order_by(None).limit(None).compile(
+            dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+        )
+        with db.begin_nested():
+            plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
@@ -1,30 +1,249 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+from typing import Optional, Set
 import logging
+import os
 
 logger = logging.getLogger("QdrantInit")
 
+EPISODIC_COLLECTION = "episodic_chunks"
+ASSERTION_COLLECTION = "semantic_assertions"
+ENTITY_COLLECTION = "entity_names"
+VECTOR_DIM = 384 # Default FastEmbed dimension
+
+# Collection layout for episodic vectors:
+#   shared     - one episodic_chunks collection, filtered by the project_id tenant index
+#   collection - a dedicated episodic_chunks__<project> collection per project
+# Large tenants can be given a dedicated collection while everyone else stays
+# shared by listing their project IDs in QDRANT_DEDICATED_PROJECTS.
+QDRANT_PROJECT_LAYOUT = os.getenv("QDRANT_PROJECT_LAYOUT", "shared").lower()
+QDRANT_DEDICATED_PROJECTS = {
+    p.strip() for p in os.getenv("QDRANT_DEDICATED_PROJECTS", "").split(",") if p.strip()
+}
+
+# Vector storage tuning. Quantized copies stay in RAM for the HNSW walk while
+# the float32 originals can live on disk and are only read to rescore the
+# oversampled candidate set.
+#   QDRANT_QUANTIZATION: none | scalar (int8, ~4x smaller) | binary (1 bit, ~32x smaller)
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "false").lower() == "true"
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+QDRANT_RESCORE_OVERSAMPLING = float(os.getenv("QDRANT_RESCORE_OVERSAMPLING", "2.0"))
+
+# Payload indexes so filtered searches don't scan. project_id is marked as the
+# tenant key so Qdrant co-locates each project's points on disk. The
+# assertion and entity collections are only ever filtered by project.
+TENANT_INDEXES = {
+    "project_id": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+}
+PAYLOAD_INDEXES = {
+    **TENANT_INDEXES,
+    "source": models.PayloadSchemaType.KEYWORD,
+    "item_id": models.PayloadSchemaType.KEYWORD,
+    "occurred_at": models.PayloadSchemaType.DATETIME,
+}
+
+# Collections already verified in this process (avoids a round trip per write)
+_known_collections: Set[str] = set()
+
+
+def episodic_collection(project_id: Optional[str] = None) -> str:
+    """
+    Name of the collection holding episodic vectors for a project.
+    """
+    if project_id and (QDRANT_PROJECT_LAYOUT == "collection" or str(project_id) in QDRANT_DEDICATED_PROJECTS):
+        return f"{EPISODIC_COLLECTION}__{str(project_id).replace('-', '')}"
+    return EPISODIC_COLLECTION
+
+
+def quantization_config():
+    """
+    Quantization settings for QDRANT_QUANTIZATION, or None when disabled.
+    """
+    if QDRANT_QUANTIZATION == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    if QDRANT_QUANTIZATION == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def hnsw_config() -> models.HnswConfigDiff:
+    return models.HnswConfigDiff(m=QDRANT_HNSW_M, ef_construct=QDRANT_HNSW_EF_CONSTRUCT)
+
+
+def search_params() -> Optional[models.SearchParams]:
+    """
+    Search-time parameters: with quantization on, oversample on the quantized
+    index and rescore the candidates against the original vectors.
+    """
+    if quantization_config() is None:
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=QDRANT_RESCORE_OVERSAMPLING
+        )
+    )
+
+
+def _storage_drift(info) -> bool:
+    """
+    True if a collection's storage settings differ from the configured ones.
+    """
+    config = info.config
+    vectors = config.params.vectors
+    if bool(getattr(vectors, "on_disk", None)) != QDRANT_ON_DISK:
+        return True
+    if (config.hnsw_config.m, config.hnsw_config.ef_construct) != (QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT):
+        return True
+
+    current = config.quantization_config
+    desired = quantization_config()
+    if desired is None:
+        return current is not None
+    return type(current) is not type(desired)
+
+
+def apply_storage_config(client: QdrantClient, name: str) -> bool:
+    """
+    Bring an existing collection in line with the configured quantization,
+    on-disk and HNSW settings. Qdrant rebuilds quantized vectors and the HNSW
+    graph from the stored originals, so nothing is re-embedded.
+
+    Returns True if the collection was updated.
+    """
+    if not _storage_drift(client.get_collection(name)):
+        return False
+
+    logger.info(
+        f"Updating storage config of {name}: quantization={QDRANT_QUANTIZATION}, "
+        f"on_disk={QDRANT_ON_DISK}, m={QDRANT_HNSW_M}, ef_construct={QDRANT_HNSW_EF_CONSTRUCT}"
+    )
+    client.update_collection(
+        collection_name=name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=QDRANT_ON_DISK)},
+        hnsw_config=hnsw_config(),
+        quantization_config=quantization_config() or models.Disabled.DISABLED
+    )
+    return True
+
+
+def payload_indexes(name: str):
+    """
+    Payload indexes for a collection: the episodic fields for episodic
+    collections (shared or per-project), the tenant key for the others.
+    """
+    return PAYLOAD_INDEXES if name.startswith(EPISODIC_COLLECTION) else TENANT_INDEXES
+
+
+def ensure_payload_indexes(client: QdrantClient, name: str):
+    """
+    Create any missing payload indexes on a collection.
+    """
+    try:
+        existing = set((client.get_collection(name).payload_schema or {}).keys())
+    except Exception:
+        existing = set()
+
+    for field, schema in payload_indexes(name).items():
+        if field in existing:
+            continue
+        logger.info(f"Creating payload index {name}.{field}")
+        client.create_payload_index(
+            collection_name=name,
+            field_name=field,
+            field_schema=schema
+        )
+
+
+def ensure_collection(client: QdrantClient, name: str, dim: int = VECTOR_DIM):
+    """
+    Create a collection (and its payload indexes) if it doesn't exist yet.
+    """
+    if name in _known_collections:
+        return
+
+    if not client.collection_exists(name):
+        logger.info(f"Creating Qdrant collection: {name}")
+        client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(
+                size=dim,
+                distance=models.Distance.COSINE,
+                on_disk=QDRANT_ON_DISK
+            ),
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config()
+        )
+    else:
+        logger.info(f"Qdrant collection {name} exists.")
+        apply_storage_config(client, name)
+
+    ensure_payload_indexes(client, name)
+    _known_collections.add(name)
+
+
+# Collections init_qdrant creates; per-project episodic collections
+# (episodic_chunks__<id>) are created on first use
+BASE_COLLECTIONS = {
+    EPISODIC_COLLECTION: VECTOR_DIM,
+    ASSERTION_COLLECTION: VECTOR_DIM, # Assuming same model for now
+    ENTITY_COLLECTION: VECTOR_DIM
+}
+
+
 def init_qdrant(client: QdrantClient):
     """
     Ensure required collections exist in Qdrant.
     """
-    collections = {
-        "episodic_chunks": 384, # Default FastEmbed dimension
-        "semantic_assertions": 384 # Assuming same model for now
-    }
-    
-    existing = client.get_collections().collections
-    existing_names = [c.name for c in existing]
-    
-    for name, dim in collections.items():
-        if name not in existing_names:
-            logger.info(f"Creating Qdrant collection: {name}")
-            client.create_collection(
-                collection_name=name,
-                vectors_config=models.VectorParams(
-                    size=dim,
-                    distance=models.Distance.COSINE
-                )
-            )
-        else:
-            logger.info(f"Qdrant collection {name} exists.")
+    for name, dim in BASE_COLLECTIONS.items():
+        ensure_collection(client, name, dim)
+
+
+def managed_collections(client: QdrantClient):
+    """
+    Existing collections this app manages: the base collections and every
+    per-project episodic collection.
+    """
+    return [
+        c.name for c in client.get_collections().collections
+        if c.name in BASE_COLLECTIONS or c.name.startswith(EPISODIC_COLLECTION)
+    ]
+
+
+def main():
+    """
+    python -m src.db.qdrant apply-storage
+
+    Apply QDRANT_QUANTIZATION / QDRANT_ON_DISK / QDRANT_HNSW_* to every
+    existing managed collection in place.
+    """
+    import argparse
+    from src.db.session import QDRANT_URL, QDRANT_API_KEY
+
+    parser = argparse.ArgumentParser(description="Qdrant collection maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("apply-storage", help="apply the configured storage settings to existing collections")
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    try:
+        for name in managed_collections(client):
+            updated = apply_storage_config(client, name)
+            print(f"{name}: {'updated' if updated else 'already up to date'}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,8 @@ def _apply_migrations():
     run repeatedly without error.
     """
     import logging
+    from src.learn.assertion_store import BACKFILL_FINGERPRINTS_SQL
+    from src.learn.evidence_store import MOVE_INLINE_EVIDENCE_SQL, STRIP_INLINE_EVIDENCE_SQL
     log = logging.getLogger("init_db")
 
     migrations = [
@@ -51,6 +53,65 @@ def _apply_migrations():
         "ALTER TABLE assertions ALTER COLUMN status SET DEFAULT 'pending_review'",
         # index (CREATE INDEX IF NOT EXISTS is supported in Postgres 9.5+)
         "CREATE INDEX IF NOT EXISTS ix_assertions_status ON assertions (status)",
+        # --- Time-aware activation decay ---
+        "ALTER TABLE relations ADD COLUMN IF NOT EXISTS decayed_at TIMESTAMP",
+        # --- Lexical recall (full-text GIN expression indexes) ---
+        "CREATE INDEX IF NOT EXISTS ix_episodic_items_text_fts ON episodic_items "
+        "USING GIN (to_tsvector('simple', text))",
+        "CREATE INDEX IF NOT EXISTS ix_assertions_text_fts ON assertions "
+        "USING GIN (to_tsvector('simple', coalesce(subject_text, '') || ' ' || predicate || ' ' || coalesce(object_text, '')))",
+        # --- Entity merge compaction (assertion reference rewrites) ---
+        "CREATE INDEX IF NOT EXISTS ix_assertions_subject_entity_id ON assertions (subject_entity_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assertions_object_entity_id ON assertions (object_entity_id)",
+        # --- Ingest content-hash dedup (index-only lookup per job) ---
+        "CREATE INDEX IF NOT EXISTS ix_fetched_artifacts_job_uri_hash "
+        "ON fetched_artifacts (job_id, source_uri, content_hash)",
+        # --- Ingest artifact progress; artifacts stored before this are taken as done ---
+        "ALTER TABLE fetched_artifacts ADD COLUMN IF NOT EXISTS embedded_at TIMESTAMP "
+        "DEFAULT (now() AT TIME ZONE 'utc')",
+        "ALTER TABLE fetched_artifacts ADD COLUMN IF NOT EXISTS queued_at TIMESTAMP "
+        "DEFAULT (now() AT TIME ZONE 'utc')",
+        "ALTER TABLE fetched_artifacts ALTER COLUMN embedded_at DROP DEFAULT",
+        "ALTER TABLE fetched_artifacts ALTER COLUMN queued_at DROP DEFAULT",
+        "CREATE INDEX IF NOT EXISTS ix_fetched_artifacts_job_unqueued "
+        "ON fetched_artifacts (job_id, id) WHERE queued_at IS NULL",
+        # --- Durable condensation queue (claim scan: available work by age) ---
+        "CREATE INDEX IF NOT EXISTS ix_condensation_queue_claim "
+        "ON condensation_queue (available_at) WHERE status IN ('pending', 'running')",
+        "CREATE INDEX IF NOT EXISTS ix_condensation_queue_project_claim "
+        "ON condensation_queue (project_id, available_at) WHERE status IN ('pending', 'running')",
+        # --- Assertion fingerprints (ON CONFLICT dedup); backfill before the unique index ---
+        "ALTER TABLE assertions ADD COLUMN IF NOT EXISTS fingerprint VARCHAR",
+        BACKFILL_FINGERPRINTS_SQL,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_assertions_project_fingerprint "
+        "ON assertions (project_id, fingerprint)",
+        # --- Append-only assertion evidence; move inline JSONB evidence over ---
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_assertion_evidence_item "
+        "ON assertion_evidence (assertion_id, episodic_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assertion_evidence_page "
+        "ON assertion_evidence (assertion_id, created_at, id)",
+        MOVE_INLINE_EVIDENCE_SQL,
+        STRIP_INLINE_EVIDENCE_SQL,
+        # --- Merkle-batched proof envelopes ---
+        "ALTER TABLE proof_envelopes ADD COLUMN IF NOT EXISTS merkle_root VARCHAR",
+        "ALTER TABLE proof_envelopes ADD COLUMN IF NOT EXISTS leaf_count INTEGER",
+        "ALTER TABLE proof_envelopes ALTER COLUMN inputs DROP NOT NULL",
+        "ALTER TABLE assertion_evidence ADD COLUMN IF NOT EXISTS proof JSONB",
+        # --- Replay (per-project keyset scan in occurred_at order) ---
+        "CREATE INDEX IF NOT EXISTS ix_episodic_items_project_occurred "
+        "ON episodic_items (project_id, occurred_at, id)",
+        # --- Streaming export (per-project scans in id order) ---
+        "CREATE INDEX IF NOT EXISTS ix_episodic_items_project_id_id ON episodic_items (project_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_assertions_project_id_id ON assertions (project_id, id)",
+        # --- Keyset pagination (newest-first list endpoints) ---
+        "CREATE INDEX IF NOT EXISTS ix_episodic_items_occurred_id ON episodic_items (occurred_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_episodic_items_created_id ON episodic_items (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_entities_first_seen_id ON entities (first_seen_at, id)",
+        # learnings page on the immutable first_seen_at (last_seen_at moves under a cursor)
+        "DROP INDEX IF EXISTS ix_assertions_last_seen_id",
+        "CREATE INDEX IF NOT EXISTS ix_assertions_first_seen_id ON assertions (first_seen_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_assertions_pending_first_seen "
+        "ON assertions (first_seen_at, id) WHERE status = 'pending_review'",
     ]
 
     with engine.connect() as conn:
@@ -1,11 +1,41 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, func, literal, DateTime
 from datetime import datetime
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Optional
+import os
+import time
 import uuid
 import math
 from src.db.models import Relation, Assertion, Entity
 
+# Activation decay: strength halves every ACTIVATION_HALF_LIFE_HOURS without access.
+ACTIVATION_HALF_LIFE_HOURS = float(os.getenv("ACTIVATION_HALF_LIFE_HOURS", "336"))
+DECAY_FLOOR = 0.1
+DECAY_CHUNK_SIZE = int(os.getenv("DECAY_CHUNK_SIZE", "1000"))
+DECAY_THROTTLE_SECONDS = float(os.getenv("DECAY_THROTTLE_SECONDS", "0.05"))
+
+# Raw-SQL form of decayed_strength() for relations UPDATEs (binds :lam, :now)
+_DECAYED_STRENGTH_SQL = (
+    "strength * exp(-:lam * EXTRACT(EPOCH FROM (:now - "
+    "COALESCE(GREATEST(last_accessed_at, decayed_at), :now))) / 3600.0)"
+)
+
+
+def decayed_strength(now: datetime, half_life_hours: Optional[float] = None):
+    """
+    SQL expression for a relation's strength decayed up to `now`.
+
+    The decay clock starts at the later of the last access and the last time
+    the nightly job materialized decay (`decayed_at`), so reading this value
+    never double-counts time that has already been applied to `strength`.
+    """
+    lam = math.log(2) / (half_life_hours or ACTIVATION_HALF_LIFE_HOURS)
+    now_lit = literal(now, DateTime)
+    since = func.coalesce(func.greatest(Relation.last_accessed_at, Relation.decayed_at), now_lit)
+    elapsed_hours = func.extract("epoch", now_lit - since) / 3600.0
+    return Relation.strength * func.exp(-lam * elapsed_hours)
+
+
 class CognitiveService:
     def __init__(self, db: Session):
         self.db = db
@@ -21,6 +51,7 @@ class CognitiveService:
             return
 
         now = datetime.utcnow()
+        lam = math.log(2) / ACTIVATION_HALF_LIFE_HOURS
         
         # 1. Update access stats for the activated nodes themselves
         self.db.query(Assertion).filter(Assertion.id.in_(node_ids)).update(
@@ -38,30 +69,44 @@ class CognitiveService:
             synchronize_session=False
         )
 
-        # 2. Extract Entity IDs if Assertion IDs were passed
-        # This allows hebbian reinforcement to flow from retrieved facts down to concepts
-        assertions = self.db.query(Assertion).filter(Assertion.id.in_(node_ids)).all()
-        entity_ids_from_assertions = set()
-        for a in assertions:
-            if a.subject_entity_id: entity_ids_from_assertions.add(a.subject_entity_id)
-            if a.object_entity_id: entity_ids_from_assertions.add(a.object_entity_id)
-        
-        # Combine all relevant IDs for relation strengthening
-        all_ids = set(node_ids) | entity_ids_from_assertions
-        
-        # 3. Strengthen connections between co-activated nodes
-        # Find existing relations where BOTH sides are in the co-activated set
-        relations = self.db.query(Relation).filter(
-            Relation.from_id.in_(all_ids),
-            Relation.to_id.in_(all_ids)
-        ).all()
-        
-        for rel in relations:
-            # Increase strength (Simple linear reinforcement with cap)
-            rel.strength = min(rel.strength + 0.1, 5.0) 
-            rel.last_accessed_at = now
-            rel.access_count += 1
-        
+        # 2 + 3. Strengthen connections between co-activated nodes in one statement.
+        # Assertion IDs are expanded to their subject/object entities inside the
+        # CTE so reinforcement flows from retrieved facts down to concepts, and
+        # only relations with BOTH endpoints in the expanded set are touched.
+        # The decay accrued since the last access is applied before the
+        # increment (and marked applied), so touching a stale edge does not
+        # restore its old strength.
+        self.db.execute(
+            text(f"""
+                WITH activated AS (
+                    SELECT unnest(CAST(:ids AS uuid[])) AS id
+                ),
+                expanded AS (
+                    SELECT id FROM activated
+                    UNION
+                    SELECT a.subject_entity_id FROM assertions a
+                    JOIN activated ON a.id = activated.id
+                    WHERE a.subject_entity_id IS NOT NULL
+                    UNION
+                    SELECT a.object_entity_id FROM assertions a
+                    JOIN activated ON a.id = activated.id
+                    WHERE a.object_entity_id IS NOT NULL
+                ),
+                ids AS (
+                    SELECT array_agg(id) AS all_ids FROM expanded
+                )
+                UPDATE relations
+                SET strength = LEAST({_DECAYED_STRENGTH_SQL} + 0.1, 5.0),
+                    access_count = access_count + 1,
+                    last_accessed_at = :now,
+                    decayed_at = :now
+                FROM ids
+                WHERE relations.from_id = ANY(ids.all_ids)
+                  AND relations.to_id = ANY(ids.all_ids)
+            """),
+            {"ids": [str(nid) for nid in node_ids], "now": now, "lam": lam}
+        )
+
         self.db.commit()
 
     def spreading_activation(self, seed_ids: List[uuid.UUID], decay_factor: float = 0.5, steps: int = 2) -> Set[uuid.UUID]:
@@ -71,6 +116,7 @@ class CognitiveService:
         """
         activated = set(seed_ids)
         current_frontier = set(seed_ids)
+        now = datetime.utcnow()
         
         for _ in range(steps):
             if not current_frontier:
@@ -79,10 +125,11 @@ class CognitiveService:
             next_frontier = set()
             
             # Find all outgoing relations from current frontier
-            # Filter by strength > threshold to propagate
+            # Filter by strength > threshold to propagate. Decay is applied
+            # lazily from the timestamps so edges go stale between nightly runs.
             relations = self.db.query(Relation).filter(
                 Relation.from_id.in_(current_frontier),
-                Relation.strength > 0.8  # Threshold
+                decayed_strength(now) > 0.8  # Threshold
             ).all()
             
             for rel in relations:
@@ -94,31 +141,62 @@ class CognitiveService:
             
         return activated
 
-    def apply_activation_decay(self, decay_rate: float = 0.05):
+    def apply_activation_decay(self, half_life_hours: Optional[float] = None,
+                               chunk_size: Optional[int] = None,
+                               throttle_seconds: Optional[float] = None) -> int:
         """
         Background maintenance task.
-        A(t) = A0 * e^(-lambda * t)
-        
-        Reduces strength of Relations that haven't been accessed recently.
+        A(t) = A0 * e^(-lambda * t), lambda = ln 2 / half_life
+
+        Materializes time-based decay into `strength` so the stored value stays
+        close to what readers compute lazily via decayed_strength(). Relations
+        are walked in keyset-paginated chunks ordered by id, each chunk is
+        committed on its own and followed by a short sleep, so row locks are
+        held only briefly and condensation writes can interleave.
+
+        Returns the number of relations updated.
         """
+        chunk_size = chunk_size or DECAY_CHUNK_SIZE
+        throttle = DECAY_THROTTLE_SECONDS if throttle_seconds is None else throttle_seconds
+        lam = math.log(2) / (half_life_hours or ACTIVATION_HALF_LIFE_HOURS)
+
         now = datetime.utcnow()
-        # Find relations not accessed in the last 24 hours
-        # We decrease strength by decay_rate
-        # Sub-queries or batch updates depending on DB scale.
-        # For this phase, we use a simple update statement.
-        
-        # Strength = max(0.1, Strength - decay_rate)
-        # We only decay if not recently accessed
-        self.db.query(Relation).filter(
-            Relation.last_accessed_at < now,
-            Relation.strength > 0.1
-        ).update(
-            {
-                Relation.strength: Relation.strength - decay_rate
-            },
-            synchronize_session=False
-        )
-        self.db.commit()
+        last_id = None
+        updated = 0
+
+        while True:
+            chunk = self.db.execute(
+                text("""
+                    SELECT id FROM relations
+                    WHERE (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+                    ORDER BY id
+                    LIMIT :limit
+                """),
+                {"after": last_id, "limit": chunk_size}
+            ).scalars().all()
+            if not chunk:
+                break
+
+            result = self.db.execute(
+                text(f"""
+                    UPDATE relations
+                    SET strength = GREATEST(:floor, {_DECAYED_STRENGTH_SQL}),
+                        decayed_at = :now
+                    WHERE id = ANY(CAST(:ids AS uuid[]))
+                      AND strength > :floor
+                """),
+                {"ids": [str(rid) for rid in chunk], "floor": DECAY_FLOOR, "lam": lam, "now": now}
+            )
+            self.db.commit()
+            updated += result.rowcount or 0
+
+            last_id = str(chunk[-1])
+            if len(chunk) < chunk_size:
+                break
+            if throttle:
+                time.sleep(throttle)
+
+        return updated
 
     def reinforce_co_retrieval(self, item_ids: List[uuid.UUID]):
         """
@@ -0,0 +1,332 @@
+"""
+Columnar export and import of a project's memory graph, for offline
+analysis and for cloning a project between environments.
+
+Export writes one Parquet (or Arrow IPC) file per table to a directory,
+plus a manifest.json. Rows are streamed from a server-side cursor and
+written COLUMNAR_BATCH_ROWS at a time. With --vectors, the project's
+points in the episodic, assertion and entity collections are scrolled out
+of Qdrant into vectors.<ext>, so a restore does not re-embed anything.
+
+Import loads each file with COPY into a temporary staging table and merges
+it into the live table (ON CONFLICT DO NOTHING), all in one transaction,
+so re-running an import is harmless. Vectors are then batch-upserted into
+Qdrant.
+
+    python -m src.engine.columnar export --project ID --out DIR [--format parquet|arrow] [--vectors]
+    python -m src.engine.columnar import --dir DIR [--no-vectors]
+
+Needs pyarrow (pip install pyarrow), which is otherwise optional.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import DateTime, Float, Integer, SmallInteger, Boolean, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from src.db.models import Base
+
+logger = logging.getLogger("Columnar")
+
+COLUMNAR_BATCH_ROWS = int(os.getenv("COLUMNAR_BATCH_ROWS", "10000"))
+COLUMNAR_VECTOR_BATCH = int(os.getenv("COLUMNAR_VECTOR_BATCH", "512"))
+
+# Tables of a project's graph, parents first (the import order). Evidence
+# and its envelopes go along so imported assertions keep their provenance.
+TABLES = ["episodic_items", "entities", "proof_envelopes", "assertions", "assertion_evidence", "relations"]
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}  # format -> file extension
+MANIFEST = "manifest.json"
+VECTORS = "vectors"
+
+# Evidence for an imported assertion that lost to an existing one with the
+# same fingerprint (and so was not inserted) has nothing to attach to
+_MERGE_FILTERS = {"assertion_evidence": "WHERE assertion_id IN (SELECT id FROM assertions)"}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Columnar export/import needs pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _arrow_type(pa, column):
+    """
+    Arrow type for a mapped column. UUIDs and JSONB travel as text, which
+    COPY casts back on import.
+    """
+    t = column.type
+    if isinstance(t, DateTime):
+        return pa.timestamp("us", tz="UTC" if t.timezone else None)
+    if isinstance(t, Float):
+        return pa.float64()
+    if isinstance(t, SmallInteger):
+        return pa.int16()
+    if isinstance(t, Integer):
+        return pa.int64()
+    if isinstance(t, Boolean):
+        return pa.bool_()
+    return pa.string()
+
+
+def _select_sql(table: str) -> str:
+    exprs = []
+    for c in Base.metadata.tables[table].columns:
+        if isinstance(c.type, (UUID, JSONB)):
+            exprs.append(f'CAST("{c.name}" AS text) AS "{c.name}"')
+        else:
+            exprs.append(f'"{c.name}"')
+    return f"SELECT {', '.join(exprs)} FROM {table} WHERE project_id = CAST(:pid AS uuid) ORDER BY id"
+
+
+def _open_writer(pa, path: str, schema, fmt: str):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    import pyarrow.ipc
+    return pyarrow.ipc.new_file(path, schema)
+
+
+def _read_batches(pa, path: str, fmt: str, batch_rows: int) -> Iterator[Any]:
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_rows)
+        return
+    import pyarrow.ipc
+    with pa.memory_map(path) as source:
+        reader = pyarrow.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def _path(directory: str, name: str, fmt: str) -> str:
+    return os.path.join(directory, f"{name}.{FORMATS[fmt]}")
+
+
+# --- Export ---
+
+def export_project(bind, project_id, out_dir: str, fmt: str = "parquet", qdrant=None,
+                   batch_rows: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Write a project's tables (and, given a Qdrant client, its vectors) to
+    `out_dir`. Returns the manifest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt} (use parquet or arrow)")
+    pa = _require_pyarrow()
+    batch_rows = batch_rows or COLUMNAR_BATCH_ROWS
+    os.makedirs(out_dir, exist_ok=True)
+
+    rows: Dict[str, int] = {}
+    with bind.connect() as conn:
+        project_name = conn.execute(
+            text("SELECT name FROM projects WHERE id = CAST(:pid AS uuid)"), {"pid": str(project_id)}
+        ).scalar()
+        for table in TABLES:
+            rows[table] = _export_table(pa, conn, table, project_id, _path(out_dir, table, fmt), fmt, batch_rows)
+            logger.info(f"Exported {rows[table]} {table} rows.")
+    if qdrant is not None:
+        rows[VECTORS] = _export_vectors(pa, qdrant, project_id, _path(out_dir, VECTORS, fmt), fmt)
+        logger.info(f"Exported {rows[VECTORS]} vectors.")
+
+    manifest = {
+        "project_id": str(project_id),
+        "project_name": project_name,
+        "format": fmt,
+        "rows": rows,
+        "exported_at": datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _export_table(pa, conn, table: str, project_id, path: str, fmt: str, batch_rows: int) -> int:
+    columns = list(Base.metadata.tables[table].columns)
+    schema = pa.schema([pa.field(c.name, _arrow_type(pa, c)) for c in columns])
+    result = conn.execution_options(stream_results=True, yield_per=batch_rows).execute(
+        text(_select_sql(table)), {"pid": str(project_id)}
+    )
+    written = 0
+    writer = _open_writer(pa, path, schema, fmt)
+    try:
+        for chunk in result.mappings().partitions(batch_rows):
+            writer.write_table(pa.Table.from_pylist([dict(r) for r in chunk], schema=schema))
+            written += len(chunk)
+    finally:
+        writer.close()
+    return written
+
+
+def _vector_collections(project_id) -> List[str]:
+    from src.db.qdrant import ASSERTION_COLLECTION, ENTITY_COLLECTION, episodic_collection
+    return [episodic_collection(str(project_id)), ASSERTION_COLLECTION, ENTITY_COLLECTION]
+
+
+def _export_vectors(pa, qdrant, project_id, path: str, fmt: str) -> int:
+    from qdrant_client.http import models
+    schema = pa.schema([
+        pa.field("collection", pa.string()),
+        pa.field("id", pa.string()),
+        pa.field("vector", pa.list_(pa.float32())),
+        pa.field("payload", pa.string()),
+    ])
+    by_project = models.Filter(must=[
+        models.FieldCondition(key="project_id", match=models.MatchValue(value=str(project_id)))
+    ])
+    written = 0
+    writer = _open_writer(pa, path, schema, fmt)
+    try:
+        for collection in _vector_collections(project_id):
+            if not qdrant.collection_exists(collection):
+                continue
+            offset = None
+            while True:
+                points, offset = qdrant.scroll(
+                    collection_name=collection, scroll_filter=by_project, limit=COLUMNAR_VECTOR_BATCH,
+                    offset=offset, with_payload=True, with_vectors=True,
+                )
+                if points:
+                    writer.write_table(pa.Table.from_pylist([
+                        {"collection": collection, "id": str(p.id), "vector": p.vector,
+                         "payload": json.dumps(p.payload or {})}
+                        for p in points
+                    ], schema=schema))
+                    written += len(points)
+                if offset is None:
+                    break
+    finally:
+        writer.close()
+    return written
+
+
+# --- Import ---
+
+def import_project(bind, in_dir: str, qdrant=None, batch_rows: Optional[int] = None) -> Dict[str, int]:
+    """
+    Load an export directory into this database (and, given a Qdrant
+    client, its vectors into Qdrant). Rows that already exist are kept.
+    Returns the rows (and vectors) loaded per table.
+    """
+    pa = _require_pyarrow()
+    batch_rows = batch_rows or COLUMNAR_BATCH_ROWS
+    with open(os.path.join(in_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    fmt = manifest["format"]
+
+    loaded: Dict[str, int] = {}
+    raw = bind.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(
+            "INSERT INTO projects (id, name, created_at) VALUES (%s, %s, now()) ON CONFLICT DO NOTHING",
+            (manifest["project_id"], manifest.get("project_name")),
+        )
+        for table in TABLES:
+            path = _path(in_dir, table, fmt)
+            if os.path.exists(path):
+                loaded[table] = _copy_table(pa, cur, table, path, fmt, batch_rows)
+                logger.info(f"Imported {loaded[table]} {table} rows.")
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    vectors_path = _path(in_dir, VECTORS, fmt)
+    if qdrant is not None and os.path.exists(vectors_path):
+        loaded[VECTORS] = _import_vectors(pa, qdrant, manifest["project_id"], vectors_path, fmt)
+        logger.info(f"Imported {loaded[VECTORS]} vectors.")
+    return loaded
+
+
+def _copy_table(pa, cur, table: str, path: str, fmt: str, batch_rows: int) -> int:
+    """
+    COPY a file into a staging table batch by batch, then merge it into
+    `table`. Returns the rows inserted.
+    """
+    import pyarrow.csv as pacsv
+    known = {c.name for c in Base.metadata.tables[table].columns}
+    staging = f"_import_{table}"
+    cur.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+    # Nulls are written unquoted and every value quoted, which COPY ... csv
+    # reads back as NULL and as (possibly empty) values respectively
+    options = pacsv.WriteOptions(include_header=False, quoting_style="all_valid")
+
+    cols = None
+    for batch in _read_batches(pa, path, fmt, batch_rows):
+        names = [n for n in batch.schema.names if n in known]
+        if cols is None:
+            cols = ", ".join(f'"{n}"' for n in names)
+        buf = io.BytesIO()
+        pacsv.write_csv(batch.select(names), buf, write_options=options)
+        buf.seek(0)
+        cur.copy_expert(f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv)", buf)
+    if cols is None:
+        return 0
+    cur.execute(
+        f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging} {_MERGE_FILTERS.get(table, '')} "
+        "ON CONFLICT DO NOTHING"
+    )
+    return cur.rowcount
+
+
+def _import_vectors(pa, qdrant, project_id, path: str, fmt: str) -> int:
+    from qdrant_client.http import models
+    from src.db.qdrant import EPISODIC_COLLECTION, ensure_collection, episodic_collection
+    upserted = 0
+    for batch in _read_batches(pa, path, fmt, COLUMNAR_VECTOR_BATCH):
+        points: Dict[str, List[models.PointStruct]] = {}
+        for row in batch.to_pylist():
+            collection = row["collection"]
+            # Episodic layout (shared or per-project) is this environment's
+            if collection.startswith(EPISODIC_COLLECTION):
+                collection = episodic_collection(str(project_id))
+            points.setdefault(collection, []).append(
+                models.PointStruct(id=row["id"], vector=row["vector"], payload=json.loads(row["payload"]))
+            )
+        for collection, group in points.items():
+            ensure_collection(qdrant, collection, dim=len(group[0].vector))
+            qdrant.upsert(collection_name=collection, points=group)
+            upserted += len(group)
+    return upserted
+
+
+def _qdrant_client():
+    from qdrant_client import QdrantClient
+    from src.db.session import QDRANT_URL, QDRANT_API_KEY
+    return QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar export/import of a project's memory graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export")
+    exp.add_argument("--project", required=True)
+    exp.add_argument("--out", required=True)
+    exp.add_argument("--format", choices=list(FORMATS), default="parquet")
+    exp.add_argument("--vectors", action="store_true", help="also export the project's Qdrant points")
+    imp = sub.add_parser("import")
+    imp.add_argument("--dir", required=True)
+    imp.add_argument("--no-vectors", action="store_true", help="skip vectors.<ext> even if present")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from src.db.session import engine
+    if args.command == "export":
+        qdrant = _qdrant_client() if args.vectors else None
+        print(json.dumps(export_project(engine, args.project, args.out, args.format, qdrant), indent=2))
+    else:
+        qdrant = None if args.no_vectors else _qdrant_client()
+        print(json.dumps(import_project(engine, args.dir, qdrant), indent=2))
+
+
+if __name__ == "__main__":
+    main()
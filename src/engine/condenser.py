@@ -1,231 +1,293 @@
 import asyncio
-import json
 import hashlib
-import hmac
 import os
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 
-from src.db.models import Project, EpisodicItem, Assertion, Policy, Entity
+from src.db.models import Project, EpisodicItem, Assertion, Policy, Entity, ProofEnvelope
 from src.engine.ner import get_ner_engine
-from src.learn.canonicalize import EntityCanonicalizer
+from src.learn.canonicalize import EntityCanonicalizer, EntityPlan
+from src.learn.entity_index import get_entity_index
+from src.learn.assertion_store import upsert_assertions, UpsertedAssertion
+from src.learn.evidence_store import Evidence
 from src.engine.edge_synthesizer import EdgeSynthesizer
+from src.engine.merkle import merkle_proofs
+from src.engine.provenance import KEY_SECRET, sign_envelope
 from src.llm.schemas import ExtractedEntity, ExtractedAssertion, AssertionEvidence
 
 
 from src.engine.thread_shard import get_thread_shard
+from src.retrieve.assertion_index import sync_assertion_vectors, INDEXABLE_STATUSES
 
 # Mock LLM client for now (or use real one if env var present)
 # In a real implementation this would use the same client as router.py
 # For this implementation phase, we focus on the structure and plumbing.
 
-KEY_SECRET = os.getenv("CONDENSATE_SECRET", "super-secret-key").encode()
+
+@dataclass
+class WritePlan:
+    """
+    Everything one distill writes, computed before the write transaction.
+    """
+    project_id: uuid.UUID
+    entities: EntityPlan
+    batch_provenance: Dict[str, Any]
+    envelope: Optional[ProofEnvelope] = None
+    sources: List[Evidence] = field(default_factory=list)  # evidence for each derived fact
+    llm_assertions: List[ExtractedAssertion] = field(default_factory=list)
+    prepared: List[Any] = field(default_factory=list)  # Assertions and Policies
+
 
 class Condenser:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, index_vectors: bool = True):
         self.db = db
         self.ner = get_ner_engine()
+        # Off for replays into a shadow schema: the live Qdrant collections
+        # must not see shadow rows (they are indexed at cutover)
+        self.index_vectors = index_vectors
 
     async def distill(self, project_id: uuid.UUID, items: List[EpisodicItem]):
         """
         Main entry point. Takes raw episodic items and "condenses" them 
         into Assertions and Policies.
+
+        Never blocks the event loop: CPU work runs on the thread shard and
+        DB work on a worker thread, so NER, deterministic condensation, LLM
+        extraction and DB reads overlap, and several distills (each with its
+        own session) can interleave on one loop.
+
+        No connection is held while computing. The run reads the project's
+        entities once, builds a WritePlan in memory, and applies it in one
+        short transaction.
         """
         if not items:
             return
 
         # 1. Pipeline components
         print(f"[Condenser] Starting distillation for {len(items)} items. Project: {project_id}")
-        canon = EntityCanonicalizer(self.db)
+        # Compute runs without a pooled connection: end any transaction the
+        # caller left open (items stay loaded) and work on plain values.
+        await asyncio.to_thread(self._release)
+        texts = [item.text for item in items]
+        item_ids = [str(item.id) for item in items]
+        canon = EntityCanonicalizer(self.db, vector_index=get_entity_index() if self.index_vectors else None)
         edge_synth = EdgeSynthesizer(self.db)
-        print("[Condenser] Components initialized.")
-        
-        # 2. Extract Entities from all items (Parallelized)
-        # We collect all candidate entities for canonicalization, processing NER on threads
-        all_candidate_entities: List[ExtractedEntity] = []
-        
-        print("[Condenser] Getting thread shard...")
         shard = get_thread_shard()
-        print(f"[Condenser] Shard acquired: {shard}")
-        ner_futures = []
+        use_llm = os.getenv("LLM_ENABLED", "false").lower() == "true"
+        full_text = "\n".join(texts)
+
+        # 2. Start everything that only needs the raw text at once:
+        #    NER per item and deterministic condensation of the batch on the
+        #    shard, LLM extraction (if enabled) on the loop.
+        from src.engine.deterministic import DeterministicCondenser
+        dc = DeterministicCondenser()
+        ner_tasks = [
+            asyncio.ensure_future(shard.run(self.ner.extract_entities, text))
+            for text in texts
+        ]
+        dc_task = asyncio.ensure_future(shard.run(dc.process, full_text))
+        extract_task = None
+        if use_llm:
+            # LLM Distillation (Slow Path)
+            extractor_type = os.getenv("EXTRACTOR_TYPE", "memory_extractor").lower()
+            if extractor_type == "langextract":
+                print("[Condenser] Using LangExtract for distillation.")
+                from src.agents.langextract import LangExtract
+                extractor = LangExtract()
+            else:
+                print("[Condenser] Using MemoryExtractor for distillation.")
+                from src.learn.extractor import MemoryExtractor
+                extractor = MemoryExtractor()
+            extract_task = asyncio.ensure_future(extractor.extract(items))
+        else:
+            # Deterministic L3-Condensation (Fast Path)
+            print("[Condenser] Using DeterministicCondenser (Fast Path)")
 
-        
-        for item in items:
-            # Offload CPU-bound NER model inference to thread pool
-            future = shard.submit(self.ner.extract_entities, item.text)
-            ner_futures.append(future)
-            
         # Collect NER results
-        print(f"[Condenser] Waiting for {len(ner_futures)} NER futures...")
+        all_candidate_entities: List[ExtractedEntity] = []
+        print(f"[Condenser] Waiting for {len(ner_tasks)} NER tasks...")
         from src.engine.stopwords import get_stop_words, MIN_ENTITY_LENGTH
         _sw = get_stop_words()
-        for i, future in enumerate(ner_futures):
-            try:
-                ner_results = future.result()
-                print(f"[Condenser] NER future {i} returned {len(ner_results)} entities.")
-                for res in ner_results:
-                    ent_text = res["text"]
-                    # Entity bounding: skip generic / short / stop-word tokens
-                    if (len(ent_text) < MIN_ENTITY_LENGTH
-                            or ent_text.lower() in _sw):
-                        continue
-                    all_candidate_entities.append(ExtractedEntity(
-                        name=ent_text,
-                        type=res["label"].lower() if res["label"] else "concept",
-                        aliases=[],
-                        confidence=res["score"]
-                    ))
-            except Exception as e:
+        ner_outcomes = await asyncio.gather(*ner_tasks, return_exceptions=True)
+        for i, ner_results in enumerate(ner_outcomes):
+            if isinstance(ner_results, Exception):
                 # Log but continue if one fails
-                print(f"[Condenser] NER failed for item {i}: {e}")
+                print(f"[Condenser] NER failed for item {i}: {ner_results}")
+                continue
+            for res in ner_results:
+                ent_text = res["text"]
+                # Entity bounding: skip generic / short / stop-word tokens
+                if (len(ent_text) < MIN_ENTITY_LENGTH
+                        or ent_text.lower() in _sw):
+                    continue
+                all_candidate_entities.append(ExtractedEntity(
+                    name=ent_text,
+                    type=res["label"].lower() if res["label"] else "concept",
+                    aliases=[],
+                    confidence=res["score"]
+                ))
 
-        # 2. Distillation Strategy
-        # Check if LLM is enabled (default False for "No-LLM by default")
-        use_llm = os.getenv("LLM_ENABLED", "false").lower() == "true"
-        
+        result = await dc_task
+        print(f"[Condenser] Deterministic process complete. Entities: {len(result.get('entities', []))}")
         extracted_facts = []
-        
-        if use_llm:
-             # LLM Distillation (Slow Path)
-             extractor_type = os.getenv("EXTRACTOR_TYPE", "memory_extractor").lower()
-             
-             if extractor_type == "langextract":
-                 print("[Condenser] Using LangExtract for distillation.")
-                 from src.agents.langextract import LangExtract
-                 extractor = LangExtract()
-             else:
-                 print("[Condenser] Using MemoryExtractor for distillation.")
-                 from src.learn.extractor import MemoryExtractor
-                 extractor = MemoryExtractor()
-
-             from src.learn.consolidate import KnowledgeConsolidator
-             
-             bundles = await extractor.extract(items)
-             
-             # 1. Gather all entities and assertions across bundles
-             llm_entities = []
-             llm_assertions = []
-             for b in bundles:
-                 llm_entities.extend(b.entities)
-                 llm_assertions.extend(b.assertions)
-             
-             all_candidate_entities.extend(llm_entities)
-             
-             # 2. Canonicalize FIRST (so we have IDs for assertions)
-             res_map = canon.resolve(str(project_id), all_candidate_entities)
-             
-             # 3. Consolidate Assertions
-             consolidator = KnowledgeConsolidator(self.db)
-             # LLM assertions should also follow REVIEW_MODE (handled inside consolidate)
-             consolidator.consolidate(str(project_id), llm_assertions, res_map)
-             
-             # Also run deterministic for a quick summary even if LLM is on
-             from src.engine.deterministic import DeterministicCondenser
-             dc = DeterministicCondenser()
-             full_text = "\n".join([item.text for item in items])
-             result = dc.process(full_text)
-             if result.get("condensed"):
-                 extracted_facts.append({
-                     "subject": "Conversation Batch",
-                     "predicate": "summarized_as",
-                     "object": result["condensed"],
-                     "confidence": 1.0,
-                     "type": "fact"
-                 })
+        if result.get("condensed"):
+            # Condensed Summary (Stored as a high-level assertion)
+            extracted_facts.append({
+                "subject": "Conversation Batch",
+                "predicate": "summarized_as",
+                "object": result["condensed"],
+                "confidence": 1.0,
+                "type": "fact"
+            })
+
+        llm_assertions = []
+        if extract_task is not None:
+            bundles = await extract_task
+            for b in bundles:
+                all_candidate_entities.extend(b.entities)
+                llm_assertions.extend(b.assertions)
         else:
-             # Deterministic L3-Condensation (Fast Path)
-             print("[Condenser] Using DeterministicCondenser (Fast Path)")
-             from src.engine.deterministic import DeterministicCondenser
-             dc = DeterministicCondenser()
-             
-             # Combine text for processing or process individually
-             # Let's process the combined text of the batch for broader context
-             full_text = "\n".join([item.text for item in items])
-             print(f"[Condenser] Processing text length: {len(full_text)}")
-             result = dc.process(full_text)
-             print(f"[Condenser] Deterministic process complete. Entities: {len(result.get('entities', []))}")
-             
-             # Combine results
-             all_candidate_entities.extend(result.get("entities", []))
-             
-             # 2. Condensed Summary (Stored as a high-level assertion)
-             if result.get("condensed"):
-                 extracted_facts.append({
-                     "subject": "Conversation Batch",
-                     "predicate": "summarized_as",
-                     "object": result["condensed"],
-                     "confidence": 1.0,
-                     "type": "fact"
-                 })
-             
-             # Resolve all entities (NER + deterministic)
-             res_map = canon.resolve(str(project_id), all_candidate_entities)
-
-        # 3. Synthesize edges
-        entity_ids = [uuid.UUID(eid) for eid in res_map.values()]
-        print(f"[Condenser] Synthesizing edges for {len(entity_ids)} entities...")
-        
-        # Synthesize concept-to-concept edges
-        batch_prov = {
-            "batch_ts": datetime.utcnow().isoformat(),
-            "item_ids": [str(item.id) for item in items]
-        }
-        edge_count = edge_synth.synthesize(project_id, entity_ids, batch_prov)
-        print(f"[Condenser] Synthesized {edge_count} edges.")
+            all_candidate_entities.extend(result.get("entities", []))
 
-        # 3. Create Artifacts with Proof Envelopes (Parallelized)
-        source_hashes = [hashlib.sha256(item.text.encode()).hexdigest() for item in items]
-        
-        # Phase 1: Filter & Prepare (Parallel)
-        # We check duplicates synchronously (DB read), then generate envelopes/guardrails in threads
-        
-        assertion_futures = []
-        
+        # 3. Guardrails for facts/policies (shard), while entities are
+        #    resolved against a short read of the project's entities (no
+        #    connection is held while planning). One proof envelope, signed
+        #    over the Merkle root of the inputs, covers everything this
+        #    distill derives; each source item gets its inclusion proof.
+        envelope, sources = None, []
+        if extracted_facts:
+            source_hashes = [hashlib.sha256(text.encode()).hexdigest() for text in texts]
+            envelope, proofs = self._prepare_envelope(project_id, source_hashes)
+            sources = [
+                Evidence(episodic_id=item_id, envelope_id=envelope.id, proof=proof)
+                for item_id, proof in zip(item_ids, proofs)
+            ]
+        prepare_tasks = []
         for fact in extracted_facts:
             if fact["type"] == "fact":
-                # Check duplication first (must be on main thread with DB session)
-                existing = self.db.execute(
-                    select(Assertion).where(
-                        Assertion.project_id == project_id,
-                        Assertion.subject_text == fact["subject"],
-                        Assertion.predicate == fact["predicate"],
-                        Assertion.object_text == fact["object"]
-                    )
-                ).scalar_one_or_none()
-                
-                if not existing:
-                    # Submit for heavy processing (Guardrails + Crypto)
-                    future = shard.submit(self._prepare_assertion, project_id, fact, source_hashes)
-                    assertion_futures.append(future)
-                    
+                prepare_tasks.append(shard.run(self._prepare_assertion, project_id, fact))
             elif fact["type"] == "policy":
-                # Policies usually vastly fewer, we can just process inline or parallelize similarly
-                # For now let's parallelize for consistency
-                future = shard.submit(self._prepare_policy, project_id, fact, source_hashes)
-                assertion_futures.append(future)
-
-        # Phase 2: Commit (Sequential Main Thread)
-        print(f"[Condenser] Waiting for {len(assertion_futures)} assertion futures...")
-        for i, future in enumerate(assertion_futures):
-            try:
-                result_obj = future.result()
-                if result_obj:
-                    print(f"[Condenser] Assertion {i} ready. Adding to DB.")
-                    self.db.add(result_obj)
-            except Exception as e:
-                print(f"[Condenser] Failed to prepare assertion/policy {i}: {e}")
-        
-        print("[Condenser] Committing transaction...")
-        self.db.commit()
+                prepare_tasks.append(shard.run(self._prepare_policy, project_id, fact, envelope))
+        prepared_future = asyncio.gather(*prepare_tasks, return_exceptions=True)
+
+        existing_entities = await asyncio.to_thread(self._read, canon.snapshot, str(project_id))
+        entity_plan = await asyncio.to_thread(canon.plan, str(project_id), all_candidate_entities, existing_entities)
+
+        prepared = []
+        for i, result_obj in enumerate(await prepared_future):
+            if isinstance(result_obj, Exception):
+                print(f"[Condenser] Failed to prepare assertion/policy {i}: {result_obj}")
+            elif result_obj:
+                prepared.append(result_obj)
+
+        plan = WritePlan(
+            project_id=project_id,
+            entities=entity_plan,
+            batch_provenance={"batch_ts": datetime.utcnow().isoformat(), "item_ids": item_ids},
+            envelope=envelope,
+            sources=sources,
+            llm_assertions=llm_assertions,
+            prepared=prepared,
+        )
+
+        # 4. One short write transaction
+        indexable_ids = await asyncio.to_thread(self._write, plan, canon, edge_synth)
+
+        # Make auto-approved facts recallable through semantic_assertions
+        if indexable_ids and self.index_vectors:
+            await asyncio.to_thread(sync_assertion_vectors, indexable_ids)
         print("[Condenser] Distillation complete.")
 
-    def _prepare_assertion(self, project_id: uuid.UUID, fact: dict, source_hashes: List[str]) -> Optional[Assertion]:
+    def _release(self):
         """
-        CPU-bound construction of Assertion: runs Guardrails and Signs Envelope.
+        End the session's transaction so its connection goes back to the
+        pool. Pending writes are flushed and committed; loaded objects are
+        detached first so they stay readable without reloading.
+        """
+        self.db.flush()
+        self.db.expunge_all()
+        self.db.commit()
+
+    def _read(self, fn, *args):
+        try:
+            return fn(*args)
+        finally:
+            self._release()
+
+    def _write(self, plan: WritePlan, canon: EntityCanonicalizer, edge_synth: EdgeSynthesizer) -> List[str]:
+        """
+        Apply a write plan in one transaction: entity inserts and alias
+        appends, LLM assertion consolidation, one set-based co-occurrence
+        edge upsert, then fact upserts and new policies. Returns the IDs of
+        assertions to index for recall.
+        """
+        project_id = plan.project_id
+        try:
+            canon.apply(plan.entities)
+            self.db.flush()
+
+            new_assertions: List[UpsertedAssertion] = []
+            if plan.llm_assertions:
+                from src.learn.consolidate import KnowledgeConsolidator
+                # LLM assertions should also follow REVIEW_MODE (handled inside consolidate)
+                new_assertions.extend(KnowledgeConsolidator(self.db).consolidate(
+                    str(project_id), plan.llm_assertions, plan.entities.resolution, commit=False
+                ) or [])
+
+            entity_ids = [uuid.UUID(eid) for eid in plan.entities.resolution.values()]
+            print(f"[Condenser] Synthesizing edges for {len(entity_ids)} entities...")
+            edge_count = edge_synth.synthesize(project_id, entity_ids, plan.batch_provenance)
+            print(f"[Condenser] Synthesized {edge_count} edges.")
+
+            if plan.envelope is not None:
+                self.db.add(plan.envelope)
+                self.db.flush()
+
+            # Facts are upserted by fingerprint in one statement per batch;
+            # a fact seen before is merged into the existing row. Each
+            # source item becomes an evidence row under the envelope.
+            facts = [obj for obj in plan.prepared if isinstance(obj, Assertion)]
+            new_assertions.extend(upsert_assertions(self.db, facts, [plan.sources] * len(facts)))
+            for obj in plan.prepared:
+                if not isinstance(obj, Assertion):
+                    self.db.add(obj)
+
+            print("[Condenser] Committing transaction...")
+            self.db.flush()
+            indexable_ids = [str(a.id) for a in new_assertions if a.id and a.status in INDEXABLE_STATUSES]
+            self.db.commit()
+            return indexable_ids
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _prepare_envelope(self, project_id: uuid.UUID,
+                          source_hashes: List[str]) -> Tuple[ProofEnvelope, List[list]]:
+        """
+        Sign one proof envelope over the Merkle root of a distill's input
+        hashes. Returns it with the inclusion proof of each input, so the
+        signature is computed once and nothing per-assertion grows with
+        the batch size.
+        """
+        root, proofs = merkle_proofs(source_hashes)
+        envelope = {
+            "method": "llm-distillation",
+            "model": "gpt-4-mock",
+            "merkle_root": root,
+            "leaf_count": len(source_hashes),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+        signature = sign_envelope(envelope, KEY_SECRET)
+        return ProofEnvelope(id=uuid.uuid4(), project_id=project_id, signature=signature, **envelope), proofs
+
+    def _prepare_assertion(self, project_id: uuid.UUID, fact: dict) -> Optional[Assertion]:
+        """
+        CPU-bound construction of Assertion: runs Guardrails.
         Returns the Assertion object (detached) to be added to session.
         """
         print(f"[Condenser] _prepare_assertion start: {fact['predicate']}")
@@ -258,19 +320,6 @@ class Condenser:
             else:
                 status = "pending_review"
 
-        # Generate Proof Envelope
-        envelope = {
-            "method": "llm-distillation",
-            "model": "gpt-4-mock",
-            "inputs": source_hashes,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Sign the envelope
-        payload = json.dumps(envelope, sort_keys=True).encode()
-        signature = hmac.new(KEY_SECRET, payload, hashlib.sha256).hexdigest()
-        envelope["signature"] = signature
-
         return Assertion(
             project_id=project_id,
             subject_text=fact["subject"],
@@ -281,29 +330,15 @@ class Condenser:
             rejection_reason=rejection_reason,
             instruction_score=guardrail_result["instruction_score"],
             safety_score=guardrail_result["safety_score"],
-            provenance=[envelope],
             strength=1.0, # Initial strength
             access_count=0
         )
 
-    def _prepare_policy(self, project_id: uuid.UUID, policy_data: dict, source_hashes: List[str]) -> Policy:
-        # Generate Proof Envelope
-        envelope = {
-            "method": "llm-distillation",
-            "model": "gpt-4-mock",
-            "inputs": source_hashes,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Sign the envelope
-        payload = json.dumps(envelope, sort_keys=True).encode()
-        signature = hmac.new(KEY_SECRET, payload, hashlib.sha256).hexdigest()
-        envelope["signature"] = signature
-
+    def _prepare_policy(self, project_id: uuid.UUID, policy_data: dict, envelope: ProofEnvelope) -> Policy:
         return Policy(
             project_id=project_id,
             trigger=policy_data["trigger"],
             rule=policy_data["rule"],
             priority=policy_data["priority"],
-            provenance=[envelope]
+            provenance=[{"envelope_id": str(envelope.id)}]
         )
@@ -1,83 +1,93 @@
+import json
+import math
 import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import text
+
+from src.engine.cognitive import ACTIVATION_HALF_LIFE_HOURS, _DECAYED_STRENGTH_SQL
+
+MAX_EDGE_STRENGTH = 5.0
+PROVENANCE_KEEP = 10  # evidence points kept per edge (limits JSONB bloat)
 
-from src.db.models import Relation
 
 class EdgeSynthesizer:
     def __init__(self, db: Session):
         self.db = db
 
-    def synthesize(self, project_id: uuid.UUID, entity_ids: List[uuid.UUID], batch_provenance: dict) -> int:
+    def synthesize(self, project_id: uuid.UUID, entity_ids: List[uuid.UUID], batch_provenance: dict,
+                   timestamp: Optional[datetime] = None) -> int:
         """
         For each pair of entities in the batch, upsert a co-occurrence Relation edge.
         Returns count of edges created/updated.
+
+        All pairs are written in one set-based statement: existing edges are
+        reinforced (Hebbian-like growth) from their decayed strength, missing
+        ones inserted. Does not commit.
         """
+        # Duplicate IDs (several names resolving to one entity) would only
+        # add self-loops and double-count pairs
+        entity_ids = list(dict.fromkeys(entity_ids))
         if len(entity_ids) < 2:
             return 0
 
-        edges_processed = 0
-        now = datetime.utcnow()
-
-        # Create unique pairs (A, B) where A < B to avoid duplicate undirected edges if preferred,
-        # but here we follow the existing Relation model which seems to be directed (from_id, to_id).
-        # We will create bidirectional links for co-occurrence to ensure symmetry in the graph.
-        
+        # Bidirectional: A -> B and B -> A, so the co-occurrence graph is symmetric
+        from_ids, to_ids = [], []
         for i, id_a in enumerate(entity_ids):
             for id_b in entity_ids[i+1:]:
-                # Bidirectional: A -> B and B -> A
-                edges_processed += self._upsert_relation(project_id, id_a, id_b, batch_provenance, now)
-                edges_processed += self._upsert_relation(project_id, id_b, id_a, batch_provenance, now)
-
-        return edges_processed
+                from_ids += [str(id_a), str(id_b)]
+                to_ids += [str(id_b), str(id_a)]
 
-    def _upsert_relation(self, project_id: uuid.UUID, from_id: uuid.UUID, to_id: uuid.UUID, 
-                         batch_provenance: dict, timestamp: datetime) -> int:
-        """
-        Internal helper to upsert a directed relationship between two entities.
-        """
-        # Exact match check
-        stmt = select(Relation).where(
-            Relation.project_id == project_id,
-            Relation.from_id == from_id,
-            Relation.to_id == to_id,
-            Relation.relation_type == "co_occurs_with"
-        )
-        existing = self.db.execute(stmt).scalars().first()
-
-        if existing:
-            # Reinforce (Hebbian-like growth)
-            existing.strength = min(existing.strength + 0.1, 5.0)
-            existing.access_count += 1
-            existing.last_accessed_at = timestamp
-            
-            # Update provenance (limit size to avoid JSONB bloat)
-            prov = existing.provenance or []
-            # Only add if batch not already in prov
-            if not any(p.get("batch_ts") == batch_provenance.get("batch_ts") for p in prov):
-                prov.append(batch_provenance)
-                # Keep last 10 evidence points
-                existing.provenance = prov[-10:]
-            
-            self.db.add(existing)
-        else:
-            # Create new
-            new_rel = Relation(
-                id=uuid.uuid4(),
-                project_id=project_id,
-                from_id=from_id,
-                from_kind="entity",
-                relation_type="co_occurs_with",
-                to_id=to_id,
-                to_kind="entity",
-                strength=1.0, # Initial strength
-                confidence=1.0,
-                provenance=[batch_provenance],
-                access_count=1,
-                last_accessed_at=timestamp
+        self.db.execute(text(f"""
+            WITH pairs AS (
+                SELECT unnest(CAST(:from_ids AS uuid[])) AS from_id,
+                       unnest(CAST(:to_ids AS uuid[])) AS to_id
+            ), reinforced AS (
+                UPDATE relations r
+                SET strength = LEAST({_DECAYED_STRENGTH_SQL} + 0.1, :max_strength),
+                    access_count = r.access_count + 1,
+                    last_accessed_at = :now,
+                    decayed_at = :now,
+                    provenance = CASE
+                        -- Only add if batch not already in prov
+                        WHEN COALESCE(r.provenance, '[]'::jsonb) @> CAST(:batch_match AS jsonb) THEN r.provenance
+                        ELSE (
+                            SELECT COALESCE(jsonb_agg(kept.entry ORDER BY kept.n), '[]'::jsonb)
+                            FROM (
+                                SELECT entry, n
+                                FROM jsonb_array_elements(COALESCE(r.provenance, '[]'::jsonb) || CAST(:prov AS jsonb))
+                                     WITH ORDINALITY AS t(entry, n)
+                                ORDER BY n DESC
+                                LIMIT :keep
+                            ) kept
+                        )
+                    END
+                FROM pairs p
+                WHERE r.project_id = CAST(:pid AS uuid)
+                  AND r.from_id = p.from_id AND r.to_id = p.to_id
+                  AND r.relation_type = 'co_occurs_with'
+                RETURNING r.from_id, r.to_id
+            )
+            INSERT INTO relations (
+                id, project_id, from_id, from_kind, relation_type, to_id, to_kind,
+                strength, confidence, provenance, access_count, last_accessed_at
+            )
+            SELECT gen_random_uuid(), CAST(:pid AS uuid), p.from_id, 'entity', 'co_occurs_with', p.to_id, 'entity',
+                   1.0, 1.0, CAST(:prov AS jsonb), 1, :now
+            FROM pairs p
+            WHERE NOT EXISTS (
+                SELECT 1 FROM reinforced x WHERE x.from_id = p.from_id AND x.to_id = p.to_id
             )
-            self.db.add(new_rel)
-        
-        return 1
+        """), {
+            "pid": str(project_id),
+            "from_ids": from_ids,
+            "to_ids": to_ids,
+            "prov": json.dumps([batch_provenance]),
+            "batch_match": json.dumps([{"batch_ts": batch_provenance.get("batch_ts")}]),
+            "max_strength": MAX_EDGE_STRENGTH,
+            "keep": PROVENANCE_KEEP,
+            "now": timestamp or datetime.utcnow(),
+            "lam": math.log(2) / ACTIVATION_HALF_LIFE_HOURS,
+        })
+        return len(from_ids)
@@ -0,0 +1,156 @@
+"""
+Streaming project export (GET /v1/export/jsonl).
+
+A project's episodic items, then its assertions (with their evidence), are
+read in id order over server-side cursors on a connection of their own and
+written as JSON lines as they arrive, so memory use does not grow with the
+project. Every line carries an opaque `cursor`: passing the last one
+received back as ?cursor= resumes the export right after that line.
+
+Output can be compressed on the fly with gzip, or with zstd when the
+zstandard package is installed.
+"""
+import base64
+import json
+import os
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import text
+
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+EXPORT_FLUSH_BYTES = int(os.getenv("EXPORT_FLUSH_BYTES", str(64 * 1024)))
+
+_ITEMS_SQL = text("""
+    SELECT id, text, source, occurred_at, created_at
+    FROM episodic_items
+    WHERE project_id = CAST(:pid AS uuid)
+      AND (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+    ORDER BY id
+""")
+
+_ASSERTIONS_SQL = text("""
+    SELECT a.id, a.subject_text, a.predicate, a.object_text, a.confidence, a.status, a.provenance,
+           COALESCE((
+               SELECT jsonb_agg(jsonb_build_object('episodic_id', e.episodic_id, 'quote', e.quote,
+                                                   'envelope_id', e.envelope_id) ORDER BY e.created_at, e.id)
+               FROM assertion_evidence e WHERE e.assertion_id = a.id
+           ), '[]'::jsonb) AS evidence
+    FROM assertions a
+    WHERE a.project_id = CAST(:pid AS uuid)
+      AND (CAST(:after AS uuid) IS NULL OR a.id > CAST(:after AS uuid))
+    ORDER BY a.id
+""")
+
+
+def _item_record(row) -> Dict[str, Any]:
+    return {
+        "type": "episodic_item",
+        "id": str(row["id"]),
+        "text": row["text"],
+        "source": row["source"],
+        "occurred_at": row["occurred_at"].isoformat() if row["occurred_at"] else None,
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+    }
+
+
+def _assertion_record(row) -> Dict[str, Any]:
+    return {
+        "type": "assertion",
+        "id": str(row["id"]),
+        "statement": f"{row['subject_text']} {row['predicate']} {row['object_text']}",
+        "confidence": row["confidence"],
+        "status": row["status"],
+        "provenance": row["provenance"],
+        "evidence": row["evidence"],
+    }
+
+
+# Export order: sections in turn, each in id order
+SECTIONS = [
+    ("episodic_item", _ITEMS_SQL, _item_record),
+    ("assertion", _ASSERTIONS_SQL, _assertion_record),
+]
+_SECTION_NAMES = [name for name, _, _ in SECTIONS]
+
+MEDIA_TYPES = {None: "application/x-jsonlines", "gzip": "application/gzip", "zstd": "application/zstd"}
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def encode_export_cursor(section: str, row_id) -> str:
+    raw = json.dumps([section, str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_export_cursor(cursor: str) -> Tuple[str, uuid.UUID]:
+    """
+    Inverse of encode_export_cursor. Raises ValueError on a malformed cursor.
+    """
+    try:
+        section, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if section not in _SECTION_NAMES:
+            raise ValueError(section)
+        return section, uuid.UUID(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+
+
+def make_compressor(compression: Optional[str]):
+    """
+    A streaming compressor (compress()/flush()) for `compression`, or None
+    for plain output. Raises ValueError for an unknown or unavailable one.
+    """
+    if compression in (None, "", "none"):
+        return None
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"unknown compression: {compression} (use gzip or zstd)")
+
+
+def export_records(conn, project_id, after: Optional[Tuple[str, uuid.UUID]] = None,
+                   yield_per: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Export records of a project in order, each with its resume cursor,
+    starting after `after` (a decoded cursor).
+    """
+    yield_per = yield_per or EXPORT_YIELD_PER
+    start = _SECTION_NAMES.index(after[0]) if after else 0
+    for n, (section, sql, to_record) in enumerate(SECTIONS[start:], start):
+        after_id = str(after[1]) if after and n == start else None
+        result = conn.execution_options(stream_results=True, yield_per=yield_per).execute(
+            sql, {"pid": str(project_id), "after": after_id}
+        )
+        for row in result.mappings():
+            record = to_record(row)
+            record["cursor"] = encode_export_cursor(section, row["id"])
+            yield record
+
+
+def stream_jsonl(bind, project_id, after: Optional[Tuple[str, uuid.UUID]] = None,
+                 compressor=None) -> Iterator[bytes]:
+    """
+    Response body chunks: JSON lines buffered up to EXPORT_FLUSH_BYTES,
+    compressed when a compressor is given. Holds one connection (and its
+    server-side cursor) for the duration of the stream.
+    """
+    buffer = bytearray()
+    with bind.connect() as conn:
+        for record in export_records(conn, project_id, after):
+            buffer += json.dumps(record, default=str).encode() + b"\n"
+            if len(buffer) >= EXPORT_FLUSH_BYTES:
+                chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+                buffer.clear()
+                if chunk:
+                    yield chunk
+    tail = bytes(buffer)
+    if compressor:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
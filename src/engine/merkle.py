@@ -0,0 +1,74 @@
+import hashlib
+from typing import List, Tuple
+
+# Domain-separated hashing (as in RFC 6962), so a leaf can never be passed
+# off as an interior node
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+Proof = List[Tuple[str, str]]  # (side of the sibling: "L" | "R", sibling hash)
+
+
+def _leaf(value_hex: str) -> bytes:
+    return hashlib.sha256(_LEAF + bytes.fromhex(value_hex)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def _levels(leaves: List[str]) -> List[List[bytes]]:
+    """
+    All levels of the tree, leaves first. An unpaired last node is carried
+    up to the next level unchanged.
+    """
+    if not leaves:
+        raise ValueError("a Merkle tree needs at least one leaf")
+    levels = [[_leaf(h) for h in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        nxt = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        levels.append(nxt)
+    return levels
+
+
+def merkle_root(leaves: List[str]) -> str:
+    """
+    Root over hex SHA-256 leaf values (e.g. episodic item text hashes).
+    """
+    return _levels(leaves)[-1][0].hex()
+
+
+def merkle_proofs(leaves: List[str]) -> Tuple[str, List[Proof]]:
+    """
+    Root plus an inclusion proof for every leaf, from one pass over the tree.
+    Each proof is O(log n) sibling hashes.
+    """
+    levels = _levels(leaves)
+    proofs: List[Proof] = []
+    for index in range(len(leaves)):
+        proof: Proof = []
+        i = index
+        for level in levels[:-1]:
+            sibling = i ^ 1
+            if sibling < len(level):
+                proof.append(("L" if sibling < i else "R", level[sibling].hex()))
+            i //= 2
+        proofs.append(proof)
+    return levels[-1][0].hex(), proofs
+
+
+def verify_inclusion(leaf_hex: str, proof: Proof, root_hex: str) -> bool:
+    """
+    True if `leaf_hex` hashes up to `root_hex` along `proof`.
+    """
+    try:
+        acc = _leaf(leaf_hex)
+        for side, sibling_hex in proof:
+            sibling = bytes.fromhex(sibling_hex)
+            acc = _node(sibling, acc) if side == "L" else _node(acc, sibling)
+    except (TypeError, ValueError):
+        return False
+    return acc.hex() == root_hex
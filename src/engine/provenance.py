@@ -0,0 +1,106 @@
+import hashlib
+import hmac
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.engine.merkle import verify_inclusion
+
+KEY_SECRET = os.getenv("CONDENSATE_SECRET", "super-secret-key").encode()
+
+# Fields covered by the signature of a Merkle-batched envelope, and of
+# an envelope that lists its inputs in full (written before batching)
+_BATCH_FIELDS = ("method", "model", "merkle_root", "leaf_count", "timestamp")
+_LEGACY_FIELDS = ("method", "model", "inputs", "timestamp")
+
+
+def envelope_payload(envelope: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The signed part of an envelope, in either form.
+    """
+    fields = _BATCH_FIELDS if envelope.get("merkle_root") else _LEGACY_FIELDS
+    return {k: envelope.get(k) for k in fields}
+
+
+def sign_envelope(payload: Dict[str, Any], secret: bytes = KEY_SECRET) -> str:
+    body = json.dumps(payload, sort_keys=True).encode()
+    return hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _mismatch(kind: str, row: Dict[str, Any], detail: str, **refs) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "assertion_id": row["assertion_id"],
+        "evidence_id": refs.get("evidence_id"),
+        "envelope_id": refs.get("envelope_id"),
+        "detail": detail,
+    }
+
+
+def _signature_ok(envelope: Dict[str, Any], secret: bytes) -> bool:
+    signature = envelope.get("signature")
+    if not isinstance(signature, str):
+        return False
+    return hmac.compare_digest(sign_envelope(envelope_payload(envelope), secret), signature)
+
+
+def verify_rows(rows: Iterable[Dict[str, Any]], secret: bytes = KEY_SECRET) -> List[Dict[str, Any]]:
+    """
+    Check a run of audit rows (one per assertion/evidence pair, see
+    provenance_audit) and return the mismatches found:
+
+    - envelope_signature: an envelope (stored or inline) whose signature
+      does not match its payload
+    - input_hash: an item whose current text hash is not among the
+      envelope's inputs (no valid inclusion proof, or not in the list)
+    - missing_proof: evidence under a batched envelope without a proof
+    - missing_item: evidence pointing at an episodic item that is gone
+
+    Pure and picklable, so chunks can be checked in worker processes.
+    """
+    mismatches: List[Dict[str, Any]] = []
+    envelopes_seen = set()
+    assertions_seen = set()
+
+    for row in rows:
+        if row["assertion_id"] not in assertions_seen:
+            assertions_seen.add(row["assertion_id"])
+            for n, entry in enumerate(row.get("provenance") or []):
+                if isinstance(entry, dict) and "signature" in entry and not _signature_ok(entry, secret):
+                    mismatches.append(_mismatch("envelope_signature", row, f"inline envelope #{n}"))
+
+        if not row.get("evidence_id"):
+            continue
+        evidence_id = row["evidence_id"]
+        envelope: Optional[Dict[str, Any]] = row.get("envelope")
+        envelope_id = envelope["id"] if envelope else None
+
+        if envelope and envelope_id not in envelopes_seen:
+            envelopes_seen.add(envelope_id)
+            if not _signature_ok(envelope, secret):
+                mismatches.append(_mismatch("envelope_signature", row, "stored envelope",
+                                            evidence_id=evidence_id, envelope_id=envelope_id))
+
+        if row.get("episodic_id") and row.get("text") is None:
+            mismatches.append(_mismatch("missing_item", row, f"episodic item {row['episodic_id']}",
+                                        evidence_id=evidence_id, envelope_id=envelope_id))
+            continue
+        if not envelope or row.get("text") is None:
+            continue
+
+        digest = text_hash(row["text"])
+        if envelope.get("merkle_root"):
+            if row.get("proof") is None:
+                mismatches.append(_mismatch("missing_proof", row, "evidence has no inclusion proof",
+                                            evidence_id=evidence_id, envelope_id=envelope_id))
+            elif not verify_inclusion(digest, row["proof"], envelope["merkle_root"]):
+                mismatches.append(_mismatch("input_hash", row, "item text not under the envelope's Merkle root",
+                                            evidence_id=evidence_id, envelope_id=envelope_id))
+        elif digest not in (envelope.get("inputs") or []):
+            mismatches.append(_mismatch("input_hash", row, "item text hash not among the envelope's inputs",
+                                        evidence_id=evidence_id, envelope_id=envelope_id))
+    return mismatches
@@ -0,0 +1,245 @@
+"""
+Provenance audit: verifies a project's proof envelopes and evidence.
+
+Assertions are streamed with a server-side cursor in assertion-id order and
+checked in chunks by a pool of worker processes (src.engine.provenance.
+verify_rows): envelope signatures are recomputed and each evidence item's
+current text is hashed and matched against its envelope. Mismatches are
+written as each chunk completes, together with a checkpoint (the chunk's
+last assertion), so an interrupted audit resumes where it stopped.
+
+Run from the API (POST /api/admin/provenance/audits) or directly:
+    python -m src.engine.provenance_audit --project <project_id> [--resume <audit_id>]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import uuid
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, or_, text, update
+from sqlalchemy.orm import Session
+
+from src.db.models import ProvenanceAudit, ProvenanceMismatch
+from src.engine.provenance import KEY_SECRET, verify_rows
+
+logger = logging.getLogger("ProvenanceAudit")
+
+PROVENANCE_AUDIT_CHUNK = int(os.getenv("PROVENANCE_AUDIT_CHUNK", "500"))
+PROVENANCE_AUDIT_WORKERS = int(os.getenv("PROVENANCE_AUDIT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PROVENANCE_AUDIT_STALE_SECONDS = int(os.getenv("PROVENANCE_AUDIT_STALE_SECONDS", "300"))
+
+_STREAM_SQL = text("""
+    SELECT a.id AS assertion_id, a.provenance,
+           e.id AS evidence_id, e.episodic_id, e.proof, i.text,
+           pe.id AS envelope_id, pe.method, pe.model, pe.inputs, pe.merkle_root,
+           pe.leaf_count, pe.timestamp, pe.signature
+    FROM assertions a
+    LEFT JOIN assertion_evidence e ON e.assertion_id = a.id
+    LEFT JOIN episodic_items i ON i.id = e.episodic_id
+    LEFT JOIN proof_envelopes pe ON pe.id = e.envelope_id
+    WHERE a.project_id = CAST(:pid AS uuid)
+      AND (CAST(:after AS uuid) IS NULL OR a.id > CAST(:after AS uuid))
+    ORDER BY a.id, e.id
+""")
+
+_ENVELOPE_FIELDS = ("method", "model", "inputs", "merkle_root", "leaf_count", "timestamp", "signature")
+
+
+def _audit_row(m) -> Dict[str, Any]:
+    """
+    Plain (picklable) form of one streamed row.
+    """
+    envelope = None
+    if m["envelope_id"] is not None:
+        envelope = {"id": str(m["envelope_id"]), **{k: m[k] for k in _ENVELOPE_FIELDS}}
+    return {
+        "assertion_id": str(m["assertion_id"]),
+        "provenance": m["provenance"],
+        "evidence_id": str(m["evidence_id"]) if m["evidence_id"] else None,
+        "episodic_id": str(m["episodic_id"]) if m["episodic_id"] else None,
+        "proof": m["proof"],
+        "text": m["text"],
+        "envelope": envelope,
+    }
+
+
+class _InlineExecutor(Executor):
+    """
+    Runs chunks in the calling thread (PROVENANCE_AUDIT_WORKERS <= 1).
+    """
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ProvenanceAuditor:
+    def __init__(self, db: Session, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.db = db
+        self.workers = PROVENANCE_AUDIT_WORKERS if workers is None else workers
+        self.chunk_size = chunk_size or PROVENANCE_AUDIT_CHUNK
+
+    def create(self, project_id) -> ProvenanceAudit:
+        audit = ProvenanceAudit(id=uuid.uuid4(), project_id=project_id, status="queued",
+                                stats={"assertions": 0, "evidence": 0, "mismatches": 0})
+        self.db.add(audit)
+        self.db.commit()
+        return audit
+
+    def claim(self, audit_id) -> bool:
+        """
+        Mark an audit running unless it is finished or another run is still
+        alive (its heartbeat is newer than PROVENANCE_AUDIT_STALE_SECONDS).
+        """
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=PROVENANCE_AUDIT_STALE_SECONDS)
+        claimed = self.db.execute(
+            update(ProvenanceAudit)
+            .where(
+                ProvenanceAudit.id == audit_id,
+                ProvenanceAudit.status != "completed",
+                or_(ProvenanceAudit.status != "running", ProvenanceAudit.updated_at < stale),
+            )
+            .values(status="running", updated_at=now, ended_at=None,
+                    started_at=func.coalesce(ProvenanceAudit.started_at, now))
+            .returning(ProvenanceAudit.id)
+        ).first()
+        self.db.commit()
+        return claimed is not None
+
+    def run(self, audit_id) -> Optional[ProvenanceAudit]:
+        """
+        Verify an audit's project from its checkpoint to the end. Returns
+        the audit, or None if it could not be claimed.
+        """
+        if not self.claim(audit_id):
+            logger.info(f"Provenance audit {audit_id} is finished or already running.")
+            return None
+        audit = self.db.get(ProvenanceAudit, audit_id)
+        logger.info(f"Provenance audit {audit_id} for project {audit.project_id} "
+                    f"starting after {audit.checkpoint or 'the beginning'}.")
+        try:
+            with self._executor() as pool:
+                in_flight: deque = deque()
+                for chunk, last_id, counts in self._chunks(audit.project_id, audit.checkpoint):
+                    in_flight.append((pool.submit(verify_rows, chunk, KEY_SECRET), last_id, counts))
+                    # Record in submission order so the checkpoint only moves forward
+                    while len(in_flight) > max(1, self.workers) * 2:
+                        self._record(audit, *in_flight.popleft())
+                while in_flight:
+                    self._record(audit, *in_flight.popleft())
+            audit.status = "completed"
+            audit.ended_at = datetime.utcnow()
+            self.db.commit()
+            logger.info(f"Provenance audit {audit_id} completed: {audit.stats}")
+        except Exception as e:
+            self.db.rollback()
+            audit.status = "failed"
+            audit.error_log = str(e)
+            audit.ended_at = datetime.utcnow()
+            self.db.commit()
+            logger.error(f"Provenance audit {audit_id} failed at {audit.checkpoint}: {e}")
+        return audit
+
+    def _executor(self) -> Executor:
+        if self.workers <= 1:
+            return _InlineExecutor()
+        # spawn: the API process is multi-threaded, fork is not safe there
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _stream(self, project_id, after) -> Iterator[Dict[str, Any]]:
+        """
+        Audit rows in (assertion, evidence) order over a server-side cursor,
+        on a connection of its own so checkpoints can commit meanwhile.
+        """
+        with self.db.get_bind().connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=self.chunk_size * 4).execute(
+                _STREAM_SQL, {"pid": str(project_id), "after": str(after) if after else None}
+            )
+            for row in result.mappings():
+                yield _audit_row(row)
+
+    def _chunks(self, project_id, after) -> Iterator[Tuple[List[Dict[str, Any]], str, Dict[str, int]]]:
+        """
+        Group streamed rows into chunks of whole assertions. Yields the
+        rows, the chunk's last assertion ID and its counts.
+        """
+        chunk: List[Dict[str, Any]] = []
+        assertions = evidence = 0
+        for row in self._stream(project_id, after):
+            if chunk and row["assertion_id"] != chunk[-1]["assertion_id"]:
+                if assertions >= self.chunk_size:
+                    yield chunk, chunk[-1]["assertion_id"], {"assertions": assertions, "evidence": evidence}
+                    chunk, assertions, evidence = [], 0, 0
+            if not chunk or row["assertion_id"] != chunk[-1]["assertion_id"]:
+                assertions += 1
+            evidence += 1 if row["evidence_id"] else 0
+            chunk.append(row)
+        if chunk:
+            yield chunk, chunk[-1]["assertion_id"], {"assertions": assertions, "evidence": evidence}
+
+    def _record(self, audit: ProvenanceAudit, future: Future, last_id: str, counts: Dict[str, int]):
+        """
+        Store one finished chunk: its mismatches, the new checkpoint and
+        counters, in one commit.
+        """
+        mismatches = future.result()
+        for m in mismatches:
+            self.db.add(ProvenanceMismatch(audit_id=audit.id, **m))
+        if mismatches:
+            logger.warning(f"Provenance audit {audit.id}: {len(mismatches)} mismatches up to assertion {last_id}")
+        stats = dict(audit.stats or {})
+        stats["assertions"] = stats.get("assertions", 0) + counts["assertions"]
+        stats["evidence"] = stats.get("evidence", 0) + counts["evidence"]
+        stats["mismatches"] = stats.get("mismatches", 0) + len(mismatches)
+        audit.stats = stats
+        audit.checkpoint = uuid.UUID(last_id)
+        audit.updated_at = datetime.utcnow()
+        self.db.commit()
+
+
+def run_audit_background(audit_id):
+    """
+    Entry point for BackgroundTasks: runs an audit on its own session.
+    """
+    from src.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        ProvenanceAuditor(db).run(audit_id)
+    except Exception as e:
+        logger.error(f"Background provenance audit {audit_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify a project's provenance")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--project", help="start a new audit of this project")
+    group.add_argument("--resume", help="resume this audit from its checkpoint")
+    parser.add_argument("--workers", type=int, default=PROVENANCE_AUDIT_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from src.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        auditor = ProvenanceAuditor(db, workers=args.workers)
+        audit_id = uuid.UUID(args.resume) if args.resume else auditor.create(uuid.UUID(args.project)).id
+        audit = auditor.run(audit_id)
+        if audit is not None:
+            print(f"{audit.id}: {audit.status} {audit.stats}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
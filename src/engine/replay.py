@@ -0,0 +1,526 @@
+"""
+Replay: regenerate semantic memory from the episodic store
+(spec/replay-semantics.md, section 4) after a schema or model change,
+without taking the live graph offline.
+
+A run copies the semantic tables into a shadow schema (`replay_<id>`) and
+creates one partition per project. Worker processes claim partitions with
+SELECT ... FOR UPDATE SKIP LOCKED and replay each project's items in
+(occurred_at, id) order, REPLAY_BATCH_SIZE items per Condenser.distill,
+on sessions whose search_path puts the shadow schema first. After every
+batch the partition's checkpoint moves to the last item, so a crashed or
+stopped worker's partition resumes where it stopped once its lease expires.
+While a batch distills, a heartbeat thread keeps renewing the lease, so a
+slow batch is not reclaimed by another worker. Projects replay in parallel;
+items of one project stay in order.
+
+When a partition is done, cutover swaps the project's rows from the shadow
+schema into the live tables in one transaction. Readers see either the old
+or the new graph.
+
+    python -m src.engine.replay create [--project ID ...] [--note TEXT]
+    python -m src.engine.replay work --run ID [--processes N]
+    python -m src.engine.replay cutover --run ID [--project ID ...]
+    python -m src.engine.replay drop --run ID
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, select, text, tuple_
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.db.models import Base, EpisodicItem, ReplayPartition, ReplayRun
+
+logger = logging.getLogger("Replay")
+
+REPLAY_BATCH_SIZE = int(os.getenv("REPLAY_BATCH_SIZE", "50"))
+REPLAY_LEASE_SECONDS = int(os.getenv("REPLAY_LEASE_SECONDS", "600"))
+REPLAY_HEARTBEAT_SECONDS = float(os.getenv("REPLAY_HEARTBEAT_SECONDS", str(REPLAY_LEASE_SECONDS / 3)))
+REPLAY_MAX_ATTEMPTS = int(os.getenv("REPLAY_MAX_ATTEMPTS", "5"))
+REPLAY_RETRY_BASE_SECONDS = float(os.getenv("REPLAY_RETRY_BASE_SECONDS", "30"))
+REPLAY_WORKER_PROCESSES = int(os.getenv("REPLAY_WORKER_PROCESSES", "4"))
+REPLAY_POLL_SECONDS = float(os.getenv("REPLAY_POLL_SECONDS", "5.0"))
+
+# Semantic tables a replay rebuilds, parents first
+SHADOW_TABLES = ["entities", "proof_envelopes", "assertions", "assertion_evidence", "relations", "policies"]
+
+
+def create_run(db: Session, project_ids: Optional[List] = None, note: Optional[str] = None) -> ReplayRun:
+    """
+    Create the shadow schema (empty copies of the semantic tables, with
+    their indexes but no foreign keys) and one pending partition per
+    project that has episodic items.
+    """
+    run_id = uuid.uuid4()
+    run = ReplayRun(id=run_id, shadow_schema=f"replay_{run_id.hex[:12]}", status="running", note=note)
+    db.add(run)
+    db.flush()
+    db.execute(text(f"CREATE SCHEMA {run.shadow_schema}"))
+    for table in SHADOW_TABLES:
+        db.execute(text(f"CREATE TABLE {run.shadow_schema}.{table} (LIKE {table} INCLUDING ALL)"))
+
+    scope = "WHERE project_id = ANY(CAST(:pids AS uuid[]))" if project_ids else ""
+    db.execute(text(f"""
+        INSERT INTO replay_partitions (id, run_id, project_id, status, items_done, attempts, available_at)
+        SELECT gen_random_uuid(), CAST(:run_id AS uuid), project_id, 'pending', 0, 0, :now
+        FROM (SELECT DISTINCT project_id FROM episodic_items {scope}) p
+    """), {"run_id": str(run_id), "now": datetime.utcnow(), "pids": [str(p) for p in project_ids or []]})
+    db.commit()
+    return run
+
+
+def claim_partition(db: Session, run_id, worker_id: str) -> Optional[Any]:
+    """
+    Lease the next available partition of a run: pending and past its retry
+    backoff, or running under an expired lease. Committed before returning.
+
+    An expired lease counts as a failed attempt: a partition whose worker
+    died REPLAY_MAX_ATTEMPTS times on the same batch is parked as failed
+    instead of reclaimed.
+    """
+    now = datetime.utcnow()
+    db.execute(text("""
+        UPDATE replay_partitions
+        SET status = 'failed', locked_by = NULL, updated_at = :now,
+            last_error = 'lease expired after ' || attempts || ' attempts (worker crashed or stalled)'
+        WHERE run_id = CAST(:run_id AS uuid)
+          AND status = 'running' AND available_at <= :now AND attempts >= :max_attempts
+    """), {"run_id": str(run_id), "now": now, "max_attempts": REPLAY_MAX_ATTEMPTS})
+    row = db.execute(text("""
+        WITH next AS (
+            SELECT id FROM replay_partitions
+            WHERE run_id = CAST(:run_id AS uuid)
+              AND status IN ('pending', 'running') AND available_at <= :now
+              AND (status = 'pending' OR attempts < :max_attempts)
+            ORDER BY available_at
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE replay_partitions p
+        SET status = 'running', attempts = p.attempts + 1, locked_by = :worker_id,
+            available_at = :lease_until, updated_at = :now
+        FROM next
+        WHERE p.id = next.id
+        RETURNING p.id, p.project_id, p.checkpoint_at, p.checkpoint_id
+    """), {
+        "run_id": str(run_id),
+        "now": now,
+        "worker_id": worker_id,
+        "lease_until": now + timedelta(seconds=REPLAY_LEASE_SECONDS),
+        "max_attempts": REPLAY_MAX_ATTEMPTS,
+    }).first()
+    db.commit()
+    return row
+
+
+def renew_lease(db: Session, partition_id, worker_id: str) -> bool:
+    """
+    Extend a partition's lease without moving its checkpoint. False if the
+    lease was lost to another worker.
+    """
+    now = datetime.utcnow()
+    result = db.execute(text("""
+        UPDATE replay_partitions
+        SET available_at = :lease_until, updated_at = :now
+        WHERE id = :id AND locked_by = :worker_id AND status = 'running'
+    """), {
+        "id": partition_id, "worker_id": worker_id, "now": now,
+        "lease_until": now + timedelta(seconds=REPLAY_LEASE_SECONDS),
+    })
+    db.commit()
+    return result.rowcount == 1
+
+
+class LeaseHeartbeat:
+    """
+    Renews a partition's lease every REPLAY_HEARTBEAT_SECONDS from a
+    background thread (on its own session) while a batch distills. `lost`
+    is set once a renewal finds the lease taken by another worker.
+    """
+
+    def __init__(self, session_factory, partition_id, worker_id: str):
+        self.session_factory = session_factory
+        self.partition_id = partition_id
+        self.worker_id = worker_id
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"replay-lease-{partition_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        db = self.session_factory()
+        try:
+            while not self._stop.wait(REPLAY_HEARTBEAT_SECONDS):
+                try:
+                    if not renew_lease(db, self.partition_id, self.worker_id):
+                        self.lost.set()
+                        return
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Renewing the lease on partition {self.partition_id} failed: {e}")
+        finally:
+            db.close()
+
+
+def next_items(db: Session, project_id, after_at: Optional[datetime], after_id, limit: int) -> List[EpisodicItem]:
+    stmt = select(EpisodicItem).where(EpisodicItem.project_id == project_id)
+    if after_at is not None:
+        stmt = stmt.where(tuple_(EpisodicItem.occurred_at, EpisodicItem.id) > tuple_(after_at, after_id))
+    stmt = stmt.order_by(EpisodicItem.occurred_at, EpisodicItem.id).limit(limit)
+    return list(db.execute(stmt).scalars().all())
+
+
+def advance(db: Session, partition_id, worker_id: str, last: EpisodicItem, count: int) -> bool:
+    """
+    Move the checkpoint past a distilled batch and renew the lease. False if
+    the lease was lost to another worker.
+    """
+    now = datetime.utcnow()
+    result = db.execute(text("""
+        UPDATE replay_partitions
+        SET checkpoint_at = :at, checkpoint_id = :item_id, items_done = items_done + :count,
+            attempts = 0, available_at = :lease_until, updated_at = :now
+        WHERE id = :id AND locked_by = :worker_id AND status = 'running'
+    """), {
+        "id": partition_id, "worker_id": worker_id, "at": last.occurred_at, "item_id": last.id,
+        "count": count, "now": now, "lease_until": now + timedelta(seconds=REPLAY_LEASE_SECONDS),
+    })
+    db.commit()
+    return result.rowcount == 1
+
+
+def finish(db: Session, partition_id, worker_id: str) -> None:
+    db.execute(text("""
+        UPDATE replay_partitions SET status = 'done', locked_by = NULL, updated_at = :now
+        WHERE id = :id AND locked_by = :worker_id
+    """), {"id": partition_id, "worker_id": worker_id, "now": datetime.utcnow()})
+    db.commit()
+
+
+def fail(db: Session, partition_id, worker_id: str, error: str) -> None:
+    """
+    Release a partition after a failed batch: retried from its checkpoint
+    with exponential backoff, parked as failed after REPLAY_MAX_ATTEMPTS.
+    """
+    now = datetime.utcnow()
+    db.execute(text("""
+        UPDATE replay_partitions
+        SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+            available_at = :now + make_interval(secs => :base * power(2, attempts - 1)),
+            locked_by = NULL, last_error = :error, updated_at = :now
+        WHERE id = :id AND locked_by = :worker_id
+    """), {
+        "id": partition_id, "worker_id": worker_id, "now": now, "error": error[:2000],
+        "max_attempts": REPLAY_MAX_ATTEMPTS, "base": REPLAY_RETRY_BASE_SECONDS,
+    })
+    db.commit()
+
+
+def shadow_sessionmaker(schema: str) -> sessionmaker:
+    """
+    Sessions whose unqualified table names resolve to the shadow schema
+    first, and to the live schema for everything it does not shadow
+    (projects, episodic_items).
+    """
+    from src.db.session import DATABASE_URL
+    engine = create_engine(
+        DATABASE_URL, pool_size=2, max_overflow=2, pool_pre_ping=True,
+        connect_args={"options": f"-csearch_path={schema},public"},
+    )
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class ReplayWorker:
+    def __init__(self, run_id, worker_id: Optional[str] = None, session_factory=None,
+                 shadow_session_factory=None, batch_size: Optional[int] = None):
+        self.run_id = run_id
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        if session_factory is None:
+            from src.db.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.shadow_session_factory = shadow_session_factory
+        self.batch_size = batch_size or REPLAY_BATCH_SIZE
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _shadow_factory(self, db: Session):
+        if self.shadow_session_factory is None:
+            run = db.get(ReplayRun, self.run_id)
+            self.shadow_session_factory = shadow_sessionmaker(run.shadow_schema)
+        return self.shadow_session_factory
+
+    def run_once(self) -> Optional[int]:
+        """
+        Claim one partition and replay it to the end (or until the lease is
+        lost). Returns the items replayed, or None if nothing was claimable.
+        """
+        db = self.session_factory()
+        try:
+            part = claim_partition(db, self.run_id, self.worker_id)
+            if part is None:
+                return None
+            shadow = self._shadow_factory(db)()
+            after_at, after_id = part.checkpoint_at, part.checkpoint_id
+            replayed = 0
+            logger.info(f"Replaying project {part.project_id} after {after_id or 'the beginning'}.")
+            try:
+                from src.engine.condenser import Condenser
+                condenser = Condenser(shadow, index_vectors=False)
+                with LeaseHeartbeat(self.session_factory, part.id, self.worker_id) as heartbeat:
+                    while not self._stop.is_set():
+                        items = next_items(db, part.project_id, after_at, after_id, self.batch_size)
+                        if not items:
+                            finish(db, part.id, self.worker_id)
+                            break
+                        asyncio.run(condenser.distill(part.project_id, items))
+                        last = items[-1]
+                        if heartbeat.lost.is_set() or not advance(db, part.id, self.worker_id, last, len(items)):
+                            logger.warning(f"Lost the lease on project {part.project_id}; stopping.")
+                            break
+                        after_at, after_id = last.occurred_at, last.id
+                        replayed += len(items)
+            except Exception as e:
+                db.rollback()
+                shadow.rollback()
+                fail(db, part.id, self.worker_id, str(e))
+                logger.error(f"Replay of project {part.project_id} failed at {after_id}: {e}")
+            finally:
+                shadow.close()
+            return replayed
+        finally:
+            db.close()
+
+    def run_forever(self):
+        """
+        Work until every partition of the run is done, failed or stopped.
+        """
+        logger.info(f"Replay worker {self.worker_id} started on run {self.run_id}.")
+        while not self._stop.is_set():
+            if self.run_once() is not None:
+                continue
+            if not self._has_open_partitions():
+                break
+            self._stop.wait(REPLAY_POLL_SECONDS)
+        logger.info(f"Replay worker {self.worker_id} stopped.")
+
+    def _has_open_partitions(self) -> bool:
+        db = self.session_factory()
+        try:
+            return db.execute(
+                select(ReplayPartition.id).where(
+                    ReplayPartition.run_id == self.run_id,
+                    ReplayPartition.status.in_(("pending", "running")),
+                ).limit(1)
+            ).first() is not None
+        finally:
+            db.close()
+
+
+def _columns(table: str) -> str:
+    return ", ".join(c.name for c in Base.metadata.tables[table].columns)
+
+
+def cutover(db: Session, run_id, project_id, qdrant=None) -> Dict[str, Any]:
+    """
+    Replace one project's live semantic rows with its replayed rows, in one
+    transaction. The partition must be done.
+
+    Review decisions on live assertions carry over to replayed assertions
+    with the same triple. Items the replay did not cover (stored after its
+    checkpoint, or after the run started) are queued for condensation in the
+    same transaction, so nothing stored meanwhile is lost. Vectors for the
+    project are rebuilt after the commit.
+    """
+    run = db.get(ReplayRun, run_id)
+    part = db.execute(
+        select(ReplayPartition)
+        .where(ReplayPartition.run_id == run_id, ReplayPartition.project_id == project_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if run is None or part is None:
+        raise ValueError("No such replay partition")
+    if part.status != "done":
+        raise ValueError(f"Partition is {part.status}, not done")
+
+    shadow = run.shadow_schema
+    params = {"pid": str(project_id)}
+    try:
+        db.execute(text(f"""
+            UPDATE {shadow}.assertions s
+            SET status = l.status, reviewed_by = l.reviewed_by, reviewed_at = l.reviewed_at,
+                rejection_reason = l.rejection_reason
+            FROM assertions l
+            WHERE s.project_id = CAST(:pid AS uuid) AND l.project_id = CAST(:pid AS uuid)
+              AND l.reviewed_at IS NOT NULL
+              AND s.predicate = l.predicate AND s.polarity = l.polarity
+              AND lower(s.subject_text) IS NOT DISTINCT FROM lower(l.subject_text)
+              AND lower(s.object_text) IS NOT DISTINCT FROM lower(l.object_text)
+        """), params)
+
+        for table in ["assertion_evidence", "assertions", "relations", "policies", "entities", "proof_envelopes"]:
+            db.execute(text(f"DELETE FROM {table} WHERE project_id = CAST(:pid AS uuid)"), params)
+        copied = {}
+        for table in SHADOW_TABLES:
+            cols = _columns(table)
+            copied[table] = db.execute(text(
+                f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {shadow}.{table} WHERE project_id = CAST(:pid AS uuid)"
+            ), params).rowcount
+
+        requeue = db.execute(text("""
+            SELECT id FROM episodic_items
+            WHERE project_id = CAST(:pid AS uuid)
+              AND ((occurred_at, id) > (:cp_at, CAST(:cp_id AS uuid)) OR :cp_at IS NULL OR created_at >= :started)
+        """), {**params, "cp_at": part.checkpoint_at, "cp_id": str(part.checkpoint_id) if part.checkpoint_id else None,
+               "started": run.created_at}).scalars().all()
+        if requeue:
+            from src.engine.work_queue import enqueue_condensation
+            enqueue_condensation(db, project_id, requeue, commit=False)
+
+        part.status = "cut_over"
+        part.updated_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"Cut over project {project_id} from {shadow}: {copied}, {len(requeue)} items re-queued.")
+    _reindex(db, project_id, qdrant)
+    return {"project_id": str(project_id), "copied": copied, "requeued": len(requeue)}
+
+
+def _reindex(db: Session, project_id, qdrant=None) -> None:
+    """
+    Drop the project's vectors for the rows just replaced and index the
+    replayed entities and assertions. Best effort: a failure leaves recall
+    stale until the reindex endpoints are run.
+    """
+    try:
+        from qdrant_client.http import models
+        from src.db.qdrant import ASSERTION_COLLECTION, ENTITY_COLLECTION
+        from src.learn.entity_index import EntityVectorIndex, get_entity_index
+        from src.retrieve.assertion_index import AssertionIndexer
+        if qdrant is None:
+            from src.db.session import QDRANT_URL, QDRANT_API_KEY
+            from qdrant_client import QdrantClient
+            qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+
+        by_project = models.FilterSelector(filter=models.Filter(must=[
+            models.FieldCondition(key="project_id", match=models.MatchValue(value=str(project_id)))
+        ]))
+        for collection in (ENTITY_COLLECTION, ASSERTION_COLLECTION):
+            qdrant.delete(collection_name=collection, points_selector=by_project)
+        if get_entity_index() is not None:
+            EntityVectorIndex(qdrant).backfill(db, uuid.UUID(str(project_id)))
+        AssertionIndexer(db, qdrant).backfill(uuid.UUID(str(project_id)))
+    except Exception as e:
+        logger.error(f"Vector reindex after cutover of project {project_id} failed: {e}")
+
+
+def drop_run(db: Session, run_id) -> None:
+    """
+    Drop a run's shadow schema (after cutover, or to abandon it).
+    """
+    run = db.get(ReplayRun, run_id)
+    if run is None:
+        raise ValueError("No such replay run")
+    db.execute(text(f"DROP SCHEMA IF EXISTS {run.shadow_schema} CASCADE"))
+    run.status = "dropped"
+    run.ended_at = datetime.utcnow()
+    db.commit()
+
+
+def run_status(db: Session, run: ReplayRun) -> Dict[str, Any]:
+    counts = db.execute(text("""
+        SELECT status, count(*) AS partitions, coalesce(sum(items_done), 0) AS items
+        FROM replay_partitions WHERE run_id = CAST(:run_id AS uuid)
+        GROUP BY status
+    """), {"run_id": str(run.id)}).all()
+    return {
+        "id": str(run.id),
+        "shadow_schema": run.shadow_schema,
+        "status": run.status,
+        "note": run.note,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "partitions": {r.status: r.partitions for r in counts},
+        "items_replayed": sum(int(r.items) for r in counts),
+    }
+
+
+def _process_main(run_id: str):
+    logging.basicConfig(level=logging.INFO)
+    ReplayWorker(uuid.UUID(run_id)).run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay episodic memory into a shadow schema")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create")
+    create.add_argument("--project", action="append", default=[])
+    create.add_argument("--note")
+    work = sub.add_parser("work")
+    work.add_argument("--run", required=True)
+    work.add_argument("--processes", type=int, default=REPLAY_WORKER_PROCESSES)
+    cut = sub.add_parser("cutover")
+    cut.add_argument("--run", required=True)
+    cut.add_argument("--project", action="append", default=[])
+    drop = sub.add_parser("drop")
+    drop.add_argument("--run", required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "work":
+        procs = [multiprocessing.Process(target=_process_main, args=(args.run,)) for _ in range(args.processes)]
+        for p in procs:
+            p.start()
+        try:
+            while any(p.is_alive() for p in procs):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            for p in procs:
+                p.terminate()
+        for p in procs:
+            p.join()
+        return
+
+    from src.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        if args.command == "create":
+            run = create_run(db, [uuid.UUID(p) for p in args.project] or None, args.note)
+            print(run_status(db, run))
+        elif args.command == "cutover":
+            run_id = uuid.UUID(args.run)
+            projects = [uuid.UUID(p) for p in args.project] or db.execute(
+                select(ReplayPartition.project_id)
+                .where(ReplayPartition.run_id == run_id, ReplayPartition.status == "done")
+            ).scalars().all()
+            for pid in projects:
+                print(cutover(db, run_id, pid))
+        elif args.command == "drop":
+            drop_run(db, uuid.UUID(args.run))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
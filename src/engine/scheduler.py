@@ -13,8 +13,10 @@ from src.db.session import SessionLocal
 from src.db.models import DataSource, Project
 from src.agents.data_sources import fetch_source_data
 from src.agents.ingress import IngressAgent
-from src.engine.condenser import Condenser
+from src.engine.work_queue import enqueue_condensation
 from src.engine.cognitive import CognitiveService
+from src.learn.entity_merge import EntityMergeCompactor, ENTITY_MERGE_MODE
+from src.learn.entity_index import get_entity_index
 
 logger = logging.getLogger("Scheduler")
 scheduler = AsyncIOScheduler()
@@ -85,8 +87,8 @@ async def process_data_source(source_id):
         )
         new_item = agent.process_memory(mem_data)
 
-        condenser = Condenser(db)
-        await condenser.distill(source.project_id, [new_item])
+        # Condensation is picked up by the condensation workers
+        enqueue_condensation(db, source.project_id, [new_item.id], commit=False)
 
         source.last_run = datetime.utcnow()
         db.commit()
@@ -116,6 +118,13 @@ def start_scheduler():
             id="activation_decay",
             replace_existing=True
         )
+        # 2. Entity merge compaction (Daily at 01:00)
+        scheduler.add_job(
+            run_entity_merge_task,
+            CronTrigger(hour=1, minute=0),
+            id="entity_merge",
+            replace_existing=True
+        )
         logger.info("Scheduled background maintenance jobs.")
 
 async def run_decay_task():
@@ -126,11 +135,13 @@ async def run_decay_task():
     db = SessionLocal()
     try:
         cog = CognitiveService(db)
-        cog.apply_activation_decay()
+        # Chunked + throttled, so run off the event loop thread
+        loop = asyncio.get_running_loop()
+        updated = await loop.run_in_executor(None, cog.apply_activation_decay)
         finished = datetime.now(timezone.utc)
         duration = int((finished - started).total_seconds() * 1000)
         _log_job(job_id, "Activation Decay", "success", started, finished, duration)
-        logger.info("Activation decay completed.")
+        logger.info(f"Activation decay completed — {updated} relations decayed.")
     except Exception as e:
         finished = datetime.now(timezone.utc)
         duration = int((finished - started).total_seconds() * 1000)
@@ -139,6 +150,35 @@ async def run_decay_task():
     finally:
         db.close()
 
+async def run_entity_merge_task():
+    job_id = "entity_merge"
+    started = datetime.now(timezone.utc)
+    _log_job(job_id, "Entity Merge", "running", started)
+    logger.info("Running background entity merge compaction...")
+    db = SessionLocal()
+    try:
+        compactor = EntityMergeCompactor(db, vector_index=get_entity_index())
+        # Report-only unless ENTITY_MERGE_MODE=merge (merges cannot be undone)
+        dry_run = ENTITY_MERGE_MODE != "merge"
+        # Chunked per project, so run off the event loop thread
+        loop = asyncio.get_running_loop()
+        removed = await loop.run_in_executor(None, lambda: compactor.run(dry_run=dry_run))
+        finished = datetime.now(timezone.utc)
+        duration = int((finished - started).total_seconds() * 1000)
+        _log_job(job_id, "Entity Merge", "success", started, finished, duration)
+        if dry_run:
+            logger.info(f"Entity merge report — {removed} duplicate entities would be merged "
+                        f"(set ENTITY_MERGE_MODE=merge to apply).")
+        else:
+            logger.info(f"Entity merge completed — {removed} duplicate entities merged.")
+    except Exception as e:
+        finished = datetime.now(timezone.utc)
+        duration = int((finished - started).total_seconds() * 1000)
+        _log_job(job_id, "Entity Merge", "error", started, finished, duration, str(e))
+        logger.error(f"Error in entity merge task: {e}")
+    finally:
+        db.close()
+
 def schedule_data_source(data_source: DataSource):
     """
     Schedules or Reschedules a data source job.
@@ -1,3 +1,4 @@
+import asyncio
 import time
 import statistics
 import threading
@@ -32,6 +33,8 @@ class AdaptiveThreadShard:
         Lower priority number = Higher priority (standard PQ behavior).
         """
         future_result = Future()
+        # Callables such as partials or mocks have no __name__
+        name = getattr(fn, "__name__", type(fn).__name__)
 
         def wrapped():
             try:
@@ -39,10 +42,10 @@ class AdaptiveThreadShard:
                 result = fn(*args, **kwargs)
                 end = time.time()
                 with self.lock:
-                    self.stats[fn.__name__].append(end - start)
+                    self.stats[name].append(end - start)
                 future_result.set_result(result)
             except Exception as e:
-                logger.error(f"Error in {fn.__name__}: {str(e)}")
+                logger.error(f"Error in {name}: {str(e)}")
                 future_result.set_exception(e)
 
         # We don't actually use the priority queue to *block* the executor,
@@ -58,6 +61,14 @@ class AdaptiveThreadShard:
         
         return future_result
 
+    async def run(self, fn: Callable, *args, priority: int = 10, **kwargs) -> Any:
+        """
+        Awaitable variant of submit(): runs fn on the shard and suspends the
+        calling coroutine (not the event loop) until it finishes. Combine with
+        asyncio.gather / asyncio.as_completed to fan out over many inputs.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, **kwargs))
+
     def _monitor_load(self):
         while not self._shutdown:
             time.sleep(self.monitor_interval)
@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Iterable, Optional, Dict
+
+from sqlalchemy import text, insert
+from sqlalchemy.orm import Session
+
+from src.db.models import CondensationTask
+
+logger = logging.getLogger("WorkQueue")
+
+# Durable condensation queue (condensation_queue table).
+CONDENSE_BATCH_SIZE = int(os.getenv("CONDENSE_BATCH_SIZE", "50"))
+CONDENSE_VISIBILITY_TIMEOUT = int(os.getenv("CONDENSE_VISIBILITY_TIMEOUT", "600"))  # seconds a claim is leased
+CONDENSE_HEARTBEAT_SECONDS = float(os.getenv("CONDENSE_HEARTBEAT_SECONDS", str(CONDENSE_VISIBILITY_TIMEOUT / 3)))
+CONDENSE_MAX_ATTEMPTS = int(os.getenv("CONDENSE_MAX_ATTEMPTS", "5"))
+CONDENSE_RETRY_BASE_SECONDS = float(os.getenv("CONDENSE_RETRY_BASE_SECONDS", "30"))
+
+# Coalescing for chatty writers (MCP store_memory): a coalesced item waits up
+# to the window for more items of its project, or until that many are pending,
+# so one distill covers the whole group instead of one per item.
+CONDENSE_COALESCE_MS = int(os.getenv("CONDENSE_COALESCE_MS", "200"))
+CONDENSE_COALESCE_ITEMS = int(os.getenv("CONDENSE_COALESCE_ITEMS", "20"))
+
+
+@dataclass
+class ClaimedBatch:
+    project_id: uuid.UUID
+    task_ids: List[uuid.UUID]
+    item_ids: List[uuid.UUID]
+
+
+def enqueue_condensation(db: Session, project_id, item_ids: Iterable, commit: bool = True,
+                         coalesce: bool = False) -> int:
+    """
+    Queue episodic items for condensation. Returns the number queued.
+
+    With coalesce=True the items only become claimable after
+    CONDENSE_COALESCE_MS (or once CONDENSE_COALESCE_ITEMS are pending for the
+    project); any claim for the project sweeps them along in the meantime.
+    """
+    now = datetime.utcnow()
+    available_at = now + timedelta(milliseconds=CONDENSE_COALESCE_MS) if coalesce else now
+    rows = [
+        {"id": uuid.uuid4(), "project_id": uuid.UUID(str(project_id)), "item_id": uuid.UUID(str(i)),
+         "status": "pending", "attempts": 0, "available_at": available_at, "created_at": now}
+        for i in item_ids
+    ]
+    if not rows:
+        return 0
+    db.execute(insert(CondensationTask), rows)
+    if commit:
+        db.commit()
+    return len(rows)
+
+
+def claim_batch(db: Session, worker_id: str, batch_size: Optional[int] = None,
+                visibility_timeout: Optional[int] = None) -> Optional[ClaimedBatch]:
+    """
+    Lease up to batch_size available tasks of a single project.
+
+    Tasks are available when pending and past their retry backoff, or when a
+    previous worker's lease expired (it crashed or stalled). A project also
+    becomes claimable once CONDENSE_COALESCE_ITEMS fresh tasks are waiting
+    out their coalescing window, and a claim takes all of the project's fresh
+    tasks along with the available ones. Concurrent workers skip each other's
+    locked rows, so they never wait on or receive the same task. The lease is
+    committed before returning.
+
+    An expired lease counts as a failed attempt: tasks whose worker crashed
+    CONDENSE_MAX_ATTEMPTS times are parked as 'failed' instead of reclaimed,
+    so a batch that kills its worker cannot crash-loop the pool.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=visibility_timeout or CONDENSE_VISIBILITY_TIMEOUT)
+    db.execute(text("""
+        UPDATE condensation_queue
+        SET status = 'failed', locked_by = NULL,
+            last_error = 'lease expired after ' || attempts || ' attempts (worker crashed or stalled)'
+        WHERE status = 'running' AND available_at <= :now AND attempts >= :max_attempts
+    """), {"now": now, "max_attempts": CONDENSE_MAX_ATTEMPTS})
+    rows = db.execute(text("""
+        WITH full_projects AS (
+            SELECT project_id
+            FROM condensation_queue
+            WHERE status = 'pending' AND attempts = 0 AND available_at > :now
+            GROUP BY project_id
+            HAVING count(*) >= :coalesce_items
+        ), next_project AS (
+            SELECT project_id
+            FROM condensation_queue
+            WHERE (status IN ('pending', 'running') AND available_at <= :now
+                   AND (status = 'pending' OR attempts < :max_attempts))
+               OR (status = 'pending' AND attempts = 0
+                   AND project_id IN (SELECT project_id FROM full_projects))
+            ORDER BY available_at
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ), claimed AS (
+            SELECT q.id
+            FROM condensation_queue q, next_project
+            WHERE q.project_id = next_project.project_id
+              AND ((q.status IN ('pending', 'running') AND q.available_at <= :now
+                    AND (q.status = 'pending' OR q.attempts < :max_attempts))
+                   OR (q.status = 'pending' AND q.attempts = 0))
+            ORDER BY q.available_at
+            LIMIT :batch_size
+            FOR UPDATE OF q SKIP LOCKED
+        )
+        UPDATE condensation_queue q
+        SET status = 'running', attempts = q.attempts + 1,
+            locked_by = :worker_id, available_at = :lease_until
+        FROM claimed
+        WHERE q.id = claimed.id
+        RETURNING q.id, q.project_id, q.item_id
+    """), {
+        "now": now,
+        "lease_until": lease_until,
+        "worker_id": worker_id,
+        "batch_size": batch_size or CONDENSE_BATCH_SIZE,
+        "coalesce_items": CONDENSE_COALESCE_ITEMS,
+        "max_attempts": CONDENSE_MAX_ATTEMPTS,
+    }).all()
+    db.commit()
+
+    if not rows:
+        return None
+    return ClaimedBatch(
+        project_id=rows[0].project_id,
+        task_ids=[r.id for r in rows],
+        item_ids=[r.item_id for r in rows],
+    )
+
+
+def renew(db: Session, worker_id: str, task_ids: List[uuid.UUID],
+          visibility_timeout: Optional[int] = None) -> int:
+    """
+    Extend the lease on claimed tasks. Returns how many this worker still holds.
+    """
+    result = db.execute(text("""
+        UPDATE condensation_queue
+        SET available_at = :lease_until
+        WHERE id = ANY(CAST(:ids AS uuid[])) AND locked_by = :worker_id AND status = 'running'
+    """), {
+        "ids": [str(t) for t in task_ids],
+        "worker_id": worker_id,
+        "lease_until": datetime.utcnow() + timedelta(seconds=visibility_timeout or CONDENSE_VISIBILITY_TIMEOUT),
+    })
+    db.commit()
+    return result.rowcount
+
+
+class LeaseHeartbeat:
+    """
+    Renews a claimed batch's lease every CONDENSE_HEARTBEAT_SECONDS from a
+    background thread (on its own session, opened on the first renewal)
+    while the batch condenses. `lost` is set once a renewal finds a task of
+    the batch taken by another worker.
+    """
+
+    def __init__(self, session_factory, worker_id: str, task_ids: List[uuid.UUID]):
+        self.session_factory = session_factory
+        self.worker_id = worker_id
+        self.task_ids = task_ids
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"condense-lease-{worker_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        db = None
+        try:
+            while not self._stop.wait(CONDENSE_HEARTBEAT_SECONDS):
+                db = db or self.session_factory()
+                try:
+                    if renew(db, self.worker_id, self.task_ids) < len(self.task_ids):
+                        self.lost.set()
+                        return
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Renewing the lease on {len(self.task_ids)} tasks failed: {e}")
+        finally:
+            if db is not None:
+                db.close()
+
+
+def complete(db: Session, worker_id: str, task_ids: List[uuid.UUID]) -> int:
+    """
+    Remove finished tasks (only while this worker still holds the lease).
+    Returns the number removed.
+    """
+    result = db.execute(text("""
+        DELETE FROM condensation_queue
+        WHERE id = ANY(CAST(:ids AS uuid[])) AND locked_by = :worker_id
+    """), {"ids": [str(t) for t in task_ids], "worker_id": worker_id})
+    db.commit()
+    return result.rowcount
+
+
+def fail(db: Session, worker_id: str, task_ids: List[uuid.UUID], error: str) -> None:
+    """
+    Release tasks for a retry with exponential backoff, or park them as
+    'failed' once they've used up CONDENSE_MAX_ATTEMPTS.
+    """
+    db.execute(text("""
+        UPDATE condensation_queue
+        SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+            available_at = :now + make_interval(secs => :base * power(2, attempts - 1)),
+            locked_by = NULL,
+            last_error = :error
+        WHERE id = ANY(CAST(:ids AS uuid[])) AND locked_by = :worker_id
+    """), {
+        "ids": [str(t) for t in task_ids],
+        "worker_id": worker_id,
+        "max_attempts": CONDENSE_MAX_ATTEMPTS,
+        "base": CONDENSE_RETRY_BASE_SECONDS,
+        "now": datetime.utcnow(),
+        "error": error[:2000],
+    })
+    db.commit()
+
+
+def queue_stats(db: Session) -> Dict[str, int]:
+    """
+    Task counts by status (running includes expired leases awaiting reclaim).
+    """
+    rows = db.execute(text("SELECT status, count(*) FROM condensation_queue GROUP BY status")).all()
+    return {status: count for status, count in rows}
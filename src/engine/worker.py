@@ -0,0 +1,148 @@
+"""
+Condensation worker: drains the condensation_queue table.
+
+Run a dedicated pool (one worker loop per process):
+    python -m src.engine.worker --processes 4
+
+The API process also runs CONDENSE_EMBEDDED_WORKERS worker threads so a
+single-container deployment works without a separate pool; set it to 0 when
+running dedicated workers.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+
+from src.db.models import EpisodicItem
+from src.engine import work_queue
+
+logger = logging.getLogger("CondensationWorker")
+
+CONDENSE_EMBEDDED_WORKERS = int(os.getenv("CONDENSE_EMBEDDED_WORKERS", "1"))
+CONDENSE_POLL_SECONDS = float(os.getenv("CONDENSE_POLL_SECONDS", "1.0"))
+
+
+class CondensationWorker:
+    def __init__(self, worker_id: Optional[str] = None, session_factory=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        if session_factory is None:
+            from src.db.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> int:
+        """
+        Claim and condense one per-project batch. Returns the number of
+        tasks processed (0 when the queue is empty).
+        """
+        db = self.session_factory()
+        try:
+            batch = work_queue.claim_batch(db, self.worker_id)
+            if batch is None:
+                return 0
+
+            from src.engine.scheduler import _log_job as _log
+            job_id = f"condense_queue_{batch.task_ids[0].hex[:8]}"
+            started = datetime.now(timezone.utc)
+            _log(job_id, f"Condensation [{len(batch.item_ids)} items]", "running", started)
+            try:
+                items = db.execute(
+                    select(EpisodicItem).where(EpisodicItem.id.in_(batch.item_ids))
+                ).scalars().all()
+                # Keep the lease alive however long the distill takes, so the
+                # batch is not reclaimed and condensed twice meanwhile
+                with work_queue.LeaseHeartbeat(self.session_factory, self.worker_id, batch.task_ids) as heartbeat:
+                    if items:
+                        from src.engine.condenser import Condenser
+                        asyncio.run(Condenser(db).distill(batch.project_id, items))
+                removed = work_queue.complete(db, self.worker_id, batch.task_ids)
+                if heartbeat.lost.is_set() or removed != len(batch.task_ids):
+                    logger.warning(f"Lost the lease on {len(batch.task_ids) - removed} of {len(batch.task_ids)} "
+                                   f"tasks of project {batch.project_id} while condensing; another worker "
+                                   f"may condense them again.")
+                finished = datetime.now(timezone.utc)
+                duration = int((finished - started).total_seconds() * 1000)
+                _log(job_id, f"Condensation [{len(batch.item_ids)} items]", "success", started, finished, duration)
+            except Exception as e:
+                db.rollback()
+                work_queue.fail(db, self.worker_id, batch.task_ids, str(e))
+                finished = datetime.now(timezone.utc)
+                duration = int((finished - started).total_seconds() * 1000)
+                _log(job_id, f"Condensation [{len(batch.item_ids)} items]", "error", started, finished, duration, str(e))
+                logger.error(f"Condensation of {len(batch.item_ids)} items failed (will retry): {e}")
+            return len(batch.task_ids)
+        finally:
+            db.close()
+
+    def run_forever(self):
+        logger.info(f"Condensation worker {self.worker_id} started.")
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} poll failed: {e}")
+                processed = 0
+            if not processed:
+                self._stop.wait(CONDENSE_POLL_SECONDS)
+        logger.info(f"Condensation worker {self.worker_id} stopped.")
+
+
+_embedded_workers = []
+
+
+def start_embedded_workers(count: Optional[int] = None):
+    """
+    Start in-process worker threads (used by the API server).
+    """
+    count = CONDENSE_EMBEDDED_WORKERS if count is None else count
+    for _ in range(count - len(_embedded_workers)):
+        worker = CondensationWorker()
+        threading.Thread(target=worker.run_forever, name="condensation-worker", daemon=True).start()
+        _embedded_workers.append(worker)
+
+
+def stop_embedded_workers():
+    for worker in _embedded_workers:
+        worker.stop()
+    _embedded_workers.clear()
+
+
+def _process_main():
+    logging.basicConfig(level=logging.INFO)
+    CondensationWorker().run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Condensation worker pool")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("CONDENSE_WORKER_PROCESSES", "2")))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    procs = [multiprocessing.Process(target=_process_main, daemon=False) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    try:
+        while any(p.is_alive() for p in procs):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
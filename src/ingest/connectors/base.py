@@ -1,5 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Generator, Tuple
+from typing import List, Dict, Any, Generator, Tuple, Optional
+
+import httpx
 
 class Connector(ABC):
     @abstractmethod
@@ -17,3 +20,29 @@ class Connector(ABC):
         Yields (source_uri, content_bytes, metadata).
         """
         pass
+
+    async def afetch(self, config: Dict[str, Any], item_ref: Dict[str, Any], client: httpx.AsyncClient) -> List[Tuple[str, bytes, Dict[str, Any]]]:
+        """
+        Async variant of fetch, called concurrently by IngestService with a
+        shared pooled client. The default runs the synchronous fetch on a
+        worker thread; network-bound connectors should override it.
+
+        Returning no results for an item that carried validators means the
+        source reported it unchanged.
+        """
+        return await asyncio.to_thread(lambda: list(self.fetch(config, item_ref)))
+
+    def item_uri(self, item_ref: Dict[str, Any]) -> Optional[str]:
+        """
+        Source URI an item_ref will be stored under, if known before fetching.
+        Used to attach the previous run's cache validators (ETag /
+        Last-Modified) to item_ref["validators"] for conditional requests.
+        """
+        return None
+
+    def rate_limit_key(self, item_ref: Dict[str, Any]) -> Optional[str]:
+        """
+        Key (usually a hostname) that item_ref's requests are rate limited
+        under, or None for no per-key limit.
+        """
+        return None
@@ -0,0 +1,104 @@
+import asyncio
+import inspect
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+# Concurrency / politeness limits for connector fetches
+INGEST_FETCH_CONCURRENCY = int(os.getenv("INGEST_FETCH_CONCURRENCY", "16"))
+INGEST_HOST_RATE_LIMIT = float(os.getenv("INGEST_HOST_RATE_LIMIT", "4"))  # requests/second per host, 0 = unlimited
+INGEST_FETCH_TIMEOUT = float(os.getenv("INGEST_FETCH_TIMEOUT", "30"))
+
+Fetched = Tuple[str, bytes, Dict[str, Any]]
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to the same key (host) at least 1/rate seconds apart.
+    Different hosts never wait on each other.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, key: Optional[str]):
+        if not key or not self.interval:
+            return
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def shared_client(concurrency: Optional[int] = None) -> httpx.AsyncClient:
+    """
+    Pooled client shared by every fetch in an ingest run.
+    """
+    concurrency = concurrency or INGEST_FETCH_CONCURRENCY
+    return httpx.AsyncClient(
+        timeout=INGEST_FETCH_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    )
+
+
+async def fetch_concurrently(connector, config: Dict[str, Any], item_refs: List[Dict[str, Any]],
+                             client: httpx.AsyncClient, concurrency: Optional[int] = None,
+                             host_rate: Optional[float] = None) -> AsyncIterator[Tuple[Any, Optional[List[Fetched]], Optional[Exception]]]:
+    """
+    Fetch item_refs with at most `concurrency` requests in flight and per-host
+    rate limiting. Yields (item_ref, results, error) in completion order, so
+    callers can store artifacts while slower fetches are still running.
+
+    A fixed pool of workers pulls item_refs and hands results over through a
+    queue of `concurrency` slots: when the caller stops consuming, workers
+    stop fetching, so at most ~2x `concurrency` responses are held in memory.
+
+    Objects without a coroutine `afetch` (not derived from Connector) fall
+    back to calling their synchronous `fetch` inline, one item at a time.
+    """
+    concurrency = concurrency or INGEST_FETCH_CONCURRENCY
+    limiter = HostRateLimiter(INGEST_HOST_RATE_LIMIT if host_rate is None else host_rate)
+    native = inspect.iscoroutinefunction(getattr(connector, "afetch", None))
+    rate_key = getattr(connector, "rate_limit_key", None)
+
+    pending = iter(item_refs)
+    results_q: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    done = object()
+
+    async def worker():
+        for item_ref in pending:
+            try:
+                await limiter.acquire(rate_key(item_ref) if native and callable(rate_key) else None)
+                if native:
+                    results = await connector.afetch(config, item_ref, client)
+                else:
+                    results = connector.fetch(config, item_ref)
+                outcome = (item_ref, list(results), None)
+            except Exception as e:
+                outcome = (item_ref, None, e)
+            await results_q.put(outcome)
+
+    async def run_workers():
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            await results_q.put(done)
+
+    producer = asyncio.create_task(run_workers())
+    try:
+        while True:
+            outcome = await results_q.get()
+            if outcome is done:
+                break
+            yield outcome
+        await producer
+    finally:
+        producer.cancel()
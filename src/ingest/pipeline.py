@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger("IngestPipeline")
+
+# Streaming ingest: fetch -> store -> embed -> queue for condensation. Stages
+# are connected by bounded queues, so a slow stage pauses the ones before it
+# instead of letting fetched content pile up in memory.
+INGEST_MICRO_BATCH = int(os.getenv("INGEST_MICRO_BATCH", "16"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))
+
+END_OF_STREAM = object()
+
+
+async def micro_batches(queue: asyncio.Queue, batch_size: Optional[int] = None) -> AsyncIterator[List[Any]]:
+    """
+    Yield lists of up to batch_size queued entries until END_OF_STREAM. Waits
+    for the first entry of a batch, then takes whatever else is already
+    queued, so batches fill up under load without delaying a trickle.
+    """
+    batch_size = batch_size or INGEST_MICRO_BATCH
+    finished = False
+    while not finished:
+        entry = await queue.get()
+        if entry is END_OF_STREAM:
+            break
+        batch = [entry]
+        while len(batch) < batch_size and not queue.empty():
+            entry = queue.get_nowait()
+            if entry is END_OF_STREAM:
+                finished = True
+                break
+            batch.append(entry)
+        yield batch
+
+
+class IngestStages:
+    """
+    Embed and enqueue stages of one ingest run. Each stage is called on a
+    worker thread and keeps its own DB session; the embedding model and
+    Qdrant client are created on first use. Condensation itself happens in
+    the condensation workers.
+    """
+
+    def __init__(self, project_id: uuid.UUID, source_type: str):
+        self.project_id = project_id
+        self.source_type = source_type
+        self._embed_db = None
+        self._queue_db = None
+        self._ingress = None
+        self._qdrant = None
+
+    def embed(self, artifacts: List[Dict[str, Any]]) -> List[uuid.UUID]:
+        """
+        Turn a micro-batch of stored artifacts into episodic items (one
+        batched embed call) and mark the artifacts embedded. Returns the new
+        item IDs, one per artifact, in order.
+        """
+        from src.db.schemas import EpisodicItemCreate
+
+        ingress = self._ingress_agent()
+        try:
+            items = ingress.process_memories([
+                EpisodicItemCreate(
+                    project_id=str(self.project_id),
+                    text=artifact["text"],
+                    source=self.source_type,
+                    metadata={"artifact_id": str(artifact["artifact_id"]), "source_uri": artifact["source_uri"]}
+                )
+                for artifact in artifacts
+            ])
+            self._mark(self._embed_db, "embedded_at", [a["artifact_id"] for a in artifacts])
+            self._embed_db.commit()
+        except Exception:
+            self._embed_db.rollback()
+            raise
+        return [item.id for item in items]
+
+    def enqueue(self, item_ids: List[uuid.UUID], artifact_ids: List[uuid.UUID]) -> int:
+        """
+        Hand a micro-batch of episodic items to the durable condensation
+        queue (drained by condensation workers) and mark their artifacts
+        queued, in one transaction. Returns the number queued.
+        """
+        from src.db.session import SessionLocal
+        from src.engine.work_queue import enqueue_condensation
+
+        if self._queue_db is None:
+            self._queue_db = SessionLocal()
+        try:
+            queued = enqueue_condensation(self._queue_db, self.project_id, item_ids, commit=False)
+            self._mark(self._queue_db, "queued_at", artifact_ids)
+            self._queue_db.commit()
+        except Exception:
+            self._queue_db.rollback()
+            raise
+        return queued
+
+    @staticmethod
+    def _mark(db, column: str, artifact_ids: List[uuid.UUID]):
+        from sqlalchemy import text
+
+        if artifact_ids:
+            db.execute(
+                text(f"UPDATE fetched_artifacts SET {column} = :now WHERE id = ANY(:ids)"),
+                {"now": datetime.utcnow(), "ids": [uuid.UUID(str(a)) for a in artifact_ids]}
+            )
+
+    def close(self):
+        for db in (self._embed_db, self._queue_db):
+            if db is not None:
+                db.close()
+        if self._qdrant is not None:
+            self._qdrant.close()
+
+    def _ingress_agent(self):
+        if self._ingress is None:
+            from qdrant_client import QdrantClient
+            from src.agents.ingress import IngressAgent
+            from src.db.session import SessionLocal, QDRANT_URL, QDRANT_API_KEY
+
+            self._embed_db = SessionLocal()
+            self._qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+            self._ingress = IngressAgent(self._embed_db, self._qdrant)
+        return self._ingress
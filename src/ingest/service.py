@@ -1,12 +1,18 @@
 import uuid
+import asyncio
 import hashlib
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Set, Tuple
 from sqlalchemy.orm import Session
-from src.db.models import IngestJob, IngestJobRun, FetchedArtifact
+from sqlalchemy import select
+from src.db.models import IngestJob, IngestJobRun, FetchedArtifact, EpisodicItem
 from src.ingest.connectors.web import WebURLConnector
-import threading
+from src.ingest.fetcher import fetch_concurrently, shared_client
+from src.ingest.pipeline import IngestStages, micro_batches, END_OF_STREAM, INGEST_MICRO_BATCH, INGEST_QUEUE_SIZE
 from src.engine.scheduler import _log_job
+import logging
+
+logger = logging.getLogger("IngestService")
 
 # Registry of available connectors
 CONNECTORS = {
@@ -56,56 +62,21 @@ class IngestService:
 
             items = connector.discover(job.source_config)
             
-            stats = {"fetched": 0, "bytes": 0}
-            
-            for item_ref in items:
-                for uri, content, meta in connector.fetch(job.source_config, item_ref):
-                    # Deduping hash
-                    content_hash = hashlib.sha256(content).hexdigest()
-                    
-                    # Store Raw Artifact
-                    artifact = FetchedArtifact(
-                        run_id=run.id,
-                        job_id=job.id,
-                        source_uri=uri,
-                        content_hash=content_hash,
-                        content=content.decode('utf-8', errors='ignore'), # Assuming text for now
-                        metadata_=meta
-                    )
-                    self.db.add(artifact)
-                    stats["fetched"] += 1
-                    stats["bytes"] += len(content)
-
-
+            stats, errors = asyncio.run(self._run_pipeline(connector, job, run, items))
 
+            if stats["failed"] and not (stats["fetched"] or stats["unchanged"] or stats["not_modified"]):
+                raise RuntimeError(f"All {stats['failed']} fetches failed: " + "; ".join(errors[:10]))
 
-            run.status = "completed"
+            # Fetch failures and artifacts that did not reach the condensation
+            # queue (re-fed on the next run) both leave the run partial
+            run.status = "partially_failed" if errors else "completed"
             run.ended_at = datetime.utcnow()
             run.stats = stats
+            if errors:
+                run.error_log = "\n".join(errors)
             self.db.commit()
             
             _log_job(str(run.id), f"Ingest: {job.source_type}", "success", run.started_at, run.ended_at)
-            
-            # Trigger Condensation Pipeline
-            try:
-                # Run condensation in a background thread to unblock the ingestion job
-                
-                # We need to capture the necessary IDs and data to pass to the thread
-                # The thread must manage its own DB session
-                job_id = job.id
-                project_id = job.project_id
-                run_id = run.id
-                source_type = job.source_type
-                
-                thread = threading.Thread(
-                    target=self._run_condensation_task,
-                    args=(job_id, project_id, run_id, source_type)
-                )
-                thread.start()
-
-            except Exception as e:
-                print(f"Warning: Failed to trigger condensation: {e}")
-            
             return run
 
         except Exception as e:
@@ -116,64 +87,225 @@ class IngestService:
             _log_job(str(run.id), f"Ingest: {job.source_type}", "error", run.started_at, datetime.utcnow(), error=str(e))
             raise e
 
-    def _run_condensation_task(self, job_id: uuid.UUID, project_id: uuid.UUID, run_id: uuid.UUID, source_type: str):
+    async def _run_pipeline(self, connector, job: IngestJob, run: IngestJobRun, items: list):
         """
-        Background task for condensation.
-        Must use its own DB session.
+        Streaming fetch -> store -> embed -> enqueue. Artifacts are committed
+        in micro-batches and handed to the embed stage, whose episodic items
+        are queued for the condensation workers, through bounded queues.
+        Memories become searchable while the crawl is still running, and a
+        slow downstream stage throttles fetching rather than buffering the run.
+
+        Each artifact records when it was embedded and queued. Artifacts an
+        earlier run stored but never got onto the queue are re-fed first, and
+        embed or queue failures are returned as errors. Returns (stats, errors).
         """
-        import asyncio
-        import os
-        from src.agents.ingress import IngressAgent
-        from src.db.schemas import EpisodicItemCreate
-        from qdrant_client import QdrantClient
-        from src.db.session import SessionLocal
-        
-        print(f"Starting background condensation for run {run_id}")
-        
-        start_time = datetime.utcnow()
-        _log_job(f"condense_{run_id}", f"Condense: {run_id}", "running", start_time)
-        
-        # New DB Session for this thread
-        db = SessionLocal()
-        
+        stats = {"fetched": 0, "bytes": 0, "failed": 0, "unchanged": 0, "not_modified": 0,
+                 "resumed": 0, "embedded": 0, "queued": 0}
+        stage_errors: List[str] = []
+        stored_q: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+        embedded_q: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+        stages = IngestStages(job.project_id, job.source_type)
+
+        async def embed_stage():
+            async for batch in micro_batches(stored_q):
+                try:
+                    item_ids = await asyncio.to_thread(stages.embed, batch)
+                except Exception as e:
+                    logger.error(f"Embedding {len(batch)} artifacts of run {run.id} failed: {e}")
+                    stage_errors.append(f"embedding {len(batch)} artifacts failed: {e}")
+                    continue
+                stats["embedded"] += len(item_ids)
+                for artifact, item_id in zip(batch, item_ids):
+                    await embedded_q.put((artifact["artifact_id"], item_id))
+            await embedded_q.put(END_OF_STREAM)
+
+        async def enqueue_stage():
+            async for batch in micro_batches(embedded_q):
+                try:
+                    stats["queued"] += await asyncio.to_thread(
+                        stages.enqueue, [item_id for _, item_id in batch], [a for a, _ in batch]
+                    )
+                except Exception as e:
+                    logger.error(f"Queueing {len(batch)} items of run {run.id} for condensation failed: {e}")
+                    stage_errors.append(f"queueing {len(batch)} items for condensation failed: {e}")
+
+        downstream = [asyncio.create_task(embed_stage()), asyncio.create_task(enqueue_stage())]
         try:
-            # Fetch all newly created artifacts
-            # We must re-query them in this new session
-            new_artifacts = db.query(FetchedArtifact).filter(
-                FetchedArtifact.run_id == run_id
-            ).all()
-
-            async def process_ingested_artifacts_async():
-                # Initialize IngressAgent (loads embedding model)
-                qdrant = QdrantClient(
-                    host=os.getenv("QDRANT_HOST", "localhost"),
-                    port=int(os.getenv("QDRANT_PORT", 6333))
+            await self._resume_artifacts(job, stats, stored_q, embedded_q)
+            errors = await self._fetch_and_store(connector, job, run, items, stats, stored_q)
+            await stored_q.put(END_OF_STREAM)
+            await asyncio.gather(*downstream)
+        finally:
+            for task in downstream:
+                task.cancel()
+            stages.close()
+        errors.extend(stage_errors)
+        if not stage_errors and stats["queued"] < stats["fetched"] + stats["resumed"]:
+            errors.append(f"only {stats['queued']} of {stats['fetched'] + stats['resumed']} artifacts "
+                          f"were queued for condensation")
+        return stats, errors
+
+    async def _resume_artifacts(self, job: IngestJob, stats: Dict[str, int],
+                                stored_q: asyncio.Queue, embedded_q: asyncio.Queue):
+        """
+        Re-feed the artifacts earlier runs of the job stored but did not get
+        onto the condensation queue: un-embedded ones go to the embed stage,
+        embedded ones (found by the artifact_id on their episodic item) straight
+        to the enqueue stage. Read in micro-batches in id order.
+        """
+        after = None
+        while True:
+            query = self.db.query(FetchedArtifact).filter(
+                FetchedArtifact.job_id == job.id, FetchedArtifact.queued_at.is_(None)
+            )
+            if after is not None:
+                query = query.filter(FetchedArtifact.id > after)
+            artifacts = query.order_by(FetchedArtifact.id).limit(INGEST_MICRO_BATCH).all()
+            if not artifacts:
+                return
+            after = artifacts[-1].id
+
+            embedded = [a for a in artifacts if a.embedded_at is not None]
+            items: Dict[str, uuid.UUID] = {}
+            if embedded:
+                artifact_key = EpisodicItem.metadata_["artifact_id"].astext
+                items = {
+                    artifact_id: item_id
+                    for item_id, artifact_id in self.db.query(EpisodicItem.id, artifact_key).filter(
+                        EpisodicItem.project_id == job.project_id,
+                        artifact_key.in_([str(a.id) for a in embedded])
+                    ).all()
+                }
+            for artifact in artifacts:
+                stats["resumed"] += 1
+                item_id = items.get(str(artifact.id))
+                if item_id is not None:
+                    await embedded_q.put((artifact.id, item_id))
+                else:
+                    await stored_q.put({"artifact_id": artifact.id, "source_uri": artifact.source_uri,
+                                        "text": artifact.content})
+            if len(artifacts) < INGEST_MICRO_BATCH:
+                return
+
+    async def _fetch_and_store(self, connector, job: IngestJob, run: IngestJobRun, items: list,
+                               stats: Dict[str, int], stored_q: asyncio.Queue) -> List[str]:
+        """
+        Fetch every discovered item concurrently through one pooled client and
+        store artifacts as results arrive, committing every micro-batch before
+        passing it downstream. A failing item is recorded in the returned
+        error list instead of aborting the whole run.
+
+        Items are fetched conditionally using the ETag / Last-Modified values
+        saved in the previous run's cursor, and content whose
+        (source_uri, content_hash) was already stored for this job is skipped,
+        so unchanged pages are never re-condensed. The lookup is made per
+        micro-batch, for that batch's URIs only.
+        """
+        errors: List[str] = []
+        candidates: List[Tuple[str, bytes, Dict[str, Any]]] = []
+        pending: List[Dict[str, Any]] = []
+
+        async def store():
+            # Dedup the micro-batch against the hashes already stored for its
+            # URIs, commit the new artifacts, then hand them downstream (blocks
+            # while the embed stage is behind)
+            if not candidates:
+                return
+            known = self._stored_hashes(job.id, {uri for uri, _, _ in candidates})
+            for uri, content, meta in candidates:
+                content_hash = hashlib.sha256(content).hexdigest()
+                if (uri, content_hash) in known:
+                    stats["unchanged"] += 1
+                    continue
+                known.add((uri, content_hash))
+
+                # Store Raw Artifact
+                artifact = FetchedArtifact(
+                    id=uuid.uuid4(),
+                    run_id=run.id,
+                    job_id=job.id,
+                    source_uri=uri,
+                    content_hash=content_hash,
+                    content=content.decode('utf-8', errors='ignore'), # Assuming text for now
+                    metadata_=meta
                 )
-                ingress = IngressAgent(db, qdrant)
-                
-                # Transform all artifacts to EpisodicItemCreate batch
-                items_to_process = [
-                    EpisodicItemCreate(
-                        project_id=str(project_id),
-                        text=artifact.content,
-                        source=source_type,
-                        metadata={"artifact_id": str(artifact.id), "source_uri": artifact.source_uri}
-                    )
-                    for artifact in new_artifacts
-                ]
-                
-                if items_to_process:
-                    # Process and condense in a single batch call
-                    await ingress.process_and_condense_batch(items_to_process)
+                self.db.add(artifact)
+                pending.append({"artifact_id": artifact.id, "source_uri": uri, "text": artifact.content})
+                stats["fetched"] += 1
+                stats["bytes"] += len(content)
+            candidates.clear()
+            if not pending:
+                return
+            self.db.commit()
+            for payload in pending:
+                await stored_q.put(payload)
+            pending.clear()
 
-            # Run async condensation in this thread
-            asyncio.run(process_ingested_artifacts_async())
+        previous = self._previous_validators(job.id)
+        validators: Dict[str, Dict[str, Any]] = {}
 
-            print(f"Condensed {len(new_artifacts)} artifacts for run {run_id}.")
-            _log_job(f"condense_{run_id}", f"Condense: {run_id}", "success", start_time, datetime.utcnow())
+        refs = []
+        for item_ref in items:
+            uri = connector.item_uri(item_ref) if isinstance(item_ref, dict) and hasattr(connector, "item_uri") else None
+            if isinstance(uri, str) and uri in previous:
+                item_ref = {**item_ref, "validators": previous[uri]}
+            refs.append((item_ref, uri if isinstance(uri, str) else None))
+        uri_of = {id(ref): uri for ref, uri in refs}
 
-        except Exception as e:
-            print(f"Error in background condensation for run {run_id}: {e}")
-            _log_job(f"condense_{run_id}", f"Condense: {run_id}", "error", start_time, datetime.utcnow(), error=str(e))
-        finally:
-            db.close()
+        async with shared_client() as client:
+            async for item_ref, results, error in fetch_concurrently(connector, job.source_config, [r for r, _ in refs], client):
+                uri = uri_of.get(id(item_ref))
+                if error is not None:
+                    stats["failed"] += 1
+                    errors.append(f"{item_ref}: {error}")
+                    if uri in previous:
+                        validators[uri] = previous[uri]
+                    continue
+
+                if not results and uri in previous:
+                    # 304 Not Modified: keep the validators for the next run
+                    stats["not_modified"] += 1
+                    validators[uri] = previous[uri]
+                    continue
+
+                for uri, content, meta in results:
+                    if meta.get("etag") or meta.get("last_modified"):
+                        validators[uri] = {"etag": meta.get("etag"), "last_modified": meta.get("last_modified")}
+                    candidates.append((uri, content, meta))
+
+                if len(candidates) >= INGEST_MICRO_BATCH:
+                    await store()
+
+        await store()
+        run.cursor = {"validators": validators}
+        return errors
+
+    def _previous_validators(self, job_id: uuid.UUID) -> Dict[str, Dict[str, Any]]:
+        """
+        ETag / Last-Modified per source URI from the job's latest finished run.
+        """
+        cursor = self.db.execute(
+            select(IngestJobRun.cursor)
+            .where(
+                IngestJobRun.job_id == job_id,
+                IngestJobRun.status.in_(["completed", "partially_failed"])
+            )
+            .order_by(IngestJobRun.started_at.desc())
+            .limit(1)
+        ).scalar()
+        if not isinstance(cursor, dict):
+            return {}
+        return dict(cursor.get("validators") or {})
+
+    def _stored_hashes(self, job_id: uuid.UUID, uris: Set[str]) -> Set[Tuple[str, str]]:
+        """
+        The (source_uri, content_hash) pairs already stored for the job, for
+        just these URIs (an index range scan per micro-batch rather than the
+        job's whole history in memory).
+        """
+        rows = self.db.execute(
+            select(FetchedArtifact.source_uri, FetchedArtifact.content_hash)
+            .where(FetchedArtifact.job_id == job_id, FetchedArtifact.source_uri.in_(uris))
+            .distinct()
+        ).all()
+        return {(r[0], r[1]) for r in rows}
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.db.models import Assertion
+from src.learn.evidence_store import Evidence, insert_evidence
+
+ASSERTION_UPSERT_BATCH = int(os.getenv("ASSERTION_UPSERT_BATCH", "500"))
+
+_WS = re.compile(r"\s+")
+
+
+def _norm(value: Optional[str]) -> str:
+    return _WS.sub(" ", value or "").strip(" ").lower()
+
+
+def assertion_fingerprint(subject_entity_id, subject_text: Optional[str], predicate: str,
+                          object_entity_id, object_text: Optional[str], polarity: Optional[int]) -> str:
+    """
+    Identity of an assertion within a project: hash of the normalized
+    triple (case and whitespace folded), the linked entity IDs and polarity.
+    Must stay in sync with FINGERPRINT_SQL.
+    """
+    parts = [
+        str(subject_entity_id) if subject_entity_id else "",
+        _norm(subject_text),
+        _norm(predicate),
+        str(object_entity_id) if object_entity_id else "",
+        _norm(object_text),
+        str(1 if polarity is None else polarity),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _sql_norm(column: str) -> str:
+    return f"lower(btrim(regexp_replace(coalesce({column}, ''), '\\s+', ' ', 'g'), ' '))"
+
+
+# SQL twin of assertion_fingerprint(), used to backfill existing rows
+FINGERPRINT_SQL = (
+    "encode(sha256(convert_to(concat_ws('|', "
+    "coalesce(CAST(subject_entity_id AS text), ''), "
+    f"{_sql_norm('subject_text')}, {_sql_norm('predicate')}, "
+    "coalesce(CAST(object_entity_id AS text), ''), "
+    f"{_sql_norm('object_text')}, CAST(coalesce(polarity, 1) AS text)"
+    "), 'UTF8')), 'hex')"
+)
+
+# Fingerprint rows that have none (pre-fingerprint rows, or rows whose
+# entity references were rewritten by entity merges). Only one row per
+# (project_id, fingerprint) gets it; further duplicates keep NULL so the
+# unique index holds.
+_BACKFILL_TEMPLATE = """
+    UPDATE assertions a
+    SET fingerprint = c.fp
+    FROM (
+        SELECT DISTINCT ON (x.project_id, x.fp) x.id, x.fp
+        FROM (
+            SELECT id, project_id, first_seen_at, {fingerprint} AS fp
+            FROM assertions
+            WHERE fingerprint IS NULL {scope}
+        ) x
+        WHERE NOT EXISTS (
+            SELECT 1 FROM assertions b
+            WHERE b.project_id = x.project_id AND b.fingerprint = x.fp
+        )
+        ORDER BY x.project_id, x.fp, x.first_seen_at, x.id
+    ) c
+    WHERE a.id = c.id
+"""
+BACKFILL_FINGERPRINTS_SQL = _BACKFILL_TEMPLATE.format(fingerprint=FINGERPRINT_SQL, scope="")
+
+
+def backfill_fingerprints(db: Session, project_id) -> None:
+    """
+    Fingerprint one project's rows that have none. Does not commit.
+    """
+    db.execute(text(_BACKFILL_TEMPLATE.format(
+        fingerprint=FINGERPRINT_SQL, scope="AND project_id = CAST(:pid AS uuid)"
+    )), {"pid": str(project_id)})
+
+
+@dataclass
+class UpsertedAssertion:
+    id: uuid.UUID
+    status: str
+    inserted: bool
+    fingerprint: Optional[str] = None
+
+
+def _row(a: Assertion, now: datetime) -> dict:
+    return {
+        "id": a.id or uuid.uuid4(),
+        "project_id": a.project_id,
+        "subject_entity_id": a.subject_entity_id,
+        "subject_text": a.subject_text,
+        "predicate": a.predicate,
+        "object_entity_id": a.object_entity_id,
+        "object_text": a.object_text,
+        "polarity": 1 if a.polarity is None else a.polarity,
+        "confidence": a.confidence if a.confidence is not None else 0.6,
+        "status": a.status or "pending_review",
+        "rejection_reason": a.rejection_reason,
+        "instruction_score": a.instruction_score or 0.0,
+        "safety_score": a.safety_score or 0.0,
+        "first_seen_at": now,
+        "last_seen_at": now,
+        "provenance": list(a.provenance or []),  # legacy; evidence goes to assertion_evidence
+        "strength": a.strength if a.strength is not None else 1.0,
+        "access_count": a.access_count or 0,
+        "last_accessed_at": now,
+        "fingerprint": assertion_fingerprint(a.subject_entity_id, a.subject_text, a.predicate,
+                                             a.object_entity_id, a.object_text, a.polarity),
+    }
+
+
+def _fold(rows: List[dict]) -> List[dict]:
+    """
+    Merge rows of the same batch that share a fingerprint (one statement may
+    not update the same row twice).
+    """
+    merged = {}
+    for row in rows:
+        key = (str(row["project_id"]), row["fingerprint"])
+        if key not in merged:
+            merged[key] = row
+            continue
+        kept = merged[key]
+        kept["confidence"] = max(kept["confidence"], row["confidence"])
+        kept["instruction_score"] = max(kept["instruction_score"], row["instruction_score"])
+        kept["safety_score"] = max(kept["safety_score"], row["safety_score"])
+    return list(merged.values())
+
+
+def upsert_assertions(db: Session, assertions: List[Assertion],
+                      evidence: Optional[Sequence[List[Evidence]]] = None,
+                      batch_size: Optional[int] = None) -> List[UpsertedAssertion]:
+    """
+    Write assertions with batched INSERT ... ON CONFLICT (project_id,
+    fingerprint) DO UPDATE. A conflicting row keeps its status and review
+    fields; its confidence and guardrail scores take the max.
+
+    `evidence`, parallel to `assertions`, is appended to assertion_evidence
+    for whichever row each assertion landed on; the row itself is not
+    rewritten to record it. Does not commit.
+    """
+    if not assertions:
+        return []
+    batch_size = batch_size or ASSERTION_UPSERT_BATCH
+    now = datetime.utcnow()
+    candidates = [_row(a, now) for a in assertions]
+    rows = _fold([dict(row) for row in candidates])
+
+    results: List[UpsertedAssertion] = []
+    landed = {}
+    for start in range(0, len(rows), batch_size):
+        stmt = insert(Assertion).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Assertion.project_id, Assertion.fingerprint],
+            set_={
+                "confidence": func.greatest(Assertion.confidence, stmt.excluded.confidence),
+                "instruction_score": func.greatest(Assertion.instruction_score, stmt.excluded.instruction_score),
+                "safety_score": func.greatest(Assertion.safety_score, stmt.excluded.safety_score),
+                "last_seen_at": stmt.excluded.last_seen_at,
+            },
+        ).returning(Assertion.id, Assertion.status, literal_column("(xmax = 0)").label("inserted"),
+                    Assertion.project_id, Assertion.fingerprint)
+        for r in db.execute(stmt):
+            results.append(UpsertedAssertion(r.id, r.status, bool(r.inserted), r.fingerprint))
+            landed[(str(r.project_id), r.fingerprint)] = r.id
+
+    if evidence:
+        insert_evidence(db, [
+            {
+                "assertion_id": landed[(str(row["project_id"]), row["fingerprint"])],
+                "project_id": row["project_id"],
+                "episodic_id": ev.episodic_id,
+                "quote": ev.quote,
+                "envelope_id": ev.envelope_id,
+                "proof": ev.proof,
+            }
+            for row, entries in zip(candidates, evidence)
+            if (str(row["project_id"]), row["fingerprint"]) in landed
+            for ev in entries
+        ])
+    return results
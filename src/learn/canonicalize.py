@@ -1,96 +1,187 @@
-from typing import List, Dict, Tuple
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import select, text
 from src.db.models import Entity, Project
 from src.llm.schemas import ExtractedEntity
+from src.learn.entity_index import EntityVectorIndex
+import logging
 import uuid
 
+logger = logging.getLogger("EntityCanonicalizer")
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    # Name vectors are unit length, so the dot product is the cosine
+    return sum(x * y for x, y in zip(a, b))
+
+
+@dataclass
+class EntityPlan:
+    """
+    Result of resolving a batch of extracted entities, before any write:
+    name -> entity ID, entities to insert, and aliases to append to
+    existing entities.
+    """
+    resolution: Dict[str, str] = field(default_factory=dict)
+    new_entities: List[Entity] = field(default_factory=list)
+    alias_additions: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def _normalize(name: str) -> str:
+    n = name.lower().strip()
+    if n.startswith("the "):
+        n = n[4:]
+    return n
+
+
 class EntityCanonicalizer:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, vector_index: Optional[EntityVectorIndex] = None):
         self.db = db
+        self.vector_index = vector_index
 
     def resolve(self, project_id: str, extracted_entities: List[ExtractedEntity]) -> Dict[str, str]:
         """
         Resolves a list of ExtractedEntity objects to persistent Entity IDs.
         Returns a mapping of { extracted_name: entity_uuid }.
         """
-        resolution_map = {}
-        
-        # 1. Fetch potential matches from DB
-        def normalize(name: str):
-            n = name.lower().strip()
-            if n.startswith("the "):
-                n = n[4:]
-            return n
-
-        names_to_check = [normalize(e.name) for e in extracted_entities]
-        aliases_to_check = [normalize(a) for e in extracted_entities for a in e.aliases]
-        all_terms = set(names_to_check + aliases_to_check)
-
-        # Naive matching: Exact match on name or alias (Case Insensitive)
-        # In a real system, this would use a Vectorized Entity Store for fuzzy matching
-        stmt = select(Entity).where(
-            Entity.project_id == project_id,
-            or_(
-                Entity.canonical_name.in_(all_terms),
-                Entity.aliases.contains(all_terms) # JSONB contains check (simplified)
-            )
-        )
-        # SQLAlchemy's .contains for PG arrays/JSONB works differently, 
-        # for now let's iterate to be safe and predictable in Python due to complexity of JSONB array overlap in SQL
-        
-        existing_entities = self.db.execute(select(Entity).where(Entity.project_id == project_id)).scalars().all()
-        
-        # Build lookup index
+        plan = self.plan(project_id, extracted_entities, self.snapshot(project_id))
+        self.apply(plan)
+        self.db.commit()
+        return plan.resolution
+
+    def snapshot(self, project_id: str) -> List[Entity]:
+        """
+        The project's entities, read once so plan() can match against them
+        without further queries.
+        """
+        return self.db.execute(select(Entity).where(Entity.project_id == project_id)).scalars().all()
+
+    def plan(self, project_id: str, extracted_entities: List[ExtractedEntity],
+             existing_entities: List[Entity]) -> EntityPlan:
+        """
+        Resolve names against existing_entities (exact name/alias match, then
+        the vector index) without touching the DB session. Name vectors of
+        new entities are indexed here so they get their embedding_ref.
+        """
+        plan = EntityPlan()
+
+        # 1. Exact match on name or alias (Case Insensitive); near-duplicate
+        # spellings are resolved through the vector index below
         lookup: Dict[str, Entity] = {}
         for ent in existing_entities:
-            lookup[normalize(ent.canonical_name)] = ent
+            lookup[_normalize(ent.canonical_name)] = ent
             if ent.aliases:
                 for alias in ent.aliases:
-                    lookup[normalize(alias)] = ent
+                    lookup[_normalize(alias)] = ent
+
+        # 2. Fuzzy candidates: names with no exact match are embedded in one
+        # batch and looked up in the per-project ANN index
+        by_id: Dict[str, Entity] = {str(ent.id): ent for ent in existing_entities}
+        vectors: Dict[str, List[float]] = {}
+        neighbours: Dict[str, Tuple[str, float]] = {}
+        if self.vector_index:
+            unresolved = list(dict.fromkeys(ext.name for ext in extracted_entities if _normalize(ext.name) not in lookup))
+            try:
+                embedded = self.vector_index.embed(unresolved)
+                vectors = dict(zip(unresolved, embedded))
+                for name, hit in zip(unresolved, self.vector_index.nearest(project_id, embedded)):
+                    if hit and hit[0] in by_id:
+                        neighbours[name] = hit
+            except Exception as e:
+                logger.warning(f"Vector entity resolution unavailable, using exact matches only: {e}")
+                vectors, neighbours = {}, {}
 
-        # 2. Process each extracted entity
+        created: List[Entity] = []
+        new_ids = set()
+
+        # 3. Process each extracted entity
         for ext in extracted_entities:
-            key = normalize(ext.name)
-            
+            key = _normalize(ext.name)
+            match = lookup.get(key)
+
+            if match is None and ext.name in neighbours:
+                match = by_id[neighbours[ext.name][0]]
+            if match is None and ext.name in vectors:
+                # Entities created earlier in this batch are not in the index yet
+                for ent in created:
+                    if _cosine(vectors[ext.name], vectors[ent.canonical_name]) >= self.vector_index.threshold:
+                        match = ent
+                        break
+
             # Match found?
-            if key in lookup:
-                match = lookup[key]
-                resolution_map[ext.name] = str(match.id)
-                
-                # Merge new aliases if any
-                updated = False
-                current_aliases = set(match.aliases or [])
-                for idx, new_alias in enumerate(ext.aliases):
-                    if new_alias.lower() not in [a.lower() for a in current_aliases]:
-                        current_aliases.add(new_alias)
-                        updated = True
-                
-                if updated:
-                    match.aliases = list(current_aliases)
-                    self.db.add(match)
+            if match is not None:
+                plan.resolution[ext.name] = str(match.id)
+
+                # Merge new aliases (and the fuzzy-matched surface form) if any
+                current_aliases = list(match.aliases or [])
+                known = {a.lower() for a in current_aliases}
+                added = []
+                new_aliases = list(ext.aliases)
+                if key != _normalize(match.canonical_name):
+                    new_aliases.append(ext.name)
+                for new_alias in new_aliases:
+                    if new_alias.lower() not in known:
+                        known.add(new_alias.lower())
+                        added.append(new_alias)
+
+                if added:
+                    if match.id in new_ids:
+                        match.aliases = current_aliases + added
+                    else:
+                        # Written by apply(); reflect it on the loaded object
+                        # without marking it dirty
+                        plan.alias_additions.setdefault(str(match.id), []).extend(added)
+                        set_committed_value(match, "aliases", current_aliases + added)
+                lookup[key] = match
 
             else:
                 # No match -> Create New Entity
-                new_ent_id = uuid.uuid4()
                 new_entity = Entity(
-                    id=new_ent_id,
+                    id=uuid.uuid4(),
                     project_id=project_id,
                     type=ext.type,
                     canonical_name=ext.name,
-                    aliases=ext.aliases,
+                    aliases=list(ext.aliases),
                     # description removed as it is not in the model
                     confidence=ext.confidence
                 )
-                self.db.add(new_entity)
-                self.db.flush() # Get ID ready
-                
+                plan.new_entities.append(new_entity)
+                new_ids.add(new_entity.id)
+
                 # Update lookup
                 lookup[key] = new_entity
                 for a in ext.aliases:
                     lookup[a.lower()] = new_entity
-                
-                resolution_map[ext.name] = str(new_entity.id)
 
-        self.db.commit()
-        return resolution_map
+                plan.resolution[ext.name] = str(new_entity.id)
+                if ext.name in vectors:
+                    created.append(new_entity)
+
+        # 4. Index new entities so later batches can resolve against them
+        if created:
+            try:
+                self.vector_index.upsert(project_id, created, [vectors[ent.canonical_name] for ent in created])
+            except Exception as e:
+                logger.warning(f"Failed to index {len(created)} new entities: {e}")
+
+        return plan
+
+    def apply(self, plan: EntityPlan) -> None:
+        """
+        Write a plan: new entities are inserted, alias additions appended
+        to existing rows in one statement. Does not commit.
+        """
+        for entity in plan.new_entities:
+            self.db.add(entity)
+        if plan.alias_additions:
+            self.db.execute(text("""
+                UPDATE entities e
+                SET aliases = COALESCE(e.aliases, '[]'::jsonb) || v.added,
+                    last_seen_at = :now
+                FROM jsonb_each(CAST(:additions AS jsonb)) AS v(id, added)
+                WHERE e.id = CAST(v.id AS uuid)
+            """), {"additions": json.dumps(plan.alias_additions), "now": datetime.utcnow()})
@@ -1,7 +1,8 @@
 from typing import List, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from src.db.models import Assertion, Entity
+from src.db.models import Assertion
+from src.learn.assertion_store import upsert_assertions
+from src.learn.evidence_store import Evidence
 from src.llm.schemas import ExtractedAssertion
 import uuid
 import os
@@ -12,11 +13,16 @@ class KnowledgeConsolidator:
         self.db = db
         self.guardrail = GuardrailEngine()
 
-    def consolidate(self, project_id: str, assertions: List[ExtractedAssertion], entity_map: Dict[str, str], status: str = None):
+    def consolidate(self, project_id: str, assertions: List[ExtractedAssertion], entity_map: Dict[str, str],
+                    status: str = None, commit: bool = True):
         """
         Upserts assertions into the Knowledge Graph.
         Links Subjects/Objects to Entity IDs using entity_map.
+        Returns the created or updated rows (UpsertedAssertion). With
+        commit=False the caller owns the transaction.
         """
+        candidates: List[Assertion] = []
+        evidence: List[List[Evidence]] = []
         for claim in assertions:
             # 1. Resolve Subject
             subj_id, subj_text = self._resolve_ref(claim.subject, entity_map)
@@ -41,56 +47,28 @@ class KnowledgeConsolidator:
                 else:
                     final_status = "active"
 
-            # 4. Check for duplicates (Subject + Predicate + Object + Polarity)
-            stmt = select(Assertion).where(
-                Assertion.project_id == project_id,
-                Assertion.subject_entity_id == subj_id,
-                Assertion.subject_text == subj_text,
-                Assertion.predicate == claim.predicate.lower(),
-                Assertion.object_entity_id == obj_id,
-                Assertion.object_text == obj_text,
-                Assertion.polarity == claim.polarity
-            )
-            existing = self.db.execute(stmt).scalars().first()
+            # 4. Duplicates (same fingerprint) are merged by the upsert
+            candidates.append(Assertion(
+                id=uuid.uuid4(),
+                project_id=project_id,
+                subject_entity_id=subj_id,
+                subject_text=subj_text,
+                predicate=claim.predicate.lower(),
+                object_entity_id=obj_id,
+                object_text=obj_text,
+                polarity=claim.polarity,
+                confidence=claim.confidence,
+                status=final_status,
+                rejection_reason=rejection_reason,
+                instruction_score=guard_res["instruction_score"],
+                safety_score=guard_res["safety_score"],
+            ))
+            evidence.append([Evidence(episodic_id=str(e.episodic_id), quote=e.quote) for e in claim.evidence])
 
-            if existing:
-                # Update provenance and confidence
-                if claim.evidence:
-                    current_prov = existing.provenance or []
-                    existing_ev_ids = {e.get("episodic_id") for e in current_prov}
-                    
-                    for ev in claim.evidence:
-                        if str(ev.episodic_id) not in existing_ev_ids:
-                            current_prov.append(ev.model_dump())
-                    
-                    existing.provenance = current_prov
-                    
-                # Update confidence and guardrail scores
-                existing.confidence = max(existing.confidence, claim.confidence)
-                existing.instruction_score = max(existing.instruction_score, guard_res["instruction_score"])
-                existing.safety_score = max(existing.safety_score, guard_res["safety_score"])
-                self.db.add(existing)
-
-            else:
-                new_assertion = Assertion(
-                    id=uuid.uuid4(),
-                    project_id=project_id,
-                    subject_entity_id=subj_id,
-                    subject_text=subj_text,
-                    predicate=claim.predicate.lower(),
-                    object_entity_id=obj_id,
-                    object_text=obj_text,
-                    polarity=claim.polarity,
-                    confidence=claim.confidence,
-                    status=final_status,
-                    rejection_reason=rejection_reason,
-                    instruction_score=guard_res["instruction_score"],
-                    safety_score=guard_res["safety_score"],
-                    provenance=[e.model_dump() for e in claim.evidence]
-                )
-                self.db.add(new_assertion)
-        
-        self.db.commit()
+        touched = upsert_assertions(self.db, candidates, evidence)
+        if commit:
+            self.db.commit()
+        return touched
 
     def _resolve_ref(self, ref: any, entity_map: Dict[str, str]):
         """
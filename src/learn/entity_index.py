@@ -0,0 +1,202 @@
+import logging
+import os
+import uuid
+from typing import List, Optional, Tuple, Iterable
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.db.models import Entity
+from src.db.qdrant import ENTITY_COLLECTION, ensure_collection, search_params
+
+logger = logging.getLogger("EntityIndex")
+
+# Fuzzy entity resolution: "Postgres" / "PostgreSQL" / "postgres db" resolve to
+# one entity when their name embeddings are at least this similar (cosine).
+ENTITY_VECTOR_MATCH = os.getenv("ENTITY_VECTOR_MATCH", "true").lower() == "true"
+ENTITY_MATCH_THRESHOLD = float(os.getenv("ENTITY_MATCH_THRESHOLD", "0.9"))
+ENTITY_EMBED_BATCH = int(os.getenv("ENTITY_EMBED_BATCH", "256"))
+
+
+class EntityVectorIndex:
+    """
+    Per-project ANN index of entity names, stored in the entity_names
+    collection (point ID == entity ID, filtered by the project_id tenant key).
+    """
+
+    def __init__(self, qdrant: Optional[QdrantClient] = None, embedding_model=None, threshold: Optional[float] = None):
+        self._qdrant = qdrant
+        self._embedding_model = embedding_model
+        self.threshold = ENTITY_MATCH_THRESHOLD if threshold is None else threshold
+
+    @property
+    def qdrant(self) -> QdrantClient:
+        if self._qdrant is None:
+            from src.db.session import QDRANT_URL, QDRANT_API_KEY
+            self._qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+        ensure_collection(self._qdrant, ENTITY_COLLECTION)
+        return self._qdrant
+
+    @property
+    def embedding_model(self):
+        if self._embedding_model is None:
+            from fastembed import TextEmbedding
+            self._embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
+        return self._embedding_model
+
+    def embed(self, names: List[str]) -> List[List[float]]:
+        """
+        Embed entity names in one batch (vectors are unit length).
+        """
+        if not names:
+            return []
+        return [v.tolist() for v in self.embedding_model.embed(names, batch_size=ENTITY_EMBED_BATCH)]
+
+    def nearest(self, project_id: str, vectors: List[List[float]]) -> List[Optional[Tuple[str, float]]]:
+        """
+        Closest existing entity for each vector as (entity_id, score), or None
+        when nothing in the project clears the similarity threshold. All
+        lookups go to Qdrant in a single batch request.
+        """
+        if not vectors:
+            return []
+
+        project_filter = models.Filter(
+            must=[models.FieldCondition(key="project_id", match=models.MatchValue(value=str(project_id)))]
+        )
+        responses = self.qdrant.query_batch_points(
+            collection_name=ENTITY_COLLECTION,
+            requests=[
+                models.QueryRequest(
+                    query=vector,
+                    filter=project_filter,
+                    params=search_params(),
+                    limit=1,
+                    score_threshold=self.threshold,
+                    with_payload=True
+                )
+                for vector in vectors
+            ]
+        )
+
+        matches = []
+        for response in responses:
+            if response.points:
+                hit = response.points[0]
+                matches.append(((hit.payload or {}).get("entity_id", str(hit.id)), hit.score))
+            else:
+                matches.append(None)
+        return matches
+
+    def similar_pairs(self, project_id: str, entity_ids: List[str]) -> List[Tuple[str, str, float]]:
+        """
+        Nearest other entity for each indexed entity, queried by point ID so
+        no vectors leave Qdrant. Returns (entity_id, neighbour_id, score)
+        pairs above the similarity threshold.
+        """
+        if not entity_ids:
+            return []
+
+        project_filter = models.Filter(
+            must=[models.FieldCondition(key="project_id", match=models.MatchValue(value=str(project_id)))]
+        )
+        responses = self.qdrant.query_batch_points(
+            collection_name=ENTITY_COLLECTION,
+            requests=[
+                models.QueryRequest(
+                    query=str(entity_id),  # query by point: uses its vector, excludes itself
+                    filter=project_filter,
+                    params=search_params(),
+                    limit=1,
+                    score_threshold=self.threshold,
+                    with_payload=True
+                )
+                for entity_id in entity_ids
+            ]
+        )
+
+        pairs = []
+        for entity_id, response in zip(entity_ids, responses):
+            if response.points:
+                hit = response.points[0]
+                pairs.append((str(entity_id), (hit.payload or {}).get("entity_id", str(hit.id)), hit.score))
+        return pairs
+
+    def upsert(self, project_id: str, entities: List[Entity], vectors: List[List[float]]) -> None:
+        """
+        Write name vectors for entities and point their embedding_ref at them.
+        """
+        if not entities:
+            return
+        self.qdrant.upsert(
+            collection_name=ENTITY_COLLECTION,
+            points=[
+                models.PointStruct(
+                    id=str(ent.id),
+                    vector=vector,
+                    payload={
+                        "entity_id": str(ent.id),
+                        "project_id": str(project_id),
+                        "name": ent.canonical_name,
+                        "type": ent.type,
+                    }
+                )
+                for ent, vector in zip(entities, vectors)
+            ]
+        )
+        for ent in entities:
+            ent.embedding_ref = str(ent.id)
+
+    def delete(self, entity_ids: Iterable[str]) -> None:
+        ids = [str(e) for e in entity_ids]
+        if ids:
+            self.qdrant.delete(
+                collection_name=ENTITY_COLLECTION,
+                points_selector=models.PointIdsList(points=ids)
+            )
+
+    def backfill(self, db: Session, project_id: Optional[uuid.UUID] = None) -> int:
+        """
+        Embed every entity that has no embedding_ref yet, in keyset pages.
+        Returns the number of entities indexed.
+        """
+        total = 0
+        last_id = None
+        while True:
+            stmt = select(Entity).where(Entity.embedding_ref.is_(None))
+            if project_id:
+                stmt = stmt.where(Entity.project_id == project_id)
+            if last_id:
+                stmt = stmt.where(Entity.id > last_id)
+            page = db.execute(stmt.order_by(Entity.id).limit(ENTITY_EMBED_BATCH)).scalars().all()
+            if not page:
+                break
+
+            vectors = self.embed([ent.canonical_name for ent in page])
+            by_project = {}
+            for ent, vector in zip(page, vectors):
+                by_project.setdefault(str(ent.project_id), []).append((ent, vector))
+            for pid, pairs in by_project.items():
+                self.upsert(pid, [p[0] for p in pairs], [p[1] for p in pairs])
+            db.commit()
+
+            total += len(page)
+            last_id = page[-1].id
+        return total
+
+
+_entity_index: Optional[EntityVectorIndex] = None
+
+
+def get_entity_index() -> Optional[EntityVectorIndex]:
+    """
+    Process-wide entity index, or None when ENTITY_VECTOR_MATCH is off.
+    """
+    global _entity_index
+    if not ENTITY_VECTOR_MATCH:
+        return None
+    if _entity_index is None:
+        _entity_index = EntityVectorIndex()
+    return _entity_index
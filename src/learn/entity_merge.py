@@ -0,0 +1,389 @@
+"""
+Offline compaction of duplicate entities (the nightly entity_merge job).
+
+With ENTITY_MERGE_MODE=report (the default) the job only logs the groups it
+would merge. Review them, then set ENTITY_MERGE_MODE=merge to apply. The
+same report is available from the command line:
+
+    python -m src.learn.entity_merge [--project ID ...] [--apply]
+"""
+import argparse
+import logging
+import os
+import re
+import time
+import uuid
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from src.db.models import Entity, Project
+from src.learn.entity_index import EntityVectorIndex, ENTITY_EMBED_BATCH
+from src.learn.assertion_store import backfill_fingerprints
+
+logger = logging.getLogger("EntityMerge")
+
+ENTITY_MERGE_MODE = os.getenv("ENTITY_MERGE_MODE", "report").lower()  # report | merge
+ENTITY_MERGE_NAME_SIMILARITY = float(os.getenv("ENTITY_MERGE_NAME_SIMILARITY", "0.92"))
+ENTITY_MERGE_WINDOW = int(os.getenv("ENTITY_MERGE_WINDOW", "20"))
+ENTITY_MERGE_SCAN_BATCH = int(os.getenv("ENTITY_MERGE_SCAN_BATCH", "2000"))
+ENTITY_MERGE_CHUNK_SIZE = int(os.getenv("ENTITY_MERGE_CHUNK_SIZE", "100"))
+ENTITY_MERGE_THROTTLE_SECONDS = float(os.getenv("ENTITY_MERGE_THROTTLE_SECONDS", "0.05"))
+MAX_RELATION_STRENGTH = 5.0
+
+# Merge key: case, whitespace and separators dropped, but "+", "#" and "."
+# kept, so C / C++ / C# and kubernetes-1.27 / kubernetes-127 stay apart.
+# _KEY_SQL is the same key computed by Postgres.
+_NON_KEY = re.compile(r"[^a-z0-9+#.]+")
+_KEY_SQL = "btrim(regexp_replace(regexp_replace(lower(btrim({col})), '^the ', ''), '[^a-z0-9+#.]+', '', 'g'), '.')"
+_NUMBER = re.compile(r"[0-9]+")
+
+
+def _normalize(name: str) -> str:
+    n = name.lower().strip()
+    if n.startswith("the "):
+        n = n[4:]
+    return n
+
+
+def _squash(name: str) -> str:
+    """Merge key of a name ("Postgre-SQL" -> "postgresql", "C++" -> "c++")."""
+    return _NON_KEY.sub("", _normalize(name)).strip(".")
+
+
+def _same_numbers(a: str, b: str) -> bool:
+    """
+    Whether two names carry the same digit runs. Names that differ in a
+    number or version (server-01 / server-02, 1.27 / 1.28) are never merged
+    on similarity alone.
+    """
+    return _NUMBER.findall(a) == _NUMBER.findall(b)
+
+
+def _similar(a: str, b: str) -> bool:
+    if not _same_numbers(a, b):
+        return False
+    matcher = SequenceMatcher(None, a, b)
+    return (matcher.quick_ratio() >= ENTITY_MERGE_NAME_SIMILARITY
+            and matcher.ratio() >= ENTITY_MERGE_NAME_SIMILARITY)
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, x: str) -> str:
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: str, b: str):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+class EntityMergeCompactor:
+    """
+    Offline compaction of duplicate entities.
+
+    Candidates are entities of the same type grouped by alias overlap,
+    near-identical names and (when a vector index is available)
+    name-embedding similarity. Each group is merged onto its oldest entity:
+    relations and assertion references are rewritten in bulk, colliding
+    edges are collapsed with their strengths summed, and the duplicate rows
+    are deleted.
+    """
+
+    def __init__(self, db: Session, vector_index: Optional[EntityVectorIndex] = None):
+        self.db = db
+        self.vector_index = vector_index
+
+    def find_candidates(self, project_id: uuid.UUID) -> List[Tuple[Entity, List[Entity]]]:
+        """
+        Returns (survivor, duplicates) groups for a project.
+
+        Exact key and alias collisions are grouped by Postgres. Spellings are
+        compared in one streamed pass over the project's names sorted by
+        (type, key), each against the ENTITY_MERGE_WINDOW names before it,
+        so the cost is linear in the project size and only the entities of
+        candidate groups are loaded.
+        """
+        groups = _DisjointSet()
+
+        # 1. Alias overlap / exact merge-key collisions, within a type
+        for ids in self._key_collisions(project_id):
+            for other in ids[1:]:
+                groups.union(str(ids[0]), str(other))
+
+        # 2. Near-identical spellings (sorted neighbourhood), and 3. embedding
+        # similarity via the entity name index, batched along the same scan
+        window: Deque[Tuple[str, str]] = deque(maxlen=ENTITY_MERGE_WINDOW)
+        window_type = None
+        indexed: Dict[str, Tuple[str, str]] = {}
+        for row in self._scan(project_id):
+            eid, key = str(row.id), _squash(row.canonical_name)
+            if row.type != window_type:
+                window.clear()
+                window_type = row.type
+            if len(key) >= 3:
+                for other_id, other_key in window:
+                    if _similar(key, other_key):
+                        groups.union(other_id, eid)
+                window.append((eid, key))
+            if self.vector_index and row.embedding_ref:
+                indexed[eid] = (row.type, key)
+                if len(indexed) >= ENTITY_EMBED_BATCH:
+                    self._union_embedding_pairs(project_id, indexed, groups)
+                    indexed = {}
+        if self.vector_index and indexed:
+            self._union_embedding_pairs(project_id, indexed, groups)
+
+        members: Dict[str, List[str]] = {}
+        for eid in list(groups.parent):
+            members.setdefault(groups.find(eid), []).append(eid)
+        grouped = [ids for ids in members.values() if len(ids) > 1]
+        if not grouped:
+            return []
+
+        by_id = {str(e.id): e for e in self._load([eid for ids in grouped for eid in ids])}
+        candidates = []
+        for ids in grouped:
+            group = [by_id[eid] for eid in ids if eid in by_id]
+            if len(group) < 2:
+                continue
+            group.sort(key=lambda e: (e.first_seen_at is None, e.first_seen_at, str(e.id)))
+            candidates.append((group[0], group[1:]))
+        return candidates
+
+    def _key_collisions(self, project_id: uuid.UUID) -> List[List[Any]]:
+        """
+        IDs of same-type entities sharing a merge key across their names and aliases.
+        """
+        name_key = _KEY_SQL.format(col="e.canonical_name")
+        alias_key = _KEY_SQL.format(col="a.term")
+        rows = self.db.execute(text(f"""
+            WITH terms AS (
+                SELECT e.id, e.type, {name_key} AS key
+                FROM entities e WHERE e.project_id = CAST(:pid AS uuid)
+                UNION
+                SELECT e.id, e.type, {alias_key} AS key
+                FROM entities e, jsonb_array_elements_text(COALESCE(e.aliases, '[]'::jsonb)) AS a(term)
+                WHERE e.project_id = CAST(:pid AS uuid)
+            )
+            SELECT array_agg(DISTINCT id) AS ids
+            FROM terms
+            WHERE key <> ''
+            GROUP BY type, key
+            HAVING count(DISTINCT id) > 1
+        """), {"pid": str(project_id)}).all()
+        return [list(r.ids) for r in rows]
+
+    def _scan(self, project_id: uuid.UUID) -> Iterable[Any]:
+        """
+        (id, type, canonical_name, embedding_ref) of every entity, streamed
+        in (type, merge key) order.
+        """
+        return self.db.execute(
+            select(Entity.id, Entity.type, Entity.canonical_name, Entity.embedding_ref)
+            .where(Entity.project_id == project_id)
+            .order_by(Entity.type, text(_KEY_SQL.format(col="entities.canonical_name")), Entity.id)
+            .execution_options(yield_per=ENTITY_MERGE_SCAN_BATCH)
+        )
+
+    def _union_embedding_pairs(self, project_id: uuid.UUID, batch: Dict[str, Tuple[str, str]],
+                               groups: _DisjointSet) -> None:
+        try:
+            pairs = self.vector_index.similar_pairs(str(project_id), list(batch))
+        except Exception as e:
+            logger.warning(f"Embedding similarity unavailable for project {project_id}: {e}")
+            return
+        others = {b for _, b, _ in pairs if b not in batch}
+        known = dict(batch)
+        if others:
+            for row in self.db.execute(
+                select(Entity.id, Entity.type, Entity.canonical_name)
+                .where(Entity.project_id == project_id, Entity.id.in_([uuid.UUID(o) for o in others]))
+            ).all():
+                known[str(row.id)] = (row.type, _squash(row.canonical_name))
+        for a, b, _ in pairs:
+            if a not in known or b not in known:
+                continue
+            (type_a, key_a), (type_b, key_b) = known[a], known[b]
+            if type_a == type_b and _same_numbers(key_a, key_b):
+                groups.union(a, b)
+
+    def _load(self, entity_ids: List[str]) -> List[Entity]:
+        entities: List[Entity] = []
+        for start in range(0, len(entity_ids), ENTITY_MERGE_SCAN_BATCH):
+            chunk = [uuid.UUID(e) for e in entity_ids[start:start + ENTITY_MERGE_SCAN_BATCH]]
+            entities.extend(self.db.execute(select(Entity).where(Entity.id.in_(chunk))).scalars().all())
+        return entities
+
+    def merge(self, project_id: uuid.UUID, survivor: Entity, duplicates: List[Entity]) -> None:
+        """
+        Fold duplicates into survivor. Does not commit.
+        """
+        loser_ids = [str(d.id) for d in duplicates]
+        params = {
+            "pid": str(project_id),
+            "survivor": str(survivor.id),
+            "losers": loser_ids,
+            "touched": loser_ids + [str(survivor.id)],
+            "max_strength": MAX_RELATION_STRENGTH,
+        }
+
+        # 1. Relations: remap endpoints, collapse collisions into one edge
+        # (strengths summed, counters added), drop survivor self-loops.
+        inserted = self.db.execute(text("""
+            WITH remapped AS (
+                SELECT
+                    id, relation_type, from_kind, to_kind, confidence, provenance,
+                    strength, access_count, last_accessed_at, decayed_at,
+                    CASE WHEN from_id = ANY(CAST(:losers AS uuid[])) THEN CAST(:survivor AS uuid) ELSE from_id END AS from_id,
+                    CASE WHEN to_id = ANY(CAST(:losers AS uuid[])) THEN CAST(:survivor AS uuid) ELSE to_id END AS to_id
+                FROM relations
+                WHERE project_id = CAST(:pid AS uuid)
+                  AND (from_id = ANY(CAST(:touched AS uuid[])) OR to_id = ANY(CAST(:touched AS uuid[])))
+            )
+            INSERT INTO relations (
+                id, project_id, from_id, from_kind, relation_type, to_id, to_kind,
+                confidence, provenance, strength, access_count, last_accessed_at, decayed_at
+            )
+            SELECT
+                gen_random_uuid(), CAST(:pid AS uuid), from_id,
+                (array_agg(from_kind ORDER BY strength DESC))[1],
+                relation_type, to_id,
+                (array_agg(to_kind ORDER BY strength DESC))[1],
+                max(confidence),
+                (array_agg(provenance ORDER BY strength DESC))[1],
+                LEAST(sum(strength), :max_strength),
+                sum(access_count),
+                max(last_accessed_at),
+                max(decayed_at)
+            FROM remapped
+            WHERE from_id <> to_id
+            GROUP BY from_id, to_id, relation_type
+            RETURNING id
+        """), params).scalars().all()
+
+        self.db.execute(text("""
+            DELETE FROM relations
+            WHERE project_id = CAST(:pid AS uuid)
+              AND (from_id = ANY(CAST(:touched AS uuid[])) OR to_id = ANY(CAST(:touched AS uuid[])))
+              AND NOT (id = ANY(CAST(:kept AS uuid[])))
+        """), {**params, "kept": [str(i) for i in inserted]})
+
+        # 2. Assertions: point subject/object references at the survivor.
+        # Their fingerprints change; they are recomputed per project once
+        # the chunk's merges are done (rows that now duplicate one keep NULL).
+        self.db.execute(text("""
+            UPDATE assertions SET subject_entity_id = CAST(:survivor AS uuid), fingerprint = NULL
+            WHERE subject_entity_id = ANY(CAST(:losers AS uuid[]))
+        """), params)
+        self.db.execute(text("""
+            UPDATE assertions SET object_entity_id = CAST(:survivor AS uuid), fingerprint = NULL
+            WHERE object_entity_id = ANY(CAST(:losers AS uuid[]))
+        """), params)
+
+        # 3. Survivor inherits names, aliases and the widest seen-window
+        aliases = list(survivor.aliases or [])
+        known = {a.lower() for a in aliases} | {survivor.canonical_name.lower()}
+        for dup in duplicates:
+            for term in [dup.canonical_name] + list(dup.aliases or []):
+                if term.lower() not in known:
+                    aliases.append(term)
+                    known.add(term.lower())
+        survivor.aliases = aliases
+        survivor.confidence = max([survivor.confidence or 0.0] + [d.confidence or 0.0 for d in duplicates])
+        seen = [e.first_seen_at for e in [survivor] + duplicates if e.first_seen_at]
+        if seen:
+            survivor.first_seen_at = min(seen)
+        seen = [e.last_seen_at for e in [survivor] + duplicates if e.last_seen_at]
+        if seen:
+            survivor.last_seen_at = max(seen)
+        self.db.add(survivor)
+
+        # 4. Remove the duplicates
+        self.db.execute(text("DELETE FROM entities WHERE id = ANY(CAST(:losers AS uuid[]))"), params)
+
+    def compact_project(self, project_id: uuid.UUID, chunk_size: Optional[int] = None,
+                        throttle_seconds: Optional[float] = None, dry_run: bool = False) -> int:
+        """
+        Merge every candidate group in a project, committing every
+        `chunk_size` groups. Returns the number of entities removed (or,
+        with dry_run, that would be removed; the groups are only logged).
+        """
+        chunk_size = chunk_size or ENTITY_MERGE_CHUNK_SIZE
+        throttle = ENTITY_MERGE_THROTTLE_SECONDS if throttle_seconds is None else throttle_seconds
+
+        candidates = self.find_candidates(project_id)
+        if dry_run:
+            for survivor, duplicates in candidates:
+                logger.info(f"Project {project_id}: would merge {[d.canonical_name for d in duplicates]} "
+                            f"into {survivor.canonical_name!r} ({survivor.type}).")
+            return sum(len(dups) for _, dups in candidates)
+
+        removed = 0
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            merged_ids = [str(d.id) for _, dups in chunk for d in dups]
+            try:
+                for survivor, duplicates in chunk:
+                    self.merge(project_id, survivor, duplicates)
+                backfill_fingerprints(self.db, project_id)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+            removed += len(merged_ids)
+            if self.vector_index:
+                try:
+                    self.vector_index.delete(merged_ids)
+                except Exception as e:
+                    logger.warning(f"Failed to drop {len(merged_ids)} merged entity vectors: {e}")
+
+            if throttle and start + chunk_size < len(candidates):
+                time.sleep(throttle)
+
+        if removed:
+            logger.info(f"Project {project_id}: merged {removed} duplicate entities into {len(candidates)} survivors.")
+        return removed
+
+    def run(self, project_id: Optional[uuid.UUID] = None, dry_run: bool = False) -> int:
+        """
+        Compact one project, or every project one at a time.
+        """
+        if project_id:
+            return self.compact_project(project_id, dry_run=dry_run)
+        project_ids = self.db.execute(select(Project.id).order_by(Project.id)).scalars().all()
+        return sum(self.compact_project(pid, dry_run=dry_run) for pid in project_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report (or merge) duplicate entities")
+    parser.add_argument("--project", action="append", default=[])
+    parser.add_argument("--apply", action="store_true", help="merge the groups instead of reporting them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from src.db.session import SessionLocal
+    from src.learn.entity_index import get_entity_index
+    db = SessionLocal()
+    try:
+        compactor = EntityMergeCompactor(db, vector_index=get_entity_index())
+        projects = [uuid.UUID(p) for p in args.project] or [None]
+        count = sum(compactor.run(pid, dry_run=not args.apply) for pid in projects)
+        print(f"{count} duplicate entities {'merged' if args.apply else 'would be merged'}.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
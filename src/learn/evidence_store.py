@@ -0,0 +1,128 @@
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.db.models import AssertionEvidence
+from src.db.pagination import encode_cursor, decode_cursor
+
+EVIDENCE_INSERT_BATCH = int(os.getenv("EVIDENCE_INSERT_BATCH", "1000"))
+EVIDENCE_PAGE_MAX = 500
+
+
+@dataclass
+class Evidence:
+    """
+    One piece of evidence for an assertion, before it is written.
+    """
+    episodic_id: Optional[str] = None
+    quote: Optional[str] = None
+    envelope_id: Optional[uuid.UUID] = None
+    proof: Optional[list] = None
+
+
+def insert_evidence(db: Session, rows: List[dict], batch_size: Optional[int] = None) -> None:
+    """
+    Append evidence rows (assertion_id, project_id, episodic_id, quote,
+    envelope_id, proof) with batched multi-row INSERTs. Evidence already recorded
+    for the same (assertion, episodic item) is skipped. Does not commit.
+    """
+    if not rows:
+        return
+    batch_size = batch_size or EVIDENCE_INSERT_BATCH
+    now = datetime.utcnow()
+    values = [{"id": uuid.uuid4(), "created_at": now, **row} for row in rows]
+    for start in range(0, len(values), batch_size):
+        stmt = insert(AssertionEvidence).values(values[start:start + batch_size])
+        db.execute(stmt.on_conflict_do_nothing())
+
+
+def list_evidence(db: Session, assertion_id, limit: int = 50,
+                  cursor: Optional[str] = None) -> Tuple[List[AssertionEvidence], Optional[str]]:
+    """
+    One page of an assertion's evidence, oldest first, by keyset on
+    (created_at, id). Returns the rows and the cursor of the next page
+    (None on the last page).
+    """
+    limit = max(1, min(limit, EVIDENCE_PAGE_MAX))
+    stmt = select(AssertionEvidence).where(AssertionEvidence.assertion_id == assertion_id)
+    if cursor:
+        stmt = stmt.where(
+            tuple_(AssertionEvidence.created_at, AssertionEvidence.id) > tuple_(*decode_cursor(cursor))
+        )
+    stmt = stmt.order_by(AssertionEvidence.created_at, AssertionEvidence.id).limit(limit + 1)
+    rows = list(db.execute(stmt).scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def evidence_counts(db: Session, assertion_ids: List) -> Dict[str, int]:
+    """
+    Evidence count per assertion, for a page of assertions.
+    """
+    if not assertion_ids:
+        return {}
+    rows = db.execute(
+        select(AssertionEvidence.assertion_id, func.count())
+        .where(AssertionEvidence.assertion_id.in_(assertion_ids))
+        .group_by(AssertionEvidence.assertion_id)
+    ).all()
+    return {str(aid): count for aid, count in rows}
+
+
+def evidence_links(db: Session, assertion_ids: List, per_assertion: int = 20) -> List[Tuple[str, str]]:
+    """
+    (assertion_id, episodic_id) pairs for a set of assertions, at most
+    `per_assertion` (the oldest) each.
+    """
+    if not assertion_ids:
+        return []
+    rows = db.execute(text("""
+        SELECT assertion_id, episodic_id
+        FROM (
+            SELECT assertion_id, episodic_id,
+                   row_number() OVER (PARTITION BY assertion_id ORDER BY created_at, id) AS n
+            FROM assertion_evidence
+            WHERE assertion_id = ANY(CAST(:ids AS uuid[])) AND episodic_id IS NOT NULL
+        ) e
+        WHERE n <= :per_assertion
+    """), {"ids": [str(i) for i in assertion_ids], "per_assertion": per_assertion}).all()
+    return [(str(aid), str(eid)) for aid, eid in rows]
+
+
+_UUID_RE = "^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+
+# Move evidence entries ({episodic_id, quote}) out of assertions.provenance
+# into assertion_evidence, then drop the moved entries from the JSONB.
+# Entries that did not move (e.g. a non-UUID episodic_id) and proof
+# envelopes stay inline.
+MOVE_INLINE_EVIDENCE_SQL = f"""
+    INSERT INTO assertion_evidence (id, assertion_id, project_id, episodic_id, quote, created_at)
+    SELECT gen_random_uuid(), a.id, a.project_id, CAST(e ->> 'episodic_id' AS uuid), e ->> 'quote',
+           COALESCE(a.first_seen_at, now())
+    FROM assertions a, jsonb_array_elements(a.provenance) AS e
+    WHERE jsonb_typeof(a.provenance) = 'array'
+      AND a.provenance @? '$[*].episodic_id'
+      AND (e ->> 'episodic_id') ~ '{_UUID_RE}'
+    ON CONFLICT DO NOTHING
+"""
+STRIP_INLINE_EVIDENCE_SQL = """
+    UPDATE assertions a
+    SET provenance = COALESCE((
+        SELECT jsonb_agg(e ORDER BY n)
+        FROM jsonb_array_elements(a.provenance) WITH ORDINALITY AS t(e, n)
+        WHERE NOT (e ? 'episodic_id' AND EXISTS (
+            SELECT 1 FROM assertion_evidence x
+            WHERE x.assertion_id = a.id AND CAST(x.episodic_id AS text) = lower(e ->> 'episodic_id')
+        ))
+    ), '[]'::jsonb)
+    WHERE jsonb_typeof(a.provenance) = 'array'
+      AND a.provenance @? '$[*].episodic_id'
+"""
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Iterable
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.db.models import Assertion
+from src.db.qdrant import ASSERTION_COLLECTION, search_params
+
+logger = logging.getLogger("AssertionIndex")
+
+# Only reviewed / auto-approved facts are recallable by vector search
+INDEXABLE_STATUSES = ("approved", "active")
+ASSERTION_EMBED_BATCH = int(os.getenv("ASSERTION_EMBED_BATCH", "256"))
+
+
+def assertion_text(subject: Optional[str], predicate: str, obj: Optional[str]) -> str:
+    return f"{subject or 'User'} {predicate} {obj or '?'}"
+
+
+class AssertionIndexer:
+    """
+    Keeps the semantic_assertions collection in sync with Assertion status.
+
+    One point per assertion (point ID == assertion ID). Approved/active
+    assertions are embedded in batches and upserted; any other status removes
+    the point, so rejections and supersessions drop out of recall.
+    """
+
+    def __init__(self, db: Session, qdrant: QdrantClient, embedding_model=None):
+        self.db = db
+        self.qdrant = qdrant
+        self._embedding_model = embedding_model
+
+    @property
+    def embedding_model(self):
+        if self._embedding_model is None:
+            self._embedding_model = get_assertion_embedding_model()
+        return self._embedding_model
+
+    def sync(self, assertion_ids: Iterable[uuid.UUID]) -> int:
+        """
+        Upsert or delete the points for the given assertions according to
+        their current status. Returns the number of points upserted.
+        """
+        ids = [uuid.UUID(str(a)) for a in assertion_ids]
+        if not ids:
+            return 0
+
+        rows = self.db.execute(
+            select(
+                Assertion.id, Assertion.project_id, Assertion.subject_text,
+                Assertion.predicate, Assertion.object_text, Assertion.status,
+                Assertion.confidence
+            ).where(Assertion.id.in_(ids))
+        ).all()
+
+        indexable = [r for r in rows if r.status in INDEXABLE_STATUSES]
+        stale = [str(r.id) for r in rows if r.status not in INDEXABLE_STATUSES]
+
+        for start in range(0, len(indexable), ASSERTION_EMBED_BATCH):
+            self._upsert(indexable[start:start + ASSERTION_EMBED_BATCH])
+
+        if stale:
+            self.qdrant.delete(
+                collection_name=ASSERTION_COLLECTION,
+                points_selector=models.PointIdsList(points=stale)
+            )
+
+        return len(indexable)
+
+    def backfill(self, project_id: Optional[uuid.UUID] = None) -> int:
+        """
+        Index every approved/active assertion, walking the table in keyset
+        pages. Used to populate the collection for pre-existing data.
+        """
+        total = 0
+        last_id = None
+        while True:
+            stmt = select(Assertion.id).where(Assertion.status.in_(INDEXABLE_STATUSES))
+            if project_id:
+                stmt = stmt.where(Assertion.project_id == project_id)
+            if last_id:
+                stmt = stmt.where(Assertion.id > last_id)
+            page = self.db.execute(stmt.order_by(Assertion.id).limit(ASSERTION_EMBED_BATCH)).scalars().all()
+            if not page:
+                break
+            total += self.sync(page)
+            last_id = page[-1]
+        return total
+
+    def _upsert(self, rows) -> None:
+        texts = [assertion_text(r.subject_text, r.predicate, r.object_text) for r in rows]
+        vectors = self.embedding_model.embed(texts)
+        self.qdrant.upsert(
+            collection_name=ASSERTION_COLLECTION,
+            points=[
+                models.PointStruct(
+                    id=str(r.id),
+                    vector=vector.tolist(),
+                    payload={
+                        "assertion_id": str(r.id),
+                        "project_id": str(r.project_id),
+                        "text": text,
+                        "status": r.status,
+                        "confidence": r.confidence,
+                    }
+                )
+                for r, text, vector in zip(rows, texts, vectors)
+            ]
+        )
+
+
+def search_assertions(qdrant: QdrantClient, project_id: str, query_vector: List[float], limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Nearest approved/active assertions for a query vector, as recall hits.
+    """
+    results = qdrant.search(
+        collection_name=ASSERTION_COLLECTION,
+        query_vector=query_vector,
+        query_filter=models.Filter(
+            must=[models.FieldCondition(key="project_id", match=models.MatchValue(value=project_id))]
+        ),
+        search_params=search_params(),
+        limit=limit,
+        with_payload=True
+    )
+    return [
+        {
+            "id": (hit.payload or {}).get("assertion_id", str(hit.id)),
+            "text": (hit.payload or {}).get("text", ""),
+            "score": round(hit.score, 3),
+            "kind": "assertion",
+        }
+        for hit in results or []
+    ]
+
+
+_shared_lock = threading.Lock()
+_embedding_model = None
+_qdrant: Optional[QdrantClient] = None
+
+
+def get_assertion_embedding_model():
+    """
+    Process-wide assertion embedding model (loaded once, not per sync).
+    """
+    global _embedding_model
+    with _shared_lock:
+        if _embedding_model is None:
+            from fastembed import TextEmbedding
+            _embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
+        return _embedding_model
+
+
+def _shared_qdrant() -> QdrantClient:
+    global _qdrant
+    with _shared_lock:
+        if _qdrant is None:
+            from src.db.session import QDRANT_URL, QDRANT_API_KEY
+            _qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+        return _qdrant
+
+
+def sync_assertion_vectors(assertion_ids: List[str]):
+    """
+    Background task: sync assertion points using its own DB session and the
+    process-wide Qdrant client and embedding model (safe to hand to
+    BackgroundTasks or a worker thread).
+    """
+    if not assertion_ids:
+        return
+
+    from src.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = AssertionIndexer(db, _shared_qdrant()).sync(assertion_ids)
+        logger.info(f"Synced {len(assertion_ids)} assertion vectors ({count} indexed).")
+    except Exception as e:
+        logger.error(f"Assertion vector sync failed: {e}")
+    finally:
+        db.close()
+
+
+def reindex_assertion_vectors(job_id: str, project_id: Optional[uuid.UUID] = None):
+    """
+    Background task: backfill semantic_assertions for one project (or all),
+    reported in the admin job log under job_id.
+    """
+    from src.db.session import SessionLocal
+    from src.engine.scheduler import _log_job
+
+    name = f"Assertion Reindex {project_id or 'all projects'}"
+    started = datetime.now(timezone.utc)
+    _log_job(job_id, name, "running", started)
+    db = SessionLocal()
+    try:
+        indexed = AssertionIndexer(db, _shared_qdrant()).backfill(project_id)
+        finished = datetime.now(timezone.utc)
+        _log_job(job_id, name, "success", started, finished, int((finished - started).total_seconds() * 1000))
+        logger.info(f"Reindexed {indexed} assertion vectors ({project_id or 'all projects'}).")
+    except Exception as e:
+        finished = datetime.now(timezone.utc)
+        _log_job(job_id, name, "error", started, finished, int((finished - started).total_seconds() * 1000), str(e))
+        logger.error(f"Assertion reindex failed: {e}")
+    finally:
+        db.close()
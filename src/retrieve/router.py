@@ -1,6 +1,7 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
+import logging
+from typing import List, Dict, Any, Optional, Tuple
 from openai import AsyncOpenAI
 from qdrant_client import QdrantClient
 from sqlalchemy.orm import Session
@@ -14,6 +15,44 @@ API_KEY = os.getenv("LLM_API_KEY", "sk-placeholder")
 
 client = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL)
 
+# Recall strategy: "vector" (Qdrant only), "lexical" (Postgres full-text only)
+# or "hybrid" (both, fused with reciprocal-rank fusion).
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+if RETRIEVAL_MODE not in RETRIEVAL_MODES:
+    logging.getLogger("MemoryRouter").warning(
+        f"Unknown RETRIEVAL_MODE={RETRIEVAL_MODE!r} (expected one of {', '.join(RETRIEVAL_MODES)}); using 'hybrid'."
+    )
+    RETRIEVAL_MODE = "hybrid"
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+def resolve_retrieval_mode(retrieval_mode: Optional[str]) -> str:
+    """
+    Per-request mode, or RETRIEVAL_MODE when unset. Raises ValueError for an
+    unknown mode instead of silently falling back to vector recall.
+    """
+    if not retrieval_mode:
+        return RETRIEVAL_MODE
+    mode = retrieval_mode.lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval_mode {retrieval_mode!r}; expected one of {', '.join(RETRIEVAL_MODES)}")
+    return mode
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Dict[str, Any]]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Fuse several ranked hit lists into one: score(d) = sum(1 / (k + rank_i(d))).
+    Hits are matched on their "id"; the first occurrence supplies the payload.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for hits in ranked_lists:
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.setdefault(hit["id"], {**hit, "rrf_score": 0.0})
+            entry["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda h: h["rrf_score"], reverse=True)
+
+
 ROUTER_PROMPT = """
 You are a Memory Router. Your job is to classify the user's query and decide the best retrieval strategy.
 
@@ -35,11 +74,13 @@ class MemoryRouter:
     def __init__(self, db: Session, qdrant: QdrantClient):
         self.db = db
         self.qdrant = qdrant
+        self._query_vectors: Dict[str, List[float]] = {}
 
-    async def route_and_retrieve(self, project_id: str, query: str, skip_llm: bool = False, llm_config: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    async def route_and_retrieve(self, project_id: str, query: str, skip_llm: bool = False, llm_config: Optional[Dict[str, str]] = None, retrieval_mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Main entry point: Classification -> Retrieval -> Synthesis
         """
+        mode = resolve_retrieval_mode(retrieval_mode)
         # 1. Classify Intent
         # If skip_llm is True, we might still need classification, or we could force "recall" if we want to be purely deterministic.
         # But let's keep classification to show the "Traffic Control" decision.
@@ -52,13 +93,13 @@ class MemoryRouter:
         confidence_score = 0.0
 
         if strategy == "recall":
-            context, sources, max_score = await self._vector_search(project_id, query)
+            context, sources, max_score = await self._recall(project_id, query, keywords, mode)
             confidence_score = max_score
         
         elif strategy == "research":
             # Graph + Vector
             graph_context, graph_sources, graph_conf = self._graph_traversal(project_id, keywords)
-            vec_context, vec_sources, vec_conf = await self._vector_search(project_id, query)
+            vec_context, vec_sources, vec_conf = await self._recall(project_id, query, keywords, mode)
             
             context = f"GRAPH KNOWLEDGE:\n{graph_context}\n\nVECTOR MEMORY:\n{vec_context}"
             sources = graph_sources + vec_sources
@@ -130,57 +171,193 @@ class MemoryRouter:
         except:
             return {"strategy": "recall", "keywords": []}
 
-    async def _vector_search(self, project_id: str, query: str):
+    async def _recall(self, project_id: str, query: str, keywords: List[str], mode: str):
         """
-        Real vector search: embed the query with fastembed, then search Qdrant
-        for the top-10 nearest episodic items in this project.
+        Dispatch the recall stage to the configured retrieval strategy.
+        """
+        if mode == "lexical":
+            return self._lexical_search(project_id, query, keywords)
+        if mode == "hybrid":
+            return await self._hybrid_search(project_id, query, keywords)
+        return await self._vector_search(project_id, query)
+
+    async def _vector_hits(self, project_id: str, query: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Embed the query with fastembed and search Qdrant for the nearest
+        episodic items in this project. Returns (hits, error_message).
         """
         if self.qdrant is None:
-            return "Vector search unavailable (no Qdrant client).", [], 0.0
+            return [], "Vector search unavailable (no Qdrant client)."
 
-        try:
-            from fastembed import TextEmbedding
-            embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
-            query_vectors = list(embedding_model.embed([query]))
-            if not query_vectors:
-                return "Could not embed query.", [], 0.0
-            query_vector = query_vectors[0].tolist()
-        except Exception as e:
-            return f"Embedding error: {e}", [], 0.0
+        query_vector, error = self._embed_query(query)
+        if error:
+            return [], error
 
         try:
             from qdrant_client.models import Filter, FieldCondition, MatchValue
             search_filter = Filter(
                 must=[FieldCondition(key="project_id", match=MatchValue(value=project_id))]
             )
+            # Long items are stored as several chunk points; oversample so
+            # that collapsing chunks back to items still yields `limit` items.
+            from src.db.qdrant import episodic_collection, search_params
             results = self.qdrant.search(
-                collection_name="episodic_chunks",
+                collection_name=episodic_collection(project_id),
                 query_vector=query_vector,
                 query_filter=search_filter,
-                limit=10,
+                search_params=search_params(),
+                limit=limit * 3,
                 with_payload=True
             )
         except Exception as e:
             # Collection may not exist yet or Qdrant unavailable
-            return f"Qdrant search error: {e}", [], 0.0
+            return [], f"Qdrant search error: {e}"
 
-        if not results:
-            return "No relevant memories found.", [], 0.0
-
-        context_parts = []
-        source_ids = []
-        max_score = 0.0
-        for hit in results:
+        # Collapse chunk hits to items, keeping each item's best-scoring chunk
+        hits: Dict[str, Dict[str, Any]] = {}
+        for hit in results or []:
             payload = hit.payload or {}
-            text = payload.get("text", "")
             item_id = payload.get("item_id", str(hit.id))
             score = round(hit.score, 3)
-            max_score = max(max_score, score)
-            context_parts.append(f"[score={score}] {text}")
-            source_ids.append(item_id)
+            if item_id not in hits or score > hits[item_id]["score"]:
+                hits[item_id] = {"id": item_id, "text": payload.get("text", ""), "score": score}
+        ranked = sorted(hits.values(), key=lambda h: h["score"], reverse=True)
+        return ranked[:limit], None
+
+    def _embed_query(self, query: str) -> Tuple[Optional[List[float]], Optional[str]]:
+        """
+        Embed the query once per router and reuse it across the episodic and
+        assertion vector stages. Returns (vector, error_message).
+        """
+        if query in self._query_vectors:
+            return self._query_vectors[query], None
+        try:
+            from fastembed import TextEmbedding
+            embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
+            query_vectors = list(embedding_model.embed([query]))
+            if not query_vectors:
+                return None, "Could not embed query."
+            self._query_vectors[query] = query_vectors[0].tolist()
+            return self._query_vectors[query], None
+        except Exception as e:
+            return None, f"Embedding error: {e}"
 
+    async def _assertion_hits(self, project_id: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Vector recall over condensed facts in semantic_assertions. Assertions
+        are much shorter than episodic text, so they are cheap to search and
+        cheap to hand to synthesis.
+        """
+        if self.qdrant is None:
+            return []
+        query_vector, error = self._embed_query(query)
+        if error:
+            return []
+        try:
+            from src.retrieve.assertion_index import search_assertions
+            return search_assertions(self.qdrant, project_id, query_vector, limit=limit)
+        except Exception as e:
+            print(f"Assertion vector search failed: {e}")
+            return []
+
+    async def _vector_search(self, project_id: str, query: str):
+        """
+        Real vector search: embed the query with fastembed, then search Qdrant
+        for the top-10 nearest episodic items and condensed assertions in
+        this project. Both are cosine scores from the same model, so they
+        are merged by score.
+        """
+        episodic_hits, error = await self._vector_hits(project_id, query)
+        assertion_hits = await self._assertion_hits(project_id, query)
+        hits = sorted(episodic_hits + assertion_hits, key=lambda h: h["score"], reverse=True)
+        if not hits:
+            return error or "No relevant memories found.", [], 0.0
+
+        context_parts = [f"[score={h['score']}] {h['text']}" for h in hits]
+        source_ids = [h["id"] for h in hits]
+        max_score = max(h["score"] for h in hits)
         return "\n\n".join(context_parts), source_ids, max_score
 
+    def _lexical_hits(self, project_id: str, query: str, keywords: List[str], limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Full-text search over episodic text and approved/active assertions.
+
+        Uses the 'simple' text search configuration (no stemming, no stop
+        words) so exact identifiers such as version strings, ticket IDs and
+        hostnames survive tokenization. Terms are OR-ed together and ranked
+        with ts_rank_cd, backed by the GIN expression indexes created in
+        _apply_migrations().
+        """
+        terms = " ".join([query] + [k for k in keywords if k])
+        params = {"project_id": project_id, "terms": terms, "limit": limit}
+        tsquery_cte = """
+            WITH q AS (
+                SELECT CAST(replace(CAST(plainto_tsquery('simple', :terms) AS text), '&', '|') AS tsquery) AS query
+            )
+        """
+        try:
+            episodic = self.db.execute(
+                text(tsquery_cte + """
+                    SELECT e.id, e.text, ts_rank_cd(to_tsvector('simple', e.text), q.query, 32) AS score
+                    FROM episodic_items e, q
+                    WHERE e.project_id = CAST(:project_id AS uuid)
+                      AND to_tsvector('simple', e.text) @@ q.query
+                    ORDER BY score DESC
+                    LIMIT :limit
+                """),
+                params
+            ).all()
+            assertions = self.db.execute(
+                text(tsquery_cte + """
+                    SELECT a.id,
+                           coalesce(a.subject_text, '') || ' ' || a.predicate || ' ' || coalesce(a.object_text, '') AS text,
+                           ts_rank_cd(to_tsvector('simple', coalesce(a.subject_text, '') || ' ' || a.predicate || ' ' || coalesce(a.object_text, '')), q.query, 32) AS score
+                    FROM assertions a, q
+                    WHERE a.project_id = CAST(:project_id AS uuid)
+                      AND a.status IN ('approved', 'active')
+                      AND to_tsvector('simple', coalesce(a.subject_text, '') || ' ' || a.predicate || ' ' || coalesce(a.object_text, '')) @@ q.query
+                    ORDER BY score DESC
+                    LIMIT :limit
+                """),
+                params
+            ).all()
+        except Exception as e:
+            print(f"Lexical search failed: {e}")
+            self.db.rollback()
+            return []
+
+        hits = [
+            {"id": str(row.id), "text": row.text, "score": round(float(row.score), 3)}
+            for row in list(episodic) + list(assertions)
+        ]
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:limit]
+
+    def _lexical_search(self, project_id: str, query: str, keywords: List[str]):
+        hits = self._lexical_hits(project_id, query, keywords)
+        if not hits:
+            return "No relevant memories found.", [], 0.0
+
+        context_parts = [f"[lex={h['score']}] {h['text']}" for h in hits]
+        return "\n\n".join(context_parts), [h["id"] for h in hits], max(h["score"] for h in hits)
+
+    async def _hybrid_search(self, project_id: str, query: str, keywords: List[str], limit: int = 10):
+        """
+        Vector + lexical recall fused with reciprocal-rank fusion.
+        Confidence stays on the cosine scale (max vector score) so the
+        CONFIDENCE_THRESHOLD traffic-control rule keeps its meaning.
+        """
+        vec_hits, error = await self._vector_hits(project_id, query, limit=limit)
+        assertion_hits = await self._assertion_hits(project_id, query, limit=limit)
+        lex_hits = self._lexical_hits(project_id, query, keywords, limit=limit)
+
+        fused = reciprocal_rank_fusion([vec_hits, assertion_hits, lex_hits])[:limit]
+        if not fused:
+            return error or "No relevant memories found.", [], 0.0
+
+        context_parts = [f"[rrf={h['rrf_score']:.4f}] {h['text']}" for h in fused]
+        max_score = max([h["score"] for h in vec_hits + assertion_hits], default=0.0)
+        return "\n\n".join(context_parts), [h["id"] for h in fused], max_score
 
     def _graph_traversal(self, project_id: str, keywords: List[str]):
         """
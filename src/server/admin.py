@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File
 from fastapi.security import APIKeyHeader, HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from typing import List, Dict, Any, Optional
@@ -11,6 +12,8 @@ import os
 
 from src.db.session import get_db
 from src.db.models import Project, EpisodicItem, Assertion, Entity, Relation, ApiKey, DataSource
+from src.learn.evidence_store import evidence_links
+from src.db.pagination import keyset_page, estimated_count
 
 router = APIRouter()
 
@@ -193,19 +196,27 @@ def trigger_source(source_id: str, db: Session = Depends(get_db)):
 
 # --- Memory Management ---
 @router.get("/memories")
-def get_memories(limit: int = 100, db: Session = Depends(get_db)):
+def get_memories(limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
     # Map EpisodicItem -> Memory view
-    memories = db.query(EpisodicItem).order_by(EpisodicItem.created_at.desc()).limit(limit).all()
-    return [
-        {
-            "id": str(m.id),
-            "content": m.text, # Mapping text -> content
-            "project_id": str(m.project_id),
-            "created_at": m.created_at.isoformat(),
-            "type": m.source
-        }
-        for m in memories
-    ]
+    stmt = select(EpisodicItem)
+    try:
+        memories, next_cursor = keyset_page(db, stmt, EpisodicItem.created_at, EpisodicItem.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "memories": [
+            {
+                "id": str(m.id),
+                "content": m.text, # Mapping text -> content
+                "project_id": str(m.project_id),
+                "created_at": m.created_at.isoformat(),
+                "type": m.source
+            }
+            for m in memories
+        ],
+        "next_cursor": next_cursor,
+        "estimated_total": estimated_count(db, stmt)
+    }
 
 @router.delete("/memories/{memory_id}")
 def delete_memory(memory_id: str, db: Session = Depends(get_db), qdrant: QdrantClient = Depends(get_qdrant)):
@@ -213,14 +224,16 @@ def delete_memory(memory_id: str, db: Session = Depends(get_db), qdrant: QdrantC
         mid = uuid.UUID(memory_id)
         mem = db.query(EpisodicItem).filter(EpisodicItem.id == mid).first()
         if mem:
+            project_id = str(mem.project_id)
             # Delete from Postgres
             db.delete(mem)
             db.commit()
             
-            # Delete from Qdrant
+            # Delete from Qdrant (every chunk point of the item)
             try:
+                from src.db.qdrant import episodic_collection
                 qdrant.delete(
-                    collection_name="episodic_chunks",
+                    collection_name=episodic_collection(project_id),
                     points_selector=models.Filter(
                         must=[
                             models.FieldCondition(
@@ -291,6 +304,16 @@ def get_vectors(visual_multiplier: float = 1.0, db: Session = Depends(get_db)):
         
     # 4. Fetch Learnings (Assertions)
     assertions = db.query(Assertion).limit(100).all()
+
+    # Evidence Links (Assertion -> Episodic), a bounded sample per assertion
+    for aid, eid in evidence_links(db, [a.id for a in assertions]):
+        links.append({
+            "source": aid,
+            "target": eid,
+            "value": 0.5, # Weaker link for evidence
+            "type": "evidence"
+        })
+
     for a in assertions:
         nodes.append({
             "id": str(a.id),
@@ -301,18 +324,6 @@ def get_vectors(visual_multiplier: float = 1.0, db: Session = Depends(get_db)):
             "provenance": a.provenance
         })
         
-        # Evidence Links (Assertion -> Episodic)
-        if a.provenance:
-            for prov in a.provenance:
-                eid = prov.get('episodic_id')
-                if eid:
-                    links.append({
-                        "source": str(a.id),
-                        "target": str(eid),
-                        "value": 0.5, # Weaker link for evidence
-                        "type": "evidence"
-                    })
-        
         # Semantic Links (Assertion -> Entities)
         if a.subject_entity_id:
             links.append({
@@ -336,6 +347,7 @@ class PlaygroundRequest(BaseModel):
     query: str
     skip_llm: bool = True
     llm_config: Optional[Dict[str, str]] = None
+    retrieval_mode: Optional[str] = None
 
 @router.post("/playground/retrieve")
 async def playground_retrieve(
@@ -344,47 +356,103 @@ async def playground_retrieve(
     qdrant: QdrantClient = Depends(get_qdrant)
 ):
     """Test the MemoryRouter with a real Qdrant client for vector search."""
-    from src.retrieve.router import MemoryRouter
+    from src.retrieve.router import MemoryRouter, resolve_retrieval_mode
+    try:
+        mode = resolve_retrieval_mode(req.retrieval_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     mr = MemoryRouter(db, qdrant)
     result = await mr.route_and_retrieve(
         req.project_id,
         req.query,
         skip_llm=req.skip_llm,
-        llm_config=req.llm_config
+        llm_config=req.llm_config,
+        retrieval_mode=mode
     )
     return result
 
 
+def _optional_project_id(project_id: Optional[str]) -> Optional[uuid.UUID]:
+    if not project_id:
+        return None
+    try:
+        return uuid.UUID(project_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid project ID")
+
+
+@router.post("/assertions/reindex", status_code=status.HTTP_202_ACCEPTED)
+def reindex_assertions(background_tasks: BackgroundTasks, project_id: Optional[str] = None):
+    """
+    Backfill semantic_assertions with every approved/active assertion, in
+    the background. Progress is reported in GET /jobs under the returned job_id.
+    """
+    from src.retrieve.assertion_index import reindex_assertion_vectors
+    pid = _optional_project_id(project_id)
+    job_id = f"assertion_reindex:{uuid.uuid4()}"
+    background_tasks.add_task(reindex_assertion_vectors, job_id, pid)
+    return {"status": "accepted", "job_id": job_id}
+
+
+@router.post("/entities/reindex")
+def reindex_entities(
+    project_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+    qdrant: QdrantClient = Depends(get_qdrant)
+):
+    """Embed entities that have no embedding_ref yet into entity_names."""
+    from src.learn.entity_index import EntityVectorIndex
+    pid = _optional_project_id(project_id)
+    indexed = EntityVectorIndex(qdrant).backfill(db, pid)
+    return {"status": "reindexed", "indexed": indexed}
+
+
 @router.get("/entities")
-def get_entities(limit: int = 200, db: Session = Depends(get_db)):
-    """List all canonical entities extracted by NER/LLM."""
-    entities = db.query(Entity).order_by(Entity.first_seen_at.desc()).limit(limit).all()
-    return [
-        {
-            "id": str(e.id),
-            "canonical_name": e.canonical_name,
-            "type": e.type,
-            "aliases": e.aliases or [],
-            "project_id": str(e.project_id),
-            "created_at": e.first_seen_at.isoformat() if e.first_seen_at else None,
-        }
-        for e in entities
-    ]
+def get_entities(limit: int = 200, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """List all canonical entities extracted by NER/LLM, newest first."""
+    stmt = select(Entity)
+    try:
+        entities, next_cursor = keyset_page(db, stmt, Entity.first_seen_at, Entity.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "entities": [
+            {
+                "id": str(e.id),
+                "canonical_name": e.canonical_name,
+                "type": e.type,
+                "aliases": e.aliases or [],
+                "project_id": str(e.project_id),
+                "created_at": e.first_seen_at.isoformat() if e.first_seen_at else None,
+            }
+            for e in entities
+        ],
+        "next_cursor": next_cursor,
+        "estimated_total": estimated_count(db, stmt)
+    }
 
 @router.get("/learnings")
-def get_learnings(limit: int = 100, db: Session = Depends(get_db)):
+def get_learnings(limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
     # Map Assertion -> Learning view
-    assertions = db.query(Assertion).order_by(Assertion.last_seen_at.desc()).limit(limit).all()
-    return [
-        {
-            "id": str(a.id),
-            "statement": f"{a.subject_text or 'User'} {a.predicate} {a.object_text or '?'}",
-            "confidence": a.confidence,
-            "status": a.status,
-            "created_at": a.first_seen_at.isoformat()
-        }
-        for a in assertions
-    ]
+    stmt = select(Assertion)
+    try:
+        assertions, next_cursor = keyset_page(db, stmt, Assertion.first_seen_at, Assertion.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "learnings": [
+            {
+                "id": str(a.id),
+                "statement": f"{a.subject_text or 'User'} {a.predicate} {a.object_text or '?'}",
+                "confidence": a.confidence,
+                "status": a.status,
+                "created_at": a.first_seen_at.isoformat()
+            }
+            for a in assertions
+        ],
+        "next_cursor": next_cursor,
+        "estimated_total": estimated_count(db, stmt)
+    }
 
 # --- File Upload ---
 @router.post("/upload")
@@ -0,0 +1,149 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from qdrant_client import QdrantClient
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+
+from src.db.session import get_db, get_qdrant
+from src.server.admin import get_api_key
+from src.db.models import ApiKey
+from src.agents.ingress import IngressAgent
+from src.db.schemas import EpisodicItemCreate
+from src.engine.work_queue import enqueue_condensation
+
+logger = logging.getLogger("EpisodicAPI")
+router = APIRouter(prefix="/api/v1/episodic", tags=["episodic"])
+
+# Records stored (one insert, one embed call, one Qdrant upsert) per chunk
+EPISODIC_BULK_CHUNK = int(os.getenv("EPISODIC_BULK_CHUNK", "256"))
+
+
+def _validate(data: Any, project_id: str) -> EpisodicItemCreate:
+    if not isinstance(data, dict):
+        raise ValueError("record must be a JSON object")
+    data.setdefault("project_id", project_id)
+    record = EpisodicItemCreate(**data)
+    if record.project_id != project_id:
+        raise ValueError("project_id does not match the API key's project")
+    return record
+
+
+def _parse_record(line: bytes, project_id: str) -> EpisodicItemCreate:
+    return _validate(json.loads(line), project_id)
+
+
+async def _ndjson_lines(request: Request):
+    """
+    Yield (line_number, line) for each non-empty line of a streamed body,
+    without buffering the whole upload.
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+@router.post("")
+def create_episodic_item(
+    item: Dict[str, Any],
+    db: Session = Depends(get_db),
+    api_key: ApiKey = Depends(get_api_key),
+    qdrant_client: QdrantClient = Depends(get_qdrant)
+):
+    """
+    Store a single episodic item and queue it for condensation.
+    """
+    try:
+        record = _validate(item, str(api_key.project_id))
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # The item and its queue row commit together: a failure stores neither,
+    # so the client can retry without creating a duplicate
+    agent = IngressAgent(db, qdrant_client)
+    try:
+        new_item = agent.process_memory(record, commit=False)
+        enqueue_condensation(db, api_key.project_id, [new_item.id], commit=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        agent.discard_pending()
+        raise
+    agent.index_pending()
+    return {"id": str(new_item.id)}
+
+
+@router.post("/bulk")
+async def bulk_create_episodic_items(
+    request: Request,
+    db: Session = Depends(get_db),
+    api_key: ApiKey = Depends(get_api_key),
+    qdrant_client: QdrantClient = Depends(get_qdrant)
+):
+    """
+    Bulk ingestion from a streamed NDJSON body, one EpisodicItemCreate per
+    line (project_id defaults to the API key's project).
+
+    Records are validated as they arrive and stored in chunks of
+    EPISODIC_BULK_CHUNK. Returns `ids` in line order (null for blank or
+    rejected lines) and `errors` with the line number and reason of each rejection.
+
+    Each chunk's items and condensation queue rows commit in one transaction,
+    so a line reported as failed was not stored and is safe to resend.
+    """
+    project_id = str(api_key.project_id)
+    agent = await run_in_threadpool(IngressAgent, db, qdrant_client)
+    ids: List[Optional[str]] = []
+    errors: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, EpisodicItemCreate]] = []
+
+    def store(chunk: List[Tuple[int, EpisodicItemCreate]]) -> List[str]:
+        # Vectors are upserted only once the chunk is committed
+        try:
+            items = agent.process_memories([record for _, record in chunk], commit=False)
+            enqueue_condensation(db, api_key.project_id, [i.id for i in items], commit=False)
+            db.commit()
+        except Exception:
+            agent.discard_pending()
+            raise
+        agent.index_pending()
+        return [str(i.id) for i in items]
+
+    async def flush():
+        chunk = list(pending)
+        pending.clear()
+        try:
+            stored = await run_in_threadpool(store, chunk)
+        except Exception as e:
+            logger.error(f"Bulk chunk of {len(chunk)} records failed: {e}")
+            db.rollback()
+            errors.extend({"line": line_no, "error": f"store failed: {e}"} for line_no, _ in chunk)
+            return
+        for (line_no, _), item_id in zip(chunk, stored):
+            ids[line_no - 1] = item_id
+
+    async for line_no, line in _ndjson_lines(request):
+        ids.extend([None] * (line_no - len(ids)))
+        try:
+            pending.append((line_no, _parse_record(line, project_id)))
+        except (ValueError, ValidationError) as e:
+            errors.append({"line": line_no, "error": str(e)})
+            continue
+        if len(pending) >= EPISODIC_BULK_CHUNK:
+            await flush()
+    if pending:
+        await flush()
+
+    stored = sum(1 for i in ids if i)
+    logger.info(f"Bulk ingest for project {project_id}: {stored} stored, {len(errors)} rejected.")
+    return {"stored": stored, "rejected": len(errors), "ids": ids, "errors": errors}
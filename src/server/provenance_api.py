@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from typing import Optional
+from pydantic import BaseModel
+import uuid
+
+from src.db.session import get_db
+from src.db.models import ProvenanceAudit, ProvenanceMismatch
+from src.engine.provenance_audit import ProvenanceAuditor, run_audit_background
+from src.db.pagination import encode_cursor, decode_cursor
+
+router = APIRouter(prefix="/api/admin/provenance", tags=["provenance"])
+
+
+class AuditRequest(BaseModel):
+    project_id: uuid.UUID
+
+
+def _get_audit(db: Session, audit_id: str) -> ProvenanceAudit:
+    try:
+        aid = uuid.UUID(audit_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid audit ID")
+    audit = db.get(ProvenanceAudit, aid)
+    if not audit:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return audit
+
+
+def _audit_json(audit: ProvenanceAudit) -> dict:
+    return {
+        "id": str(audit.id),
+        "project_id": str(audit.project_id),
+        "status": audit.status,
+        "checkpoint": str(audit.checkpoint) if audit.checkpoint else None,
+        "stats": audit.stats or {},
+        "error": audit.error_log,
+        "started_at": audit.started_at.isoformat() if audit.started_at else None,
+        "updated_at": audit.updated_at.isoformat() if audit.updated_at else None,
+        "ended_at": audit.ended_at.isoformat() if audit.ended_at else None,
+    }
+
+
+@router.post("/audits")
+def start_audit(request: AuditRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Start a background verification of every envelope signature and
+    evidence input hash in a project. Poll the audit for progress and page
+    through mismatches while it runs.
+    """
+    audit = ProvenanceAuditor(db).create(request.project_id)
+    background_tasks.add_task(run_audit_background, audit.id)
+    return {"id": str(audit.id), "status": audit.status}
+
+
+@router.post("/audits/{audit_id}/resume")
+def resume_audit(audit_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Continue an interrupted or failed audit from its checkpoint.
+    """
+    audit = _get_audit(db, audit_id)
+    if audit.status == "completed":
+        raise HTTPException(status_code=400, detail="Audit already completed")
+    background_tasks.add_task(run_audit_background, audit.id)
+    return {"id": str(audit.id), "status": "resuming", "checkpoint": str(audit.checkpoint) if audit.checkpoint else None}
+
+
+@router.get("/audits/{audit_id}")
+def get_audit(audit_id: str, db: Session = Depends(get_db)):
+    return _audit_json(_get_audit(db, audit_id))
+
+
+@router.get("/audits/{audit_id}/mismatches")
+def list_mismatches(audit_id: str, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Mismatches found so far, in the order they were recorded. Pass
+    `next_cursor` back as `cursor` for the next page.
+    """
+    audit = _get_audit(db, audit_id)
+    limit = max(1, min(limit, 1000))
+    stmt = select(ProvenanceMismatch).where(ProvenanceMismatch.audit_id == audit.id)
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stmt = stmt.where(tuple_(ProvenanceMismatch.created_at, ProvenanceMismatch.id) > tuple_(*after))
+    stmt = stmt.order_by(ProvenanceMismatch.created_at, ProvenanceMismatch.id).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {
+        "audit": _audit_json(audit),
+        "mismatches": [
+            {
+                "kind": m.kind,
+                "assertion_id": str(m.assertion_id),
+                "evidence_id": str(m.evidence_id) if m.evidence_id else None,
+                "envelope_id": str(m.envelope_id) if m.envelope_id else None,
+                "detail": m.detail,
+                "created_at": m.created_at.isoformat() if m.created_at else None,
+            }
+            for m in rows
+        ],
+        "next_cursor": next_cursor,
+    }
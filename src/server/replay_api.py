@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import List, Optional
+from pydantic import BaseModel
+from qdrant_client import QdrantClient
+import uuid
+
+from src.db.session import get_db, get_qdrant
+from src.db.models import ReplayPartition, ReplayRun
+from src.engine.replay import create_run, cutover, drop_run, run_status
+
+router = APIRouter(prefix="/api/admin/replay", tags=["replay"])
+
+
+class ReplayRequest(BaseModel):
+    project_ids: Optional[List[uuid.UUID]] = None
+    note: Optional[str] = None
+
+
+class CutoverRequest(BaseModel):
+    project_ids: Optional[List[uuid.UUID]] = None
+
+
+def _get_run(db: Session, run_id: str) -> ReplayRun:
+    try:
+        rid = uuid.UUID(run_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid run ID")
+    run = db.get(ReplayRun, rid)
+    if not run:
+        raise HTTPException(status_code=404, detail="Replay run not found")
+    return run
+
+
+@router.post("/runs")
+def start_run(request: ReplayRequest, db: Session = Depends(get_db)):
+    """
+    Create a shadow schema and one partition per project (all projects with
+    episodic items unless `project_ids` is given). Replay workers are
+    started separately: `python -m src.engine.replay work --run <id>`.
+    """
+    run = create_run(db, request.project_ids, request.note)
+    return run_status(db, run)
+
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: str, db: Session = Depends(get_db)):
+    run = _get_run(db, run_id)
+    partitions = db.execute(
+        select(ReplayPartition).where(ReplayPartition.run_id == run.id).order_by(ReplayPartition.project_id)
+    ).scalars().all()
+    return {
+        **run_status(db, run),
+        "projects": [
+            {
+                "project_id": str(p.project_id),
+                "status": p.status,
+                "items_done": p.items_done,
+                "checkpoint": str(p.checkpoint_id) if p.checkpoint_id else None,
+                "attempts": p.attempts,
+                "error": p.last_error,
+            }
+            for p in partitions
+        ],
+    }
+
+
+@router.post("/runs/{run_id}/cutover")
+def cutover_run(run_id: str, request: CutoverRequest, db: Session = Depends(get_db),
+                qdrant: QdrantClient = Depends(get_qdrant)):
+    """
+    Swap replayed projects into the live tables, one transaction per
+    project. Without `project_ids`, every finished partition is cut over.
+    """
+    run = _get_run(db, run_id)
+    if run.status != "running":
+        raise HTTPException(status_code=400, detail=f"Replay run is {run.status}")
+    project_ids = request.project_ids or db.execute(
+        select(ReplayPartition.project_id)
+        .where(ReplayPartition.run_id == run.id, ReplayPartition.status == "done")
+    ).scalars().all()
+
+    results, errors = [], []
+    for pid in project_ids:
+        try:
+            results.append(cutover(db, run.id, pid, qdrant))
+        except ValueError as e:
+            errors.append({"project_id": str(pid), "error": str(e)})
+    return {"cut_over": results, "errors": errors}
+
+
+@router.delete("/runs/{run_id}")
+def delete_run(run_id: str, db: Session = Depends(get_db)):
+    """
+    Drop the run's shadow schema. Projects not cut over keep their live graph.
+    """
+    run = _get_run(db, run_id)
+    drop_run(db, run.id)
+    return {"id": str(run.id), "status": run.status}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import List, Dict, Any, Optional
@@ -7,6 +7,9 @@ import uuid
 
 from src.db.session import get_db
 from src.db.models import Assertion
+from src.retrieve.assertion_index import sync_assertion_vectors
+from src.learn.evidence_store import evidence_counts
+from src.db.pagination import keyset_page, estimated_count
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/admin/review", tags=["review"])
@@ -29,14 +32,15 @@ class BulkApprovalRequest(BaseModel):
 @router.get("/assertions/pending")
 def list_pending_assertions(
     limit: int = 50,
-    offset: int = 0,
+    cursor: Optional[str] = None,
     min_instruction_score: Optional[float] = None,
     min_safety_score: Optional[float] = None,
     db: Session = Depends(get_db)
 ):
     """
-    List all pending assertions awaiting review.
-    Optionally filter by guardrail scores.
+    List all pending assertions awaiting review, newest first.
+    Optionally filter by guardrail scores. Pass `next_cursor` back as
+    `cursor` for the next page.
     """
     query = select(Assertion).where(Assertion.status == "pending_review")
     
@@ -46,12 +50,13 @@ def list_pending_assertions(
     if min_safety_score is not None:
         query = query.where(Assertion.safety_score >= min_safety_score)
     
-    query = query.order_by(Assertion.first_seen_at.desc()).limit(limit).offset(offset)
-    
-    assertions = db.execute(query).scalars().all()
+    try:
+        assertions, next_cursor = keyset_page(db, query, Assertion.first_seen_at, Assertion.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    counts = evidence_counts(db, [a.id for a in assertions])
     
     return {
-        "total": len(assertions),
         "assertions": [
             {
                 "id": str(a.id),
@@ -62,10 +67,13 @@ def list_pending_assertions(
                 "instruction_score": a.instruction_score,
                 "safety_score": a.safety_score,
                 "first_seen_at": a.first_seen_at.isoformat() if a.first_seen_at else None,
-                "provenance": a.provenance
+                "provenance": a.provenance,
+                "evidence_count": counts.get(str(a.id), 0)
             }
             for a in assertions
-        ]
+        ],
+        "next_cursor": next_cursor,
+        "estimated_total": estimated_count(db, query)
     }
 
 
@@ -73,6 +81,7 @@ def list_pending_assertions(
 def approve_assertion(
     assertion_id: str,
     request: ApprovalRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -97,6 +106,7 @@ def approve_assertion(
     assertion.reviewed_at = datetime.utcnow()
     
     db.commit()
+    background_tasks.add_task(sync_assertion_vectors, [assertion_id])
     
     return {
         "status": "approved",
@@ -110,6 +120,7 @@ def approve_assertion(
 def reject_assertion(
     assertion_id: str,
     request: RejectionRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -135,6 +146,7 @@ def reject_assertion(
     assertion.rejection_reason = request.rejection_reason
     
     db.commit()
+    background_tasks.add_task(sync_assertion_vectors, [assertion_id])
     
     return {
         "status": "rejected",
@@ -148,12 +160,14 @@ def reject_assertion(
 @router.post("/assertions/bulk-approve")
 def bulk_approve_assertions(
     request: BulkApprovalRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
     Approve multiple assertions in a single request.
     """
     approved_count = 0
+    approved_ids = []
     errors = []
     
     for assertion_id_str in request.assertion_ids:
@@ -173,11 +187,14 @@ def bulk_approve_assertions(
             assertion.reviewed_by = request.reviewed_by
             assertion.reviewed_at = datetime.utcnow()
             approved_count += 1
+            approved_ids.append(assertion_id_str)
             
         except ValueError:
             errors.append(f"{assertion_id_str}: invalid ID")
     
     db.commit()
+    # One batched embed + upsert for the whole approval set
+    background_tasks.add_task(sync_assertion_vectors, approved_ids)
     
     return {
         "approved_count": approved_count,
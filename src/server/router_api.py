@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from src.db.session import get_db, get_qdrant
 from sqlalchemy.orm import Session
 from qdrant_client import QdrantClient
-from src.retrieve.router import MemoryRouter
+from src.retrieve.router import MemoryRouter, resolve_retrieval_mode
 
 router = APIRouter(prefix="/api/v1/memory", tags=["Memory Router"])
 logger = logging.getLogger(__name__)
@@ -13,6 +13,7 @@ logger = logging.getLogger(__name__)
 class RetrieveRequest(BaseModel):
     project_id: str
     query: str
+    retrieval_mode: Optional[str] = None  # vector | lexical | hybrid
 
 class RetrieveResponse(BaseModel):
     answer: str
@@ -25,9 +26,17 @@ async def retrieve_memory(
     db: Session = Depends(get_db),
     qdrant: QdrantClient = Depends(get_qdrant)
 ):
+    try:
+        mode = resolve_retrieval_mode(request.retrieval_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         mr = MemoryRouter(db, qdrant)
-        result = await mr.route_and_retrieve(request.project_id, request.query)
+        result = await mr.route_and_retrieve(
+            request.project_id,
+            request.query,
+            retrieval_mode=mode
+        )
         return RetrieveResponse(**result)
     except Exception as e:
         logger.error(f"Retrieval failed: {e}")
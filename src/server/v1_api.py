@@ -1,9 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import List, Optional
+import uuid
 from src.db.session import get_db
 from src.db.models import EpisodicItem, Entity, Assertion
+from src.db.pagination import keyset_page, estimated_count
+from src.learn.evidence_store import list_evidence, evidence_counts
+from src.engine.export import (
+    MEDIA_TYPES, EXTENSIONS, decode_export_cursor, make_compressor, stream_jsonl
+)
 
 router = APIRouter(prefix="/v1", tags=["v1"])
 
@@ -14,29 +21,39 @@ def get_episodic_items(
     project_id: Optional[str] = None, 
     source: Optional[str] = None,
     limit: int = 100, 
-    offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
+    """
+    Episodic items, newest first. Pass `next_cursor` back as `cursor` for
+    the next page.
+    """
     stmt = select(EpisodicItem)
     if project_id:
         stmt = stmt.where(EpisodicItem.project_id == project_id)
     if source:
         stmt = stmt.where(EpisodicItem.source == source)
     
-    stmt = stmt.order_by(EpisodicItem.occurred_at.desc()).limit(limit).offset(offset)
-    items = db.execute(stmt).scalars().all()
+    try:
+        items, next_cursor = keyset_page(db, stmt, EpisodicItem.occurred_at, EpisodicItem.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return [
-        {
-            "id": str(i.id),
-            "project_id": str(i.project_id),
-            "source": i.source,
-            "text": i.text,
-            "occurred_at": i.occurred_at,
-            "metadata": i.metadata_
-        }
-        for i in items
-    ]
+    return {
+        "items": [
+            {
+                "id": str(i.id),
+                "project_id": str(i.project_id),
+                "source": i.source,
+                "text": i.text,
+                "occurred_at": i.occurred_at,
+                "metadata": i.metadata_
+            }
+            for i in items
+        ],
+        "next_cursor": next_cursor,
+        "estimated_total": estimated_count(db, stmt)
+    }
 
 # --- Graph API ---
 
@@ -83,6 +100,7 @@ def get_assertions(
         
     stmt = stmt.limit(limit)
     assertions = db.execute(stmt).scalars().all()
+    counts = evidence_counts(db, [a.id for a in assertions])
     
     return [
         {
@@ -92,44 +110,66 @@ def get_assertions(
             "object": a.object_text,
             "confidence": a.confidence,
             "status": a.status,
-            "provenance": a.provenance
+            "provenance": a.provenance,
+            "evidence_count": counts.get(str(a.id), 0)
         }
         for a in assertions
     ]
 
+@router.get("/graph/assertions/{assertion_id}/evidence")
+def get_assertion_evidence(
+    assertion_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Evidence for one assertion, oldest first. Pass `next_cursor` back as
+    `cursor` for the next page.
+    """
+    try:
+        rows, next_cursor = list_evidence(db, uuid.UUID(assertion_id), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "evidence": [
+            {
+                "id": str(e.id),
+                "episodic_id": str(e.episodic_id) if e.episodic_id else None,
+                "quote": e.quote,
+                "envelope_id": str(e.envelope_id) if e.envelope_id else None,
+                "created_at": e.created_at.isoformat() if e.created_at else None
+            }
+            for e in rows
+        ],
+        "next_cursor": next_cursor
+    }
+
 # --- Export API ---
 
 @router.get("/export/jsonl")
-def export_jsonl(project_id: str, db: Session = Depends(get_db)):
-    # Streaming response would be better for large datasets, 
-    # but for MVP returning a line-delimited string or list
-    
-    # 1. Fetch all items
-    items = db.execute(select(EpisodicItem).where(EpisodicItem.project_id == project_id)).scalars().all()
-    
-    # 2. Fetch all assertions
-    assertions = db.execute(select(Assertion).where(Assertion.project_id == project_id)).scalars().all()
-    
-    import json
-    lines = []
-    
-    for i in items:
-        lines.append(json.dumps({
-            "type": "episodic_item",
-            "id": str(i.id),
-            "text": i.text,
-            "source": i.source,
-            "created_at": i.created_at.isoformat()
-        }))
-        
-    for a in assertions:
-        lines.append(json.dumps({
-            "type": "assertion",
-            "id": str(a.id),
-            "statement": f"{a.subject_text} {a.predicate} {a.object_text}",
-            "confidence": a.confidence,
-            "provenance": a.provenance
-        }))
-        
-    from fastapi.responses import Response
-    return Response(content="\n".join(lines), media_type="application/x-jsonlines")
+def export_jsonl(
+    project_id: str,
+    cursor: Optional[str] = None,
+    compression: Optional[str] = Query(None, description="gzip or zstd"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a project's episodic items and assertions as JSON lines. Each
+    line has a `cursor`; to resume an interrupted export, pass the cursor of
+    the last complete line.
+    """
+    try:
+        pid = uuid.UUID(project_id)
+        after = decode_export_cursor(cursor) if cursor else None
+        compressor = make_compressor(compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    kind = compression if compressor else None
+    return StreamingResponse(
+        stream_jsonl(db.get_bind(), pid, after, compressor),
+        media_type=MEDIA_TYPES[kind],
+        headers={"Content-Disposition": f'attachment; filename="{pid}.jsonl{EXTENSIONS[kind]}"'}
+    )
@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.db.models import Assertion
+from src.learn.assertion_store import upsert_assertions, assertion_fingerprint
+from src.learn.evidence_store import (
+    Evidence, insert_evidence, list_evidence, encode_cursor, decode_cursor,
+)
+
+
+def _compiled(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def test_upsert_appends_evidence_rows_for_the_row_each_assertion_landed_on():
+    db = MagicMock()
+    pid = uuid.uuid4()
+    landed_id = uuid.uuid4()
+    fp = assertion_fingerprint(None, "Bob", "uses", None, "Vim", 1)
+    db.execute.return_value = [MagicMock(id=landed_id, status="pending_review", inserted=False,
+                                         project_id=pid, fingerprint=fp)]
+    e1, e2 = str(uuid.uuid4()), str(uuid.uuid4())
+
+    touched = upsert_assertions(db, [
+        Assertion(project_id=pid, subject_text="Bob", predicate="uses", object_text="Vim"),
+        Assertion(project_id=pid, subject_text="bob", predicate="uses", object_text="vim"),
+    ], [[Evidence(episodic_id=e1, quote="I use vim")], [Evidence(episodic_id=e2)]])
+
+    assert touched[0].id == landed_id and touched[0].fingerprint == fp
+    # One upsert plus one multi-row evidence insert
+    assert db.execute.call_count == 2
+    compiled = _compiled(db.execute.call_args_list[1][0][0])
+    assert "INSERT INTO assertion_evidence" in str(compiled)
+    assert "ON CONFLICT DO NOTHING" in str(compiled)
+    params = compiled.params
+    assert params["assertion_id_m0"] == landed_id and params["assertion_id_m1"] == landed_id
+    assert (params["episodic_id_m0"], params["quote_m0"]) == (e1, "I use vim")
+    assert params["episodic_id_m1"] == e2
+
+
+def test_insert_evidence_batches():
+    db = MagicMock()
+    aid = uuid.uuid4()
+    insert_evidence(db, [{"assertion_id": aid, "project_id": uuid.uuid4(), "episodic_id": str(uuid.uuid4())}
+                         for _ in range(5)], batch_size=2)
+    assert db.execute.call_count == 3
+    insert_evidence(db, [])
+    assert db.execute.call_count == 3
+
+
+def test_list_evidence_pages_by_keyset():
+    db = MagicMock()
+    rows = [MagicMock(id=uuid.uuid4(), created_at=datetime(2026, 1, 1, 0, 0, n)) for n in range(3)]
+    db.execute.return_value.scalars.return_value.all.return_value = rows
+
+    page, next_cursor = list_evidence(db, uuid.uuid4(), limit=2)
+
+    # limit + 1 rows fetched: a further page exists, and it starts after the last row returned
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1].created_at, rows[1].id)
+    sql = str(_compiled(db.execute.call_args[0][0]))
+    assert "ORDER BY assertion_evidence.created_at, assertion_evidence.id" in sql
+
+    list_evidence(db, uuid.uuid4(), limit=2, cursor=next_cursor)
+    sql = str(_compiled(db.execute.call_args[0][0]))
+    assert "(assertion_evidence.created_at, assertion_evidence.id) >" in sql
+
+    db.execute.return_value.scalars.return_value.all.return_value = rows[:1]
+    assert list_evidence(db, uuid.uuid4(), limit=2) == (rows[:1], None)
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    ts, rid = datetime(2026, 3, 4, 5, 6, 7, 8), uuid.uuid4()
+    assert decode_cursor(encode_cursor(ts, rid)) == (ts, rid)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,91 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from src.retrieve.assertion_index import AssertionIndexer
+
+
+def _row(status):
+    return SimpleNamespace(
+        id=uuid.uuid4(), project_id=uuid.uuid4(), subject_text="Bob",
+        predicate="uses", object_text="Vim", status=status, confidence=0.9
+    )
+
+
+def _embedder():
+    model = MagicMock()
+    def embed(texts):
+        for _ in texts:
+            v = MagicMock()
+            v.tolist.return_value = [0.1] * 384
+            yield v
+    model.embed.side_effect = embed
+    return model
+
+
+def test_sync_upserts_approved_and_deletes_rejected():
+    db = MagicMock()
+    qdrant = MagicMock()
+    approved, active, rejected = _row("approved"), _row("active"), _row("rejected")
+    db.execute.return_value.all.return_value = [approved, active, rejected]
+
+    indexer = AssertionIndexer(db, qdrant, embedding_model=_embedder())
+    count = indexer.sync([approved.id, active.id, rejected.id])
+
+    assert count == 2
+    points = qdrant.upsert.call_args.kwargs["points"]
+    assert {p.id for p in points} == {str(approved.id), str(active.id)}
+    assert points[0].payload["text"] == "Bob uses Vim"
+    deleted = qdrant.delete.call_args.kwargs["points_selector"].points
+    assert deleted == [str(rejected.id)]
+
+
+def test_sync_with_no_ids_is_noop():
+    db = MagicMock()
+    qdrant = MagicMock()
+    assert AssertionIndexer(db, qdrant, embedding_model=_embedder()).sync([]) == 0
+    db.execute.assert_not_called()
+    qdrant.upsert.assert_not_called()
+
+
+def test_reindex_rejects_malformed_project_id():
+    from fastapi.testclient import TestClient
+    from main import app
+    from src.db.session import get_db, get_qdrant
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    app.dependency_overrides[get_qdrant] = lambda: MagicMock()
+    try:
+        response = TestClient(app).post("/api/admin/assertions/reindex", params={"project_id": "not-a-uuid"})
+    finally:
+        app.dependency_overrides = {}
+    assert response.status_code == 400
+
+
+def test_reindex_runs_in_the_background_and_returns_a_job_id():
+    from fastapi.testclient import TestClient
+    from main import app
+    pid = uuid.uuid4()
+    with patch("src.retrieve.assertion_index.reindex_assertion_vectors") as reindex:
+        response = TestClient(app).post("/api/admin/assertions/reindex", params={"project_id": str(pid)})
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    reindex.assert_called_once_with(job_id, pid)
+
+
+def test_sync_reuses_one_embedding_model_and_client_per_process():
+    from src.retrieve import assertion_index
+    fastembed = MagicMock()
+    with patch.dict("sys.modules", {"fastembed": fastembed}), \
+         patch.object(assertion_index, "_embedding_model", None), \
+         patch.object(assertion_index, "_qdrant", None), \
+         patch.object(assertion_index, "QdrantClient") as MockQdrant, \
+         patch("src.db.session.SessionLocal") as MockSession:
+        MockSession.return_value.execute.return_value.all.return_value = [_row("approved")]
+        fastembed.TextEmbedding.return_value = _embedder()
+        assertion_index.sync_assertion_vectors([str(uuid.uuid4())])
+        assertion_index.sync_assertion_vectors([str(uuid.uuid4())])
+
+    fastembed.TextEmbedding.assert_called_once()
+    MockQdrant.assert_called_once()
+    assert MockQdrant.return_value.upsert.call_count == 2
+    assert MockSession.return_value.close.call_count == 2
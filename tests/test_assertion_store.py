@@ -0,0 +1,71 @@
+import uuid
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+
+from src.db.models import Assertion
+from src.learn.assertion_store import (
+    assertion_fingerprint, upsert_assertions, backfill_fingerprints, BACKFILL_FINGERPRINTS_SQL,
+)
+
+
+def test_fingerprint_normalizes_text_but_keeps_identity_fields():
+    ent = uuid.uuid4()
+    base = assertion_fingerprint(ent, "Alice", "prefers", None, "dark mode", 1)
+
+    # Case and whitespace are folded
+    assert assertion_fingerprint(ent, "  ALICE ", "Prefers", None, "dark\n  mode", 1) == base
+    # Polarity defaults to affirmative
+    assert assertion_fingerprint(ent, "Alice", "prefers", None, "dark mode", None) == base
+    # Entity links and polarity are part of the identity
+    assert assertion_fingerprint(uuid.uuid4(), "Alice", "prefers", None, "dark mode", 1) != base
+    assert assertion_fingerprint(ent, "Alice", "prefers", None, "dark mode", -1) != base
+
+
+def _compiled(db):
+    stmt = db.execute.call_args[0][0]
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def test_upsert_folds_batch_duplicates_into_one_row():
+    db = MagicMock()
+    pid = uuid.uuid4()
+    upsert_assertions(db, [
+        Assertion(project_id=pid, subject_text="Bob", predicate="uses", object_text="Vim",
+                  confidence=0.5),
+        Assertion(project_id=pid, subject_text="bob", predicate="USES", object_text="vim ",
+                  confidence=0.9),
+        Assertion(project_id=pid, subject_text="Bob", predicate="uses", object_text="Emacs"),
+    ])
+
+    assert db.execute.call_count == 1
+    compiled = _compiled(db)
+    sql = str(compiled)
+    assert "ON CONFLICT (project_id, fingerprint) DO UPDATE" in sql
+    assert "greatest(assertions.confidence, excluded.confidence)" in sql
+    assert "RETURNING assertions.id, assertions.status, (xmax = 0) AS inserted" in sql
+    params = compiled.params
+    assert "predicate_m1" in params and "predicate_m2" not in params
+    assert params["confidence_m0"] == 0.9
+    # Evidence is no longer merged into the row's JSONB
+    assert "provenance" not in sql.split("DO UPDATE")[1]
+
+
+def test_upsert_chunks_large_batches():
+    db = MagicMock()
+    pid = uuid.uuid4()
+    upsert_assertions(db, [
+        Assertion(project_id=pid, subject_text="s", predicate="p", object_text=f"o{n}") for n in range(5)
+    ], batch_size=2)
+    assert db.execute.call_count == 3
+
+
+def test_backfill_is_scoped_and_leaves_duplicates_unfingerprinted():
+    assert "DISTINCT ON (x.project_id, x.fp)" in BACKFILL_FINGERPRINTS_SQL
+    assert ":pid" not in BACKFILL_FINGERPRINTS_SQL
+
+    db = MagicMock()
+    pid = uuid.uuid4()
+    backfill_fingerprints(db, pid)
+    stmt, params = db.execute.call_args[0]
+    assert "project_id = CAST(:pid AS uuid)" in str(stmt)
+    assert params == {"pid": str(pid)}
@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock, patch
+from src.agents.chunking import chunk_text
+
+
+def test_short_text_is_single_chunk():
+    chunks = chunk_text("A short memory.", max_tokens=50, overlap=5)
+    assert chunks == [{"index": 0, "start": 0, "end": 15, "text": "A short memory."}]
+
+
+def test_long_text_is_split_with_overlap():
+    words = [f"w{i}" for i in range(100)]
+    text = " ".join(words)
+
+    chunks = chunk_text(text, max_tokens=30, overlap=5)
+
+    assert len(chunks) > 1
+    # Offsets point back into the original text
+    for c in chunks:
+        assert text[c["start"]:c["end"]] == c["text"]
+    # Consecutive windows share the overlap and the last window reaches the end
+    assert chunks[1]["start"] < chunks[0]["end"]
+    assert chunks[-1]["end"] == len(text)
+    assert [c["index"] for c in chunks] == list(range(len(chunks)))
+
+
+def test_ingress_writes_one_point_per_chunk(db_session):
+    mock_qdrant = MagicMock()
+    text = " ".join(f"word{i}" for i in range(2000))
+
+    with patch("src.agents.ingress.TextEmbedding") as MockEmbedding:
+        def fake_embed(texts):
+            for _ in texts:
+                v = MagicMock()
+                v.tolist.return_value = [0.1] * 384
+                yield v
+        MockEmbedding.return_value.embed.side_effect = fake_embed
+
+        from src.agents.ingress import IngressAgent
+        from src.db.schemas import EpisodicItemCreate
+
+        agent = IngressAgent(db_session, mock_qdrant)
+        item = agent.process_memory(EpisodicItemCreate(project_id="proj", text=text))
+
+    # All chunks embedded in one batched call and upserted together
+    MockEmbedding.return_value.embed.assert_called_once()
+    points = mock_qdrant.upsert.call_args[1]["points"]
+    assert len(points) > 1
+    assert points[0].id == str(item.id)
+    assert all(p.payload["item_id"] == str(item.id) for p in points)
+    assert [p.payload["chunk_index"] for p in points] == list(range(len(points)))
+
+
+def test_ingress_without_commit_defers_vectors_until_indexed(db_session):
+    mock_qdrant = MagicMock()
+    db_session.query.return_value.filter.return_value.first.return_value = None  # new project
+
+    with patch("src.agents.ingress.TextEmbedding") as MockEmbedding:
+        MockEmbedding.return_value.embed.side_effect = lambda texts: [MagicMock(tolist=lambda: [0.1]) for _ in texts]
+
+        from src.agents.ingress import IngressAgent
+        from src.db.schemas import EpisodicItemCreate
+
+        agent = IngressAgent(db_session, mock_qdrant)
+        agent.process_memory(EpisodicItemCreate(project_id="proj", text="kept"), commit=False)
+        # Neither the auto-created project nor the item is committed, and no vector is written
+        db_session.commit.assert_not_called()
+        mock_qdrant.upsert.assert_not_called()
+        agent.index_pending()
+        assert mock_qdrant.upsert.call_count == 1
+
+        agent.process_memory(EpisodicItemCreate(project_id="proj", text="rolled back"), commit=False)
+        agent.discard_pending()
+        agent.index_pending()
+        assert mock_qdrant.upsert.call_count == 1
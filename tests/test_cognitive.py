@@ -2,10 +2,12 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import math
 import pytest
 from uuid import uuid4
 from datetime import datetime
 from unittest.mock import MagicMock
+from src.engine import cognitive
 from src.engine.cognitive import CognitiveService
 from src.db.models import Relation, Assertion
 from src.engine.ner import get_ner_engine
@@ -19,35 +21,44 @@ def mock_db():
 def test_hebbian_update_creates_strength(mock_db):
     cog = CognitiveService(mock_db)
     
-    # Mock existing relations
     id1 = uuid4()
     id2 = uuid4()
     
-    # Mock query return
-    mock_rel = Relation(from_id=id1, to_id=id2, strength=1.0, access_count=0)
-    mock_assertion = Assertion(id=id1, subject_entity_id=uuid4(), predicate="mentioned", object_text="text")
-    
-    def side_effect(model):
-        m = MagicMock()
-        if model == Assertion:
-            m.filter.return_value.all.return_value = [mock_assertion]
-            m.filter.return_value.update.return_value = 1
-        elif model == Relation:
-            m.filter.return_value.all.return_value = [mock_rel]
-        else:
-            m.filter.return_value.update.return_value = 1
-        return m
-
-    mock_db.query.side_effect = side_effect
-    
     cog.hebbian_update([id1, id2])
     
-    # Check if strength increased
-    assert mock_rel.strength > 1.0
-    assert mock_rel.access_count == 1
+    # Relation reinforcement is a single set-based UPDATE, not per-row ORM writes
+    mock_db.execute.assert_called_once()
+    stmt, params = mock_db.execute.call_args[0]
+    sql = str(stmt)
+    assert "UPDATE relations" in sql
+    assert "LEAST(strength * exp(" in sql and "+ 0.1, 5.0)" in sql
+    # Assertion -> entity expansion happens inside the same statement
+    assert "subject_entity_id" in sql and "object_entity_id" in sql
+    assert params["ids"] == [str(id1), str(id2)]
     # Check if commit was called
     mock_db.commit.assert_called()
 
+def test_hebbian_update_reinforces_decayed_strength(mock_db):
+    # Touching a stale edge must not restore the strength it had before it
+    # decayed: the increment applies to the decayed value, and the decay is
+    # marked as materialized in the same UPDATE
+    cog = CognitiveService(mock_db)
+    cog.hebbian_update([uuid4(), uuid4()])
+
+    stmt, params = mock_db.execute.call_args[0]
+    sql = str(stmt)
+    set_clause = sql[sql.index("SET strength"):sql.index("FROM ids")]
+    assert "GREATEST(last_accessed_at, decayed_at)" in set_clause
+    assert "last_accessed_at = :now" in set_clause and "decayed_at = :now" in set_clause
+    half_life = math.log(2) / params["lam"]
+    assert half_life == pytest.approx(cognitive.ACTIVATION_HALF_LIFE_HOURS)
+
+def test_hebbian_update_skips_single_node(mock_db):
+    cog = CognitiveService(mock_db)
+    cog.hebbian_update([uuid4()])
+    mock_db.execute.assert_not_called()
+    mock_db.commit.assert_not_called()
+
 def test_spreading_activation_propagates(mock_db):
     cog = CognitiveService(mock_db)
     
@@ -98,3 +109,30 @@ def test_ner_extraction():
         pass
 
 
+def test_activation_decay_is_chunked(mock_db):
+    cog = CognitiveService(mock_db)
+
+    first_chunk = [uuid4(), uuid4()]
+    second_chunk = [uuid4()]
+    select_results = [first_chunk, second_chunk]
+
+    def execute(stmt, params):
+        result = MagicMock()
+        if str(stmt).strip().startswith("SELECT"):
+            result.scalars.return_value.all.return_value = select_results.pop(0)
+        else:
+            result.rowcount = len(params["ids"])
+        return result
+
+    mock_db.execute.side_effect = execute
+
+    updated = cog.apply_activation_decay(half_life_hours=24, chunk_size=2, throttle_seconds=0)
+
+    assert updated == 3
+    # One commit per chunk, so locks are released between chunks
+    assert mock_db.commit.call_count == 2
+    # Second page is keyed off the last id of the first page
+    select_calls = [c for c in mock_db.execute.call_args_list if str(c[0][0]).strip().startswith("SELECT")]
+    assert select_calls[1][0][1]["after"] == str(first_chunk[-1])
+    update_sql = str(mock_db.execute.call_args_list[1][0][0])
+    assert "exp(" in update_sql and "decayed_at" in update_sql
@@ -0,0 +1,85 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.engine import columnar
+
+
+def test_select_casts_uuid_and_jsonb_columns_to_text():
+    sql = columnar._select_sql("assertions")
+    assert 'CAST("id" AS text) AS "id"' in sql
+    assert 'CAST("provenance" AS text) AS "provenance"' in sql
+    assert '"confidence"' in sql and 'CAST("confidence"' not in sql
+    assert sql.endswith("WHERE project_id = CAST(:pid AS uuid) ORDER BY id")
+
+
+def test_export_without_pyarrow_says_how_to_install_it(tmp_path):
+    with patch.dict("sys.modules", {"pyarrow": None}):
+        with pytest.raises(RuntimeError, match="pip install pyarrow"):
+            columnar.export_project(MagicMock(), uuid.uuid4(), str(tmp_path))
+
+
+class FakeConn:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execution_options(self, **options):
+        return self
+
+    def execute(self, sql, params=None):
+        result = MagicMock()
+        sql = str(sql)
+        if sql.startswith("SELECT name FROM projects"):
+            result.scalar.return_value = "demo"
+            return result
+        table = sql.split(" FROM ")[1].split()[0]
+        rows = self.tables.get(table, [])
+        result.mappings.return_value.partitions.side_effect = lambda n: (rows[i:i + n] for i in range(0, len(rows), n))
+        return result
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_then_import_copies_rows_and_vectors(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    pid = str(uuid.uuid4())
+    items = [{"id": str(uuid.uuid4()), "project_id": pid, "source": "api", "text": f"item {n}",
+              "occurred_at": datetime(2026, 1, 1, tzinfo=timezone.utc), "metadata": "{}",
+              "qdrant_point_id": None, "created_at": datetime(2026, 1, 1)} for n in range(5)]
+    bind = MagicMock()
+    bind.connect.return_value = FakeConn({"episodic_items": items})
+    qdrant = MagicMock()
+    qdrant.collection_exists.side_effect = lambda name: name == "semantic_assertions"
+    point = MagicMock(id=str(uuid.uuid4()), vector=[0.1, 0.2], payload={"project_id": pid})
+    qdrant.scroll.return_value = ([point], None)
+
+    manifest = columnar.export_project(bind, pid, str(tmp_path), fmt, qdrant, batch_rows=2)
+
+    assert manifest["rows"]["episodic_items"] == 5 and manifest["rows"]["vectors"] == 1
+    assert json.loads((tmp_path / "manifest.json").read_text())["project_name"] == "demo"
+
+    cur = MagicMock()
+    copied = []
+    cur.copy_expert.side_effect = lambda sql, buf: copied.append((sql, buf.read().decode()))
+    bind.raw_connection.return_value.cursor.return_value = cur
+    target = MagicMock()
+    with patch("src.db.qdrant.ensure_collection"):
+        columnar.import_project(bind, str(tmp_path), target, batch_rows=2)
+
+    item_copies = [body for sql, body in copied if sql.startswith("COPY _import_episodic_items")]
+    assert sum(len(body.splitlines()) for body in item_copies) == 5
+    # Nulls stay unquoted (NULL to COPY), values are quoted
+    assert ',,' in item_copies[0] and '"item 0"' in item_copies[0]
+    merges = [c.args[0] for c in cur.execute.call_args_list if c.args[0].startswith("INSERT INTO episodic_items")]
+    assert merges and "ON CONFLICT DO NOTHING" in merges[0]
+    bind.raw_connection.return_value.commit.assert_called_once()
+    upserted = target.upsert.call_args.kwargs
+    assert upserted["collection_name"] == "semantic_assertions" and len(upserted["points"]) == 1
@@ -7,7 +7,7 @@ import asyncio
 from uuid import uuid4
 from unittest.mock import MagicMock, patch
 from src.engine.condenser import Condenser
-from src.db.models import EpisodicItem, Assertion, Policy, Entity, Relation
+from src.db.models import EpisodicItem, Assertion, Policy, Entity, Relation, ProofEnvelope
 
 @pytest.fixture
 def mock_db():
@@ -18,6 +18,7 @@ async def test_condenser_distills_relationships(mock_db):
     # Patch get_ner_engine to return a mock
     # Patch get_thread_shard to return a synchronous mock
     with patch("src.engine.condenser.get_ner_engine") as mock_get_ner, \
+         patch("src.engine.condenser.get_entity_index", return_value=None), \
          patch("src.engine.condenser.get_thread_shard") as mock_get_shard:
         
         # Mock NER
@@ -33,6 +34,9 @@ async def test_condenser_distills_relationships(mock_db):
             f.set_result(fn(*args, **kwargs))
             return f
         mock_shard_instance.submit.side_effect = mock_submit
+        async def mock_run(fn, *args, **kwargs):
+            return fn(*args, **kwargs)
+        mock_shard_instance.run.side_effect = mock_run
         mock_get_shard.return_value = mock_shard_instance
         
         condenser = Condenser(mock_db)
@@ -52,17 +56,67 @@ async def test_condenser_distills_relationships(mock_db):
         ]
         
         # Force deterministic path regardless of container env var
-        with patch.dict(os.environ, {"LLM_ENABLED": "false"}):
+        with patch.dict(os.environ, {"LLM_ENABLED": "false"}), \
+             patch("src.engine.condenser.upsert_assertions", return_value=[]) as mock_upsert:
             print("[Test] Calling condenser.distill...")
             await condenser.distill(project_id, items)
             print("[Test] condenser.distill returned.")
         
         # Verify DB actions
         added_objects = [call[0][0] for call in mock_db.add.call_args_list]
+        upserted = mock_upsert.call_args[0][1]
         
         found_entity = any(isinstance(obj, Entity) and "v2.0" in obj.canonical_name for obj in added_objects)
-        found_summary = any(isinstance(obj, Assertion) and obj.predicate == "summarized_as" for obj in added_objects)
+        found_summary = any(isinstance(obj, Assertion) and obj.predicate == "summarized_as" for obj in upserted)
         
         assert found_entity, "Should have created an Entity for v2.0"
         assert found_summary, "Should have created a summary Assertion"
         mock_db.commit.assert_called()
+
+        # One envelope per distill, signed over the Merkle root of the inputs;
+        # each source item is evidence under it with its inclusion proof
+        envelopes = [obj for obj in added_objects if isinstance(obj, ProofEnvelope)]
+        assert len(envelopes) == 1 and envelopes[0].signature
+        assert envelopes[0].merkle_root and envelopes[0].leaf_count == 1 and envelopes[0].inputs is None
+        evidence = mock_upsert.call_args[0][2]
+        assert [(e.episodic_id, e.envelope_id) for e in evidence[0]] == [(str(items[0].id), envelopes[0].id)]
+        assert evidence[0][0].proof == []
+        assert not any(obj.provenance for obj in upserted)
+
+
+@pytest.mark.asyncio
+async def test_condenser_computes_without_holding_a_transaction(mock_db):
+    calls_at_ner = []
+
+    with patch("src.engine.condenser.get_ner_engine") as mock_get_ner, \
+         patch("src.engine.condenser.get_entity_index", return_value=None), \
+         patch("src.engine.condenser.sync_assertion_vectors"), \
+         patch("src.engine.condenser.get_thread_shard") as mock_get_shard:
+
+        def extract(text):
+            calls_at_ner.append([c[0] for c in mock_db.method_calls])
+            return [{"text": "Postgres", "label": "tool", "score": 0.9}]
+        mock_get_ner.return_value.extract_entities.side_effect = extract
+
+        async def mock_run(fn, *args, **kwargs):
+            return fn(*args, **kwargs)
+        mock_get_shard.return_value.run.side_effect = mock_run
+
+        mock_db.execute.return_value.scalars.return_value.all.return_value = []
+        mock_db.execute.return_value.all.return_value = []
+
+        items = [EpisodicItem(id=uuid4(), text="We moved the billing service to Postgres.", source="chat")]
+        with patch.dict(os.environ, {"LLM_ENABLED": "false"}), \
+             patch("src.engine.condenser.upsert_assertions", return_value=[]):
+            await Condenser(mock_db).distill(uuid4(), items)
+
+    # Any open transaction was ended before compute started
+    assert calls_at_ner and calls_at_ner[0][-1] == "commit"
+
+    calls = [c[0] for c in mock_db.method_calls]
+    first_add = calls.index("add")
+    # Writes happen only after the entity snapshot read, in one final commit
+    assert calls[:first_add].count("execute") == 1
+    assert "commit" not in calls[first_add:-1] and calls[-1] == "commit"
+    added = [c[0][0] for c in mock_db.add.call_args_list]
+    assert any(isinstance(o, Entity) and o.canonical_name == "Postgres" for o in added)
@@ -26,13 +26,11 @@ def test_consolidate_hitl_manual(mock_db, monkeypatch):
         )
     ]
     
-    # Mock the duplicate check to return None
-    mock_db.execute.return_value.scalars.return_value.first.return_value = None
+    with patch("src.learn.consolidate.upsert_assertions") as mock_upsert:
+        consolidator.consolidate(project_id, assertions, {})
     
-    consolidator.consolidate(project_id, assertions, {})
-    
-    # Verify add was called with pending_review status
-    added_obj = mock_db.add.call_args[0][0]
+    # Verify the upserted assertion has pending_review status
+    added_obj = mock_upsert.call_args[0][1][0]
     assert added_obj.status == "pending_review"
     assert added_obj.instruction_score < 0.5
 
@@ -55,12 +53,11 @@ def test_consolidate_hitl_auto_blocked(mock_db, monkeypatch):
         )
     ]
     
-    mock_db.execute.return_value.scalars.return_value.first.return_value = None
-    
-    consolidator.consolidate(project_id, assertions, {})
+    with patch("src.learn.consolidate.upsert_assertions") as mock_upsert:
+        consolidator.consolidate(project_id, assertions, {})
     
-    # Verify add was called with rejected status
-    added_obj = mock_db.add.call_args[0][0]
+    # Verify the upserted assertion has rejected status
+    added_obj = mock_upsert.call_args[0][1][0]
     print(f"DEBUG TEST: type(added_obj)={type(added_obj)}")
     print(f"DEBUG TEST: added_obj.status={added_obj.status}")
     assert added_obj.status == "rejected"
@@ -84,11 +81,10 @@ def test_consolidate_hitl_auto_approved(mock_db, monkeypatch):
         )
     ]
     
-    mock_db.execute.return_value.scalars.return_value.first.return_value = None
-    
-    consolidator.consolidate(project_id, assertions, {})
+    with patch("src.learn.consolidate.upsert_assertions") as mock_upsert:
+        consolidator.consolidate(project_id, assertions, {})
     
-    # Verify add was called with active status
-    added_obj = mock_db.add.call_args[0][0]
+    # Verify the upserted assertion has active status
+    added_obj = mock_upsert.call_args[0][1][0]
     assert added_obj.status == "active"
     assert added_obj.instruction_score < 0.5
@@ -1,67 +1,75 @@
+import json
+import math
 import pytest
 import uuid
 from datetime import datetime
 from unittest.mock import MagicMock
+from src.engine import cognitive
 from src.engine.edge_synthesizer import EdgeSynthesizer
-from src.db.models import Relation
 
 @pytest.fixture
 def mock_db():
     return MagicMock()
 
+def _call(mock_db):
+    assert mock_db.execute.call_count == 1
+    stmt, params = mock_db.execute.call_args[0]
+    return str(stmt), params
+
 def test_synthesize_creates_bidirectional_edges(mock_db):
     synth = EdgeSynthesizer(mock_db)
     project_id = uuid.uuid4()
     id1 = uuid.uuid4()
     id2 = uuid.uuid4()
-    
-    # Mock no existing relations
-    mock_db.execute.return_value.scalars.return_value.first.return_value = None
-    
+
     batch_prov = {"batch_ts": "2026-02-18T00:00:00"}
-    
+
     # Synthesize between 2 entities
     count = synth.synthesize(project_id, [id1, id2], batch_prov)
-    
-    # Should create 2 edges (A->B and B->A)
+
+    # Should write 2 edges (A->B and B->A) in a single statement
     assert count == 2
-    assert mock_db.add.call_count == 2
-    
-    # Verify first edge
-    rel1 = mock_db.add.call_args_list[0][0][0]
-    assert isinstance(rel1, Relation)
-    assert rel1.from_id == id1
-    assert rel1.to_id == id2
-    assert rel1.relation_type == "co_occurs_with"
-    assert rel1.strength == 1.0
+    sql, params = _call(mock_db)
+    assert list(zip(params["from_ids"], params["to_ids"])) == [(str(id1), str(id2)), (str(id2), str(id1))]
+    assert "co_occurs_with" in sql
+    assert json.loads(params["prov"]) == [batch_prov]
+    # No per-edge ORM round trips
+    assert mock_db.add.call_count == 0
 
 def test_synthesize_reinforces_existing_edges(mock_db):
     synth = EdgeSynthesizer(mock_db)
-    project_id = uuid.uuid4()
-    id1 = uuid.uuid4()
-    id2 = uuid.uuid4()
-    
-    # Mock existing relation
-    existing_rel = Relation(
-        from_id=id1, to_id=id2, strength=1.0, access_count=1, provenance=[]
-    )
-    mock_db.execute.return_value.scalars.return_value.first.return_value = existing_rel
-    
     batch_prov = {"batch_ts": "2026-02-18T00:00:01"}
-    
-    # Run synthesis
-    synth.synthesize(project_id, [id1, id2], batch_prov)
-    
-    # Strength should increase
-    assert existing_rel.strength > 1.0
-    # access_count starts at 1. Bidirectional synthesis reinforces twice (A->B and B->A).
-    # Since our mock returns the same object for both directions, it increments twice.
-    assert existing_rel.access_count == 3
-    assert len(existing_rel.provenance) == 1
-    assert existing_rel.provenance[0]["batch_ts"] == "2026-02-18T00:00:01"
+    now = datetime(2026, 2, 18)
+
+    synth.synthesize(uuid.uuid4(), [uuid.uuid4(), uuid.uuid4()], batch_prov, timestamp=now)
+
+    sql, params = _call(mock_db)
+    # Existing edges are reinforced (capped) from their decayed strength,
+    # which restarts the decay clock; only missing ones are inserted
+    assert f"LEAST({cognitive._DECAYED_STRENGTH_SQL} + 0.1, :max_strength)" in sql
+    assert "decayed_at = :now" in sql
+    assert params["lam"] == pytest.approx(math.log(2) / cognitive.ACTIVATION_HALF_LIFE_HOURS)
+    assert "access_count = r.access_count + 1" in sql
+    assert "NOT EXISTS" in sql
+    assert params["max_strength"] == 5.0 and params["keep"] == 10
+    assert params["now"] == now
+    # The same batch is never appended twice to an edge's provenance
+    assert json.loads(params["batch_match"]) == [{"batch_ts": "2026-02-18T00:00:01"}]
+
+def test_synthesize_dedupes_entity_ids(mock_db):
+    synth = EdgeSynthesizer(mock_db)
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    count = synth.synthesize(uuid.uuid4(), [a, b, a, c, b], {"batch_ts": "t"})
+
+    # 3 distinct entities -> 3 pairs -> 6 directed edges, no self-loops
+    assert count == 6
+    _, params = _call(mock_db)
+    assert all(f != t for f, t in zip(params["from_ids"], params["to_ids"]))
 
 def test_synthesize_requires_at_least_two_entities(mock_db):
     synth = EdgeSynthesizer(mock_db)
     count = synth.synthesize(uuid.uuid4(), [uuid.uuid4()], {})
     assert count == 0
     assert mock_db.add.call_count == 0
+    assert mock_db.execute.call_count == 0
@@ -0,0 +1,147 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from src.db.models import Entity
+from src.learn.entity_merge import EntityMergeCompactor, _squash
+
+
+def _entity(name, aliases=None, seen=None, indexed=False):
+    eid = uuid.uuid4()
+    return Entity(
+        id=eid, project_id=uuid.uuid4(), type="tool", canonical_name=name,
+        aliases=aliases or [], confidence=0.5,
+        first_seen_at=seen or datetime(2026, 1, 1), last_seen_at=seen or datetime(2026, 1, 1),
+        embedding_ref=str(eid) if indexed else None
+    )
+
+
+def _compactor(entities, collisions=(), index=None):
+    """
+    Compactor over an in-memory project: key collisions are given, the scan
+    yields the entities in (type, key) order and loads come from the list.
+    """
+    compactor = EntityMergeCompactor(MagicMock(), vector_index=index)
+    by_id = {str(e.id): e for e in entities}
+    compactor._key_collisions = MagicMock(return_value=[[e.id for e in group] for group in collisions])
+    compactor._scan = MagicMock(return_value=sorted(entities, key=lambda e: (e.type, _squash(e.canonical_name))))
+    compactor._load = MagicMock(side_effect=lambda ids: [by_id[i] for i in ids])
+    return compactor
+
+
+def test_find_candidates_groups_by_alias_name_and_embedding():
+    postgres = _entity("Postgres", seen=datetime(2025, 1, 1))
+    pg_alias = _entity("pg", aliases=["postgres"])
+    pg_spelling = _entity("Postgre-SQL", indexed=True)
+    postgresql = _entity("PostgreSQL", indexed=True)
+    redis = _entity("Redis")
+    index = MagicMock()
+    index.similar_pairs.return_value = [(str(postgresql.id), str(postgres.id), 0.93)]
+    compactor = _compactor([postgres, pg_alias, pg_spelling, postgresql, redis],
+                           collisions=[[postgres, pg_alias], [pg_spelling, postgresql]], index=index)
+    compactor.db.execute.return_value.all.return_value = [
+        SimpleNamespace(id=postgres.id, type="tool", canonical_name="Postgres")
+    ]
+
+    candidates = compactor.find_candidates(uuid.uuid4())
+
+    assert len(candidates) == 1
+    survivor, duplicates = candidates[0]
+    assert survivor is postgres  # oldest wins
+    assert {d.canonical_name for d in duplicates} == {"pg", "Postgre-SQL", "PostgreSQL"}
+    # Only the entities of candidate groups are loaded
+    assert len(compactor._load.call_args.args[0]) == 4
+
+
+def test_merge_key_keeps_symbols_and_versions_apart():
+    assert {_squash(n) for n in ["C", "C++", "C#"]} == {"c", "c++", "c#"}
+    assert _squash("Kubernetes-1.27") == "kubernetes1.27" and _squash("Postgre SQL") == "postgresql"
+
+    names = ["C", "C++", "C#", "prod-db-server-01", "prod-db-server-02", "kubernetes-1.27",
+             "kubernetes-1.28", "release-2024.10.1", "release-2024.10.2"]
+    assert _compactor([_entity(n) for n in names]).find_candidates(uuid.uuid4()) == []
+
+
+def test_near_identical_names_of_different_types_are_not_merged():
+    tool, concept = _entity("Kubernetes"), _entity("Kubernets")
+    concept.type = "concept"
+    assert _compactor([tool, concept]).find_candidates(uuid.uuid4()) == []
+
+    same = _entity("Kubernets")
+    assert len(_compactor([tool, same]).find_candidates(uuid.uuid4())) == 1
+
+
+def test_embedding_pairs_need_same_type_and_numbers():
+    a, b = _entity("server-01", indexed=True), _entity("server-02", indexed=True)
+    index = MagicMock()
+    index.similar_pairs.return_value = [(str(a.id), str(b.id), 0.99)]
+    assert _compactor([a, b], index=index).find_candidates(uuid.uuid4()) == []
+
+
+def test_key_collisions_group_per_type_in_postgres():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = []
+    EntityMergeCompactor(db)._key_collisions(uuid.uuid4())
+    sql = str(db.execute.call_args.args[0])
+    assert "jsonb_array_elements_text" in sql and "GROUP BY type, key" in sql
+    assert "'[^a-z0-9+#.]+'" in sql
+
+
+def test_dry_run_reports_without_merging():
+    db = MagicMock()
+    compactor = EntityMergeCompactor(db)
+    compactor.find_candidates = MagicMock(return_value=[(_entity("a"), [_entity("b"), _entity("c")])])
+    compactor.merge = MagicMock()
+
+    assert compactor.compact_project(uuid.uuid4(), dry_run=True) == 2
+    compactor.merge.assert_not_called()
+    db.commit.assert_not_called()
+
+
+def test_merge_rewrites_graph_and_folds_aliases():
+    db = MagicMock()
+    db.execute.return_value.scalars.return_value.all.return_value = [uuid.uuid4()]
+    survivor = _entity("Postgres")
+    dup = _entity("PostgreSQL", aliases=["psql"])
+    dup.confidence = 0.9
+
+    EntityMergeCompactor(db).merge(uuid.uuid4(), survivor, [dup])
+
+    sql = [str(c.args[0]) for c in db.execute.call_args_list]
+    assert "INSERT INTO relations" in sql[0] and "sum(strength)" in sql[0]
+    assert "DELETE FROM relations" in sql[1]
+    assert "subject_entity_id" in sql[2] and "object_entity_id" in sql[3]
+    assert "DELETE FROM entities" in sql[4]
+    assert db.execute.call_args_list[4].args[1]["losers"] == [str(dup.id)]
+    assert survivor.aliases == ["PostgreSQL", "psql"]
+    assert survivor.confidence == 0.9
+    db.commit.assert_not_called()
+
+
+def test_compact_project_commits_per_chunk_and_drops_vectors():
+    db = MagicMock()
+    index = MagicMock()
+    compactor = EntityMergeCompactor(db, vector_index=index)
+    groups = [(_entity(f"a{i}"), [_entity(f"b{i}")]) for i in range(5)]
+    compactor.find_candidates = MagicMock(return_value=groups)
+    compactor.merge = MagicMock()
+
+    removed = compactor.compact_project(uuid.uuid4(), chunk_size=2, throttle_seconds=0)
+
+    assert removed == 5
+    assert compactor.merge.call_count == 5
+    assert db.commit.call_count == 3
+    assert index.delete.call_count == 3
+
+
+def test_entity_reindex_rejects_malformed_project_id():
+    from fastapi.testclient import TestClient
+    from main import app
+    from src.db.session import get_db, get_qdrant
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    app.dependency_overrides[get_qdrant] = lambda: MagicMock()
+    try:
+        response = TestClient(app).post("/api/admin/entities/reindex", params={"project_id": "not-a-uuid"})
+    finally:
+        app.dependency_overrides = {}
+    assert response.status_code == 400
@@ -0,0 +1,117 @@
+import json
+import uuid
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+KEY = "sk-bulk-test"
+
+
+@pytest.fixture(autouse=True)
+def override_dependency(db_session, project):
+    from src.db.session import get_db, get_qdrant
+    api_key_mock = MagicMock(key=KEY, project_id=project.id, is_active=True)
+    db_session.query.return_value.filter.return_value.first.return_value = api_key_mock
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_qdrant] = lambda: MagicMock()
+    yield
+    app.dependency_overrides = {}
+
+
+def _stored(records, commit=True):
+    return [MagicMock(id=uuid.uuid4()) for _ in records]
+
+
+def test_bulk_ingest_streams_ndjson_in_chunks(db_session, project):
+    lines = [json.dumps({"text": f"message {n}", "source": "chatgpt_export"}) for n in range(5)]
+    lines.insert(2, "{not json")
+    lines.insert(4, json.dumps({"text": "other project", "project_id": "someone-else"}))
+    body = "\n".join(lines) + "\n"
+
+    with patch("src.server.episodic_api.IngressAgent") as MockAgent, \
+         patch("src.server.episodic_api.enqueue_condensation") as mock_enqueue, \
+         patch("src.server.episodic_api.EPISODIC_BULK_CHUNK", 2):
+        MockAgent.return_value.process_memories.side_effect = _stored
+        response = client.post(
+            "/api/v1/episodic/bulk",
+            content=body.encode(),
+            headers={"Authorization": f"Bearer {KEY}", "Content-Type": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["stored"] == 5 and data["rejected"] == 2
+    assert [e["line"] for e in data["errors"]] == [3, 5]
+    # One id per line, None for the rejected ones
+    assert [i is None for i in data["ids"]] == [False, False, True, False, True, False, False]
+
+    # 5 valid records in chunks of 2 -> 3 batched stores, each queued for condensation
+    chunks = [c.args[0] for c in MockAgent.return_value.process_memories.call_args_list]
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert all(r.project_id == project.id for c in chunks for r in c)
+    assert mock_enqueue.call_count == 3
+    # Items and their queue rows are committed together
+    assert MockAgent.return_value.index_pending.call_count == 3
+    assert all(c.kwargs["commit"] is False for c in MockAgent.return_value.process_memories.call_args_list)
+    assert all(c.kwargs["commit"] is False for c in mock_enqueue.call_args_list)
+
+
+def test_bulk_ingest_reports_failed_chunk(db_session):
+    body = "\n".join(json.dumps({"text": f"m{n}"}) for n in range(3))
+
+    with patch("src.server.episodic_api.IngressAgent") as MockAgent, \
+         patch("src.server.episodic_api.enqueue_condensation"):
+        MockAgent.return_value.process_memories.side_effect = RuntimeError("qdrant down")
+        response = client.post(
+            "/api/v1/episodic/bulk",
+            content=body.encode(),
+            headers={"Authorization": f"Bearer {KEY}"},
+        )
+
+    data = response.json()
+    assert data["stored"] == 0 and data["rejected"] == 3
+    assert data["ids"] == [None, None, None]
+    db_session.rollback.assert_called()
+
+
+def test_bulk_ingest_rolls_back_chunk_when_queueing_fails(db_session):
+    body = "\n".join(json.dumps({"text": f"m{n}"}) for n in range(2))
+
+    with patch("src.server.episodic_api.IngressAgent") as MockAgent, \
+         patch("src.server.episodic_api.enqueue_condensation") as mock_enqueue:
+        MockAgent.return_value.process_memories.side_effect = _stored
+        mock_enqueue.side_effect = RuntimeError("queue insert failed")
+        response = client.post(
+            "/api/v1/episodic/bulk",
+            content=body.encode(),
+            headers={"Authorization": f"Bearer {KEY}"},
+        )
+
+    # Nothing was committed, so the lines are reported failed and can be resent
+    data = response.json()
+    assert data["stored"] == 0 and data["ids"] == [None, None]
+    assert [e["line"] for e in data["errors"]] == [1, 2]
+    db_session.commit.assert_not_called()
+    db_session.rollback.assert_called()
+    # The chunk's vectors are dropped with it
+    MockAgent.return_value.discard_pending.assert_called()
+    MockAgent.return_value.index_pending.assert_not_called()
+
+
+def test_single_item_endpoint_for_sdk_add_item(db_session):
+    with patch("src.server.episodic_api.IngressAgent") as MockAgent, \
+         patch("src.server.episodic_api.enqueue_condensation") as mock_enqueue:
+        item_id = uuid.uuid4()
+        MockAgent.return_value.process_memory.return_value = MagicMock(id=item_id)
+        response = client.post(
+            "/api/v1/episodic",
+            json={"text": "hello", "source": "api"},
+            headers={"Authorization": f"Bearer {KEY}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"id": str(item_id)}
+    mock_enqueue.assert_called_once()
@@ -0,0 +1,89 @@
+import gzip
+import json
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.engine import export
+
+client = TestClient(app)
+
+ITEMS = sorted(
+    ({"id": uuid.uuid4(), "text": f"item {n}", "source": "api",
+      "occurred_at": datetime(2026, 1, 1), "created_at": datetime(2026, 1, 1)} for n in range(3)),
+    key=lambda r: r["id"],
+)
+ASSERTIONS = [{"id": uuid.uuid4(), "subject_text": "user", "predicate": "prefers", "object_text": "tea",
+               "confidence": 0.9, "status": "approved", "provenance": [],
+               "evidence": [{"episodic_id": str(ITEMS[0]["id"]), "quote": "tea"}]}]
+
+
+class FakeConn:
+    """
+    Streams the rows after :after for each export query, recording the
+    execution options used.
+    """
+    def __init__(self):
+        self.options = []
+        self.calls = []
+
+    def execution_options(self, **options):
+        self.options.append(options)
+        return self
+
+    def execute(self, sql, params):
+        self.calls.append(params)
+        rows = ITEMS if sql is export._ITEMS_SQL else ASSERTIONS
+        after = params["after"]
+        result = MagicMock()
+        result.mappings.return_value = [r for r in rows if after is None or str(r["id"]) > after]
+        return result
+
+
+@pytest.fixture
+def conn():
+    from src.db.session import get_db
+    fake = FakeConn()
+    db = MagicMock()
+    db.get_bind.return_value.connect.return_value.__enter__.return_value = fake
+    app.dependency_overrides[get_db] = lambda: db
+    yield fake
+    app.dependency_overrides = {}
+
+
+def test_export_streams_items_then_assertions_over_server_side_cursors(conn):
+    response = client.get("/v1/export/jsonl", params={"project_id": str(uuid.uuid4())})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-jsonlines")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["episodic_item"] * 3 + ["assertion"]
+    assert lines[-1]["evidence"][0]["quote"] == "tea"
+    assert all(o["stream_results"] and o["yield_per"] == export.EXPORT_YIELD_PER for o in conn.options)
+
+
+def test_export_resumes_after_cursor(conn):
+    pid = str(uuid.uuid4())
+    lines = [json.loads(line) for line in client.get("/v1/export/jsonl", params={"project_id": pid}).text.splitlines()]
+
+    resumed = client.get("/v1/export/jsonl", params={"project_id": pid, "cursor": lines[1]["cursor"]})
+
+    assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == [line["id"] for line in lines[2:]]
+
+
+def test_export_gzip_round_trips(conn):
+    response = client.get("/v1/export/jsonl", params={"project_id": str(uuid.uuid4()), "compression": "gzip"})
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.jsonl.gz"')
+    assert len(gzip.decompress(response.content).splitlines()) == 4
+
+
+def test_export_rejects_bad_cursor_and_compression(conn):
+    pid = str(uuid.uuid4())
+    assert client.get("/v1/export/jsonl", params={"project_id": pid, "cursor": "nope"}).status_code == 400
+    assert client.get("/v1/export/jsonl", params={"project_id": pid, "compression": "lz4"}).status_code == 400
@@ -33,8 +33,11 @@ def test_run_job_success(mock_db):
     # Configure mock query to return job
     mock_db.query.return_value.filter.return_value.first.return_value = job
     
-    # Mock Connector
-    with patch("src.ingest.service.CONNECTORS") as mock_connectors:
+    # Mock Connector (and the embed/condense stages downstream of it)
+    with patch("src.ingest.service.CONNECTORS") as mock_connectors, \
+         patch("src.ingest.service.IngestStages") as MockStages:
+        MockStages.return_value.embed.return_value = [uuid.uuid4()]
+        MockStages.return_value.enqueue.return_value = 1
         mock_conn = MagicMock()
         mock_connectors.get.return_value = mock_conn
         
@@ -1,49 +1,149 @@
-
+import asyncio
 import pytest
 import uuid
-import time
-import sys
+import threading
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 from sqlalchemy.orm import Session
 from src.db.models import IngestJob
+from src.ingest.connectors.base import Connector
+
 
 @pytest.fixture
 def mock_db():
     return MagicMock(spec=Session)
 
-def test_run_job_is_async(mock_db):
-    # Setup
-    job_id = uuid.uuid4()
-    job = IngestJob(id=job_id, source_type="web", source_config={"url": "http://example.com"})
+
+class TrickleConnector(Connector):
+    """Serves URLs one by one, waiting until told the first item was queued."""
+
+    def __init__(self, count, first_queued: threading.Event):
+        self.count = count
+        self.first_queued = first_queued
+        self.queued_before_last_fetch = False
+
+    def discover(self, config):
+        return [{"url": f"http://a.test/{i}"} for i in range(self.count)]
+
+    def fetch(self, config, item_ref):
+        raise AssertionError("sync fetch should not be used")
+
+    async def afetch(self, config, item_ref, client):
+        if item_ref["url"].endswith(f"/{self.count - 1}"):
+            # Last page: give the downstream stages time to catch up
+            for _ in range(200):
+                if self.first_queued.is_set():
+                    self.queued_before_last_fetch = True
+                    break
+                await asyncio.sleep(0.01)
+        return [(item_ref["url"], item_ref["url"].encode(), {})]
+
+
+def test_run_job_streams_artifacts_into_condensation(mock_db):
+    from src.ingest.service import IngestService
+
+    job = IngestJob(id=uuid.uuid4(), project_id=uuid.uuid4(), source_type="web", source_config={})
     mock_db.query.return_value.filter.return_value.first.return_value = job
-    
-    # Mock connector to return immediately with some data
-    mock_connector = MagicMock()
-    mock_connector.discover.return_value = ["ref1"]
-    mock_connector.fetch.return_value = [("http://example.com", b"content", {})]
-    
-    # Use patch.dict to avoid leaking to other tests
-    with patch.dict(sys.modules, {
-        'src.agents.ingress': MagicMock(),
-        'qdrant_client': MagicMock()
-    }):
-        # Delay import of service to ensure mocks apply
-        from src.ingest.service import IngestService
-        service = IngestService(mock_db)
-        
-        with patch("src.ingest.service.CONNECTORS", {"web": mock_connector}):
-            with patch("src.ingest.service.threading.Thread") as MockThread:
-                # Execute
-                start_time = time.time()
-                run = service.run_job(job_id)
-                end_time = time.time()
-                
-                # Verify
-                assert (end_time - start_time) < 1.0, "run_job took too long, arguably blocking"
-                assert run.status == "completed" # Ingestion part is completed
-                
-                # Verify thread was started for condensation
-                MockThread.assert_called_once()
-                _, kwargs = MockThread.call_args
-                assert kwargs['target'] == service._run_condensation_task
-                MockThread.return_value.start.assert_called_once()
+    first_queued = threading.Event()
+    connector = TrickleConnector(count=5, first_queued=first_queued)
+
+    embedded, queued = [], []
+
+    def embed(batch):
+        embedded.append([a["source_uri"] for a in batch])
+        return [uuid.uuid4() for _ in batch]
+
+    def enqueue(item_ids, artifact_ids):
+        assert len(artifact_ids) == len(item_ids)
+        queued.append(item_ids)
+        first_queued.set()
+        return len(item_ids)
+
+    with patch("src.ingest.service.CONNECTORS", {"web": connector}), \
+         patch("src.ingest.service.INGEST_MICRO_BATCH", 1), \
+         patch("src.ingest.service.IngestStages") as MockStages:
+        MockStages.return_value.embed.side_effect = embed
+        MockStages.return_value.enqueue.side_effect = enqueue
+        run = IngestService(mock_db).run_job(job.id)
+
+    assert run.status == "completed"
+    # The first memories were queued for condensation while the crawl was still running
+    assert connector.queued_before_last_fetch
+    assert sorted(u for batch in embedded for u in batch) == sorted(f"http://a.test/{i}" for i in range(5))
+    assert sum(len(b) for b in queued) == 5
+    assert run.stats["embedded"] == 5 and run.stats["queued"] == 5
+    MockStages.return_value.close.assert_called_once()
+
+
+def test_run_job_is_partial_when_queueing_fails(mock_db):
+    from src.ingest.service import IngestService
+
+    job = IngestJob(id=uuid.uuid4(), project_id=uuid.uuid4(), source_type="web", source_config={})
+    mock_db.query.return_value.filter.return_value.first.return_value = job
+    connector = TrickleConnector(count=2, first_queued=threading.Event())
+
+    with patch("src.ingest.service.CONNECTORS", {"web": connector}), \
+         patch("src.ingest.service.IngestStages") as MockStages:
+        MockStages.return_value.embed.side_effect = lambda batch: [uuid.uuid4() for _ in batch]
+        MockStages.return_value.enqueue.side_effect = RuntimeError("queue down")
+        run = IngestService(mock_db).run_job(job.id)
+
+    # Embedded but never queued: the artifacts stay unqueued for the next run
+    assert run.status == "partially_failed"
+    assert run.stats["embedded"] == 2 and run.stats["queued"] == 0
+    assert "queue down" in run.error_log
+
+
+def test_run_job_refeeds_artifacts_earlier_runs_did_not_queue(mock_db):
+    from src.db.models import FetchedArtifact
+    from src.ingest.service import IngestService
+
+    job = IngestJob(id=uuid.uuid4(), project_id=uuid.uuid4(), source_type="web", source_config={})
+    mock_db.query.return_value.filter.return_value.first.return_value = job
+    unembedded = FetchedArtifact(id=uuid.uuid4(), source_uri="http://a.test/old", content="old")
+    embedded = FetchedArtifact(id=uuid.uuid4(), source_uri="http://a.test/mid", content="mid",
+                               embedded_at=datetime(2026, 1, 1))
+    item_id = uuid.uuid4()
+    leftovers = mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value
+    leftovers.all.return_value = [unembedded, embedded]
+    mock_db.query.return_value.filter.return_value.all.return_value = [(item_id, str(embedded.id))]
+    queued = []
+
+    with patch("src.ingest.service.CONNECTORS", {"web": TrickleConnector(0, threading.Event())}), \
+         patch("src.ingest.service.IngestStages") as MockStages:
+        MockStages.return_value.embed.side_effect = lambda batch: [uuid.uuid4() for _ in batch]
+        MockStages.return_value.enqueue.side_effect = lambda ids, artifact_ids: queued.extend(artifact_ids) or len(ids)
+        run = IngestService(mock_db).run_job(job.id)
+
+    # The un-embedded artifact is embedded again; the embedded one reuses its item
+    embedded_uris = [a["source_uri"] for c in MockStages.return_value.embed.call_args_list for a in c.args[0]]
+    assert embedded_uris == ["http://a.test/old"]
+    assert sorted(queued) == sorted([unembedded.id, embedded.id])
+    assert run.status == "completed" and run.stats["resumed"] == 2 and run.stats["queued"] == 2
+
+
+def test_micro_batches_apply_backpressure():
+    from src.ingest.pipeline import micro_batches, END_OF_STREAM
+
+    async def run():
+        queue = asyncio.Queue(maxsize=2)
+        produced = []
+
+        async def producer():
+            for i in range(6):
+                await queue.put(i)
+                produced.append(i)
+            await queue.put(END_OF_STREAM)
+
+        task = asyncio.create_task(producer())
+        await asyncio.sleep(0.01)
+        # Consumer hasn't started: the producer is blocked on the full queue
+        stalled_at = len(produced)
+        batches = [b async for b in micro_batches(queue, batch_size=4)]
+        await task
+        return stalled_at, batches
+
+    stalled_at, batches = asyncio.run(run())
+    assert stalled_at == 2
+    assert [i for b in batches for i in b] == list(range(6))
+    assert all(len(b) <= 4 for b in batches)
@@ -0,0 +1,138 @@
+import asyncio
+import time
+import uuid
+import pytest
+from unittest.mock import MagicMock, patch
+from src.db.models import IngestJob
+from src.ingest.connectors.base import Connector
+from src.ingest.fetcher import fetch_concurrently, HostRateLimiter
+
+
+class SlowConnector(Connector):
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.in_flight = 0
+        self.peak = 0
+
+    def discover(self, config):
+        return [{"url": u} for u in config["urls"]]
+
+    def fetch(self, config, item_ref):
+        raise AssertionError("sync fetch should not be used")
+
+    async def afetch(self, config, item_ref, client):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if item_ref["url"] in self.fail:
+            raise RuntimeError("404")
+        return [(item_ref["url"], b"body", {})]
+
+    def rate_limit_key(self, item_ref):
+        return item_ref["url"].split("/")[2]
+
+    def item_uri(self, item_ref):
+        return item_ref["url"]
+
+
+async def _collect(connector, refs, **kwargs):
+    return [r async for r in fetch_concurrently(connector, {}, refs, client=MagicMock(), **kwargs)]
+
+
+def test_fetches_concurrently_with_bounded_parallelism():
+    connector = SlowConnector(delay=0.05)
+    refs = [{"url": f"http://host{i}.test/page"} for i in range(20)]
+
+    start = time.monotonic()
+    results = asyncio.run(_collect(connector, refs, concurrency=5, host_rate=0))
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 20 and all(err is None for _, _, err in results)
+    assert connector.peak == 5
+    assert elapsed < 20 * 0.05 / 2  # far less than fetching one at a time
+
+
+def test_host_rate_limiter_spaces_same_host_only():
+    async def run():
+        limiter = HostRateLimiter(rate_per_second=20)  # 50ms apart
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire("a.test") for _ in range(3)), limiter.acquire("b.test"))
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.09 <= elapsed < 0.5
+
+
+def test_run_job_records_partial_failures():
+    from src.ingest.service import IngestService
+    db = MagicMock()
+    job = IngestJob(id=uuid.uuid4(), source_type="web",
+                    source_config={"urls": ["http://a.test/1", "http://a.test/2"]})
+    db.query.return_value.filter.return_value.first.return_value = job
+    connector = SlowConnector(delay=0, fail={"http://a.test/2"})
+
+    with patch("src.ingest.service.CONNECTORS", {"web": connector}), \
+         patch("src.ingest.service.IngestStages"):
+        run = IngestService(db).run_job(job.id)
+
+    assert run.status == "partially_failed"
+    assert run.stats["fetched"] == 1 and run.stats["failed"] == 1
+    assert "http://a.test/2" in run.error_log
+
+
+def test_web_connector_sends_validators_and_handles_304():
+    import httpx
+    from src.ingest.connectors.web import WebURLConnector
+    seen = {}
+
+    def handler(request):
+        seen.update(request.headers)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<title>Hi</title>", headers={"ETag": '"v1"'})
+
+    async def run():
+        connector = WebURLConnector()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await connector.afetch({}, {"url": "http://a.test/"}, client)
+            second = await connector.afetch({}, {"url": "http://a.test/", "validators": {"etag": '"v1"'}}, client)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first[0][2]["etag"] == '"v1"'
+    assert second == []
+    assert seen["if-none-match"] == '"v1"'
+
+
+def test_run_job_skips_unchanged_content_and_saves_validators():
+    import hashlib
+    from src.ingest.service import IngestService
+    db = MagicMock()
+    job = IngestJob(id=uuid.uuid4(), source_type="web",
+                    source_config={"urls": ["http://a.test/1", "http://a.test/2"]})
+    db.query.return_value.filter.return_value.first.return_value = job
+    # Previous run stored /1 with the same body
+    db.execute.return_value.scalar.return_value = {"validators": {}}
+    db.execute.return_value.all.return_value = [("http://a.test/1", hashlib.sha256(b"body").hexdigest())]
+
+    class EtagConnector(SlowConnector):
+        async def afetch(self, config, item_ref, client):
+            return [(item_ref["url"], b"body" if item_ref["url"].endswith("1") else b"new", {"etag": "e1"})]
+
+    with patch("src.ingest.service.CONNECTORS", {"web": EtagConnector(delay=0)}), \
+         patch("src.ingest.service.IngestStages") as MockStages:
+        MockStages.return_value.embed.side_effect = lambda batch: [uuid.uuid4() for _ in batch]
+        MockStages.return_value.enqueue.side_effect = lambda item_ids, artifact_ids: len(item_ids)
+        run = IngestService(db).run_job(job.id)
+
+    assert run.status == "completed"
+    assert run.stats["unchanged"] == 1 and run.stats["fetched"] == 1
+    assert run.cursor["validators"]["http://a.test/1"]["etag"] == "e1"
+    # Only the changed page goes downstream
+    embedded = [a["source_uri"] for c in MockStages.return_value.embed.call_args_list for a in c.args[0]]
+    assert embedded == ["http://a.test/2"]
+    # Known hashes are looked up for the micro-batch's URIs, not the job's whole history
+    lookups = [str(c.args[0]) for c in db.execute.call_args_list if "content_hash" in str(c.args[0])]
+    assert lookups and all("fetched_artifacts.source_uri IN" in sql for sql in lookups)
@@ -36,7 +36,7 @@ def test_mcp_tool_call_store_memory(db_session, project):
     mock_item.id = str(uuid.uuid4())
 
     with patch("src.server.mcp.IngressAgent") as MockIngressAgent, \
-         patch("src.server.mcp.BackgroundTasks") as _:
+         patch("src.server.mcp.enqueue_condensation") as mock_enqueue:
         mock_agent_instance = MagicMock()
         mock_agent_instance.process_memory.return_value = mock_item
         MockIngressAgent.return_value = mock_agent_instance
@@ -57,6 +57,7 @@ def test_mcp_tool_call_store_memory(db_session, project):
 
     assert response.status_code == 200
     assert "Episodic Item stored" in response.json()["content"][0]["text"]
+    mock_enqueue.assert_called_once_with(db_session, project.id, [mock_item.id], coalesce=True)
 
 @pytest.fixture(autouse=True)
 def override_dependency(db_session):
@@ -0,0 +1,50 @@
+import hashlib
+import json
+import hmac
+import uuid
+
+from src.engine.merkle import merkle_root, merkle_proofs, verify_inclusion
+from src.engine.condenser import Condenser, KEY_SECRET
+
+
+def _hashes(n):
+    return [hashlib.sha256(f"item {i}".encode()).hexdigest() for i in range(n)]
+
+
+def test_every_leaf_proves_inclusion_for_odd_and_even_trees():
+    for n in (1, 2, 3, 5, 8, 13):
+        leaves = _hashes(n)
+        root, proofs = merkle_proofs(leaves)
+        assert root == merkle_root(leaves)
+        for leaf, proof in zip(leaves, proofs):
+            assert verify_inclusion(leaf, proof, root)
+            # Proofs stay logarithmic in the batch size
+            assert len(proof) <= max(1, (n - 1).bit_length())
+
+
+def test_tampering_is_detected():
+    leaves = _hashes(6)
+    root, proofs = merkle_proofs(leaves)
+    other = hashlib.sha256(b"forged").hexdigest()
+
+    assert not verify_inclusion(other, proofs[2], root)
+    assert not verify_inclusion(leaves[2], proofs[3], root)
+    # Round-tripped through JSONB the proof is a list of lists
+    assert verify_inclusion(leaves[4], json.loads(json.dumps(proofs[4])), root)
+    assert not verify_inclusion(leaves[4], [["X", "zz"]], root)
+    # Reordering inputs changes the root
+    assert merkle_root(list(reversed(leaves))) != root
+
+
+def test_condenser_signs_the_root_once():
+    condenser = Condenser.__new__(Condenser)
+    leaves = _hashes(4)
+    envelope, proofs = condenser._prepare_envelope(uuid.uuid4(), leaves)
+
+    payload = json.dumps({
+        "method": envelope.method, "model": envelope.model, "merkle_root": envelope.merkle_root,
+        "leaf_count": envelope.leaf_count, "timestamp": envelope.timestamp,
+    }, sort_keys=True).encode()
+    assert envelope.signature == hmac.new(KEY_SECRET, payload, hashlib.sha256).hexdigest()
+    assert envelope.leaf_count == 4 and len(proofs) == 4
+    assert all(verify_inclusion(h, p, envelope.merkle_root) for h, p in zip(leaves, proofs))
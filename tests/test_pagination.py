@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from main import app
+from src.db.models import Assertion, EpisodicItem
+from src.db.pagination import decode_cursor, encode_cursor, estimated_count, keyset_page
+
+client = TestClient(app)
+
+
+def _rows(n):
+    base = datetime(2026, 1, 1)
+    return [SimpleNamespace(id=uuid.uuid4(), occurred_at=base - timedelta(minutes=i)) for i in range(n)]
+
+
+def _compiled(db):
+    return str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+
+
+def test_keyset_page_returns_cursor_of_last_row_when_more_remain():
+    db = MagicMock()
+    rows = _rows(3)
+    db.execute.return_value.scalars.return_value.all.return_value = rows
+
+    page, next_cursor = keyset_page(db, select(EpisodicItem), EpisodicItem.occurred_at, EpisodicItem.id, 2)
+
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1].occurred_at, rows[1].id)
+    sql = _compiled(db)
+    assert "ORDER BY episodic_items.occurred_at DESC, episodic_items.id DESC" in sql
+    assert "LIMIT" in sql and "OFFSET" not in sql
+
+
+def test_keyset_page_continues_after_cursor_without_offset():
+    db = MagicMock()
+    db.execute.return_value.scalars.return_value.all.return_value = _rows(1)
+    cursor = encode_cursor(datetime(2026, 1, 1), uuid.uuid4())
+
+    page, next_cursor = keyset_page(db, select(EpisodicItem), EpisodicItem.occurred_at, EpisodicItem.id, 2, cursor)
+
+    assert len(page) == 1 and next_cursor is None
+    assert "(episodic_items.occurred_at, episodic_items.id) < (" in _compiled(db)
+
+
+def test_keyset_page_rejects_malformed_cursor():
+    with pytest.raises(ValueError):
+        keyset_page(MagicMock(), select(EpisodicItem), EpisodicItem.occurred_at, EpisodicItem.id, 10, "garbage")
+
+
+def test_estimated_count_reads_planner_rows():
+    db = MagicMock()
+    db.get_bind.return_value.dialect = postgresql.dialect()
+    db.execute.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 12345}}]
+
+    stmt = select(Assertion).where(Assertion.status == "pending_review")
+    assert estimated_count(db, stmt) == 12345
+    sql = str(db.execute.call_args.args[0])
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT") and "'pending_review'" in sql
+
+
+def test_estimated_count_failure_rolls_back_its_savepoint():
+    db = MagicMock()
+    db.get_bind.return_value.dialect = postgresql.dialect()
+    db.execute.side_effect = RuntimeError("permission denied")
+
+    assert estimated_count(db, select(Assertion)) is None
+    # The savepoint is exited with the error, which rolls it back
+    assert db.begin_nested.return_value.__exit__.call_args.args[0] is RuntimeError
+
+
+def test_learnings_page_on_first_seen_at():
+    from src.db.session import get_db
+    db = MagicMock()
+    db.get_bind.return_value.dialect = postgresql.dialect()
+    db.execute.return_value.scalars.return_value.all.return_value = []
+    db.execute.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 0}}]
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        data = client.get("/api/admin/learnings").json()
+    finally:
+        app.dependency_overrides = {}
+
+    assert data["learnings"] == [] and data["next_cursor"] is None
+    assert "ORDER BY assertions.first_seen_at DESC, assertions.id DESC" in _compiled(db)
+
+
+def test_pending_review_returns_cursor_and_estimate():
+    from src.db.session import get_db
+    db = MagicMock()
+    db.get_bind.return_value.dialect = postgresql.dialect()
+    first_seen = datetime(2026, 1, 1)
+    pending = [MagicMock(id=uuid.uuid4(), first_seen_at=first_seen, provenance=[]) for _ in range(3)]
+    db.execute.return_value.scalars.return_value.all.return_value = pending
+    db.execute.return_value.all.return_value = []
+    db.execute.return_value.scalar.return_value = [{"Plan": {"Plan Rows": 900}}]
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        data = client.get("/api/admin/review/assertions/pending", params={"limit": 2}).json()
+        bad = client.get("/api/admin/review/assertions/pending", params={"cursor": "nope"})
+    finally:
+        app.dependency_overrides = {}
+
+    assert len(data["assertions"]) == 2
+    assert decode_cursor(data["next_cursor"]) == (first_seen, pending[1].id)
+    assert data["estimated_total"] == 900
+    assert bad.status_code == 400
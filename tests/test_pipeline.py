@@ -5,6 +5,7 @@ from src.llm.schemas import ExtractionBundle, ExtractedEntity, ExtractedAssertio
 from src.learn.canonicalize import EntityCanonicalizer
 from src.learn.consolidate import KnowledgeConsolidator
 import uuid
+from sqlalchemy.dialects import postgresql
 
 @pytest.fixture
 def mock_db():
@@ -48,13 +49,78 @@ def test_consolidator(mock_db):
         )
     ]
     
-    # Mock no existing
-    mock_db.execute.return_value.scalars.return_value.first.return_value = None
-    
     con.consolidate(project_id, assertions, entity_map)
-    
-    # Verify add
-    assert mock_db.add.call_count == 1
-    args = mock_db.add.call_args[0][0]
-    assert isinstance(args, Assertion)
-    assert args.predicate == "knows"
+
+    # One batched upsert, no per-fact duplicate SELECT
+    assert mock_db.execute.call_count == 1
+    stmt = mock_db.execute.call_args[0][0]
+    assert "ON CONFLICT (project_id, fingerprint) DO UPDATE" in str(stmt.compile(dialect=postgresql.dialect()))
+    row = stmt.compile(dialect=postgresql.dialect()).params
+    assert row["predicate_m0"] == "knows"
+    assert row["subject_entity_id_m0"] == uuid.UUID(entity_map["Bob"])
+    mock_db.commit.assert_called_once()
+
+def test_canonicalizer_resolves_near_duplicates_by_vector(mock_db):
+    project_id = str(uuid.uuid4())
+    postgres = Entity(id=uuid.uuid4(), project_id=project_id, type="tool",
+                      canonical_name="Postgres", aliases=[], confidence=1.0)
+    mock_db.execute.return_value.scalars.return_value.all.return_value = [postgres]
+
+    index = MagicMock()
+    index.threshold = 0.9
+    index.embed.return_value = [[1.0, 0.0], [0.0, 1.0], [0.0, 1.0]]
+    # "PostgreSQL" hits the existing entity; the two Redis spellings are new
+    index.nearest.return_value = [(str(postgres.id), 0.95), None, None]
+
+    canon = EntityCanonicalizer(mock_db, vector_index=index)
+    extracted = [
+        ExtractedEntity(name="PostgreSQL", type="tool", aliases=[], confidence=0.9),
+        ExtractedEntity(name="Redis", type="tool", aliases=[], confidence=0.9),
+        ExtractedEntity(name="redis cache", type="tool", aliases=[], confidence=0.9),
+    ]
+    mapping = canon.resolve(project_id, extracted)
+
+    assert mapping["PostgreSQL"] == str(postgres.id)
+    assert "PostgreSQL" in postgres.aliases
+    # Second Redis spelling matches the entity created earlier in the batch
+    assert mapping["Redis"] == mapping["redis cache"]
+    index.embed.assert_called_once_with(["PostgreSQL", "Redis", "redis cache"])
+    indexed = index.upsert.call_args[0][1]
+    assert [e.canonical_name for e in indexed] == ["Redis"]
+
+def test_canonicalizer_falls_back_to_exact_when_index_fails(mock_db):
+    mock_db.execute.return_value.scalars.return_value.all.return_value = []
+    index = MagicMock()
+    index.embed.side_effect = RuntimeError("qdrant down")
+
+    canon = EntityCanonicalizer(mock_db, vector_index=index)
+    mapping = canon.resolve(str(uuid.uuid4()), [
+        ExtractedEntity(name="Alice", type="person", aliases=[], confidence=0.9)
+    ])
+
+    assert "Alice" in mapping
+    index.upsert.assert_not_called()
+
+def test_canonicalizer_plan_is_pure_and_apply_is_set_based(mock_db):
+    project_id = str(uuid.uuid4())
+    bob = Entity(id=uuid.uuid4(), project_id=project_id, type="person",
+                 canonical_name="Bob Smith", aliases=[], confidence=1.0)
+
+    canon = EntityCanonicalizer(mock_db)
+    plan = canon.plan(project_id, [
+        ExtractedEntity(name="Bob Smith", type="person", aliases=["Bobby"], confidence=1.0),
+        ExtractedEntity(name="Alice", type="person", aliases=[], confidence=0.9),
+    ], [bob])
+
+    # Planning never touches the session
+    assert mock_db.method_calls == []
+    assert plan.resolution["Bob Smith"] == str(bob.id)
+    assert [e.canonical_name for e in plan.new_entities] == ["Alice"]
+    assert plan.alias_additions == {str(bob.id): ["Bobby"]}
+
+    canon.apply(plan)
+    mock_db.add.assert_called_once_with(plan.new_entities[0])
+    # All alias appends go out as one UPDATE
+    assert mock_db.execute.call_count == 1
+    assert "jsonb_each" in str(mock_db.execute.call_args[0][0])
+    mock_db.commit.assert_not_called()
@@ -0,0 +1,123 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+from src.db.models import ProvenanceAudit, ProvenanceMismatch
+from src.engine.condenser import Condenser
+from src.engine.provenance import verify_rows, sign_envelope, text_hash
+from src.engine.provenance_audit import ProvenanceAuditor
+
+TEXTS = ["alpha", "beta", "gamma"]
+
+
+def _envelope():
+    envelope, proofs = Condenser.__new__(Condenser)._prepare_envelope(uuid.uuid4(), [text_hash(t) for t in TEXTS])
+    as_dict = {k: getattr(envelope, k) for k in
+               ("method", "model", "inputs", "merkle_root", "leaf_count", "timestamp", "signature")}
+    return {"id": str(envelope.id), **as_dict}, proofs
+
+
+def _row(assertion_id, text, proof, envelope, provenance=None):
+    return {"assertion_id": assertion_id, "provenance": provenance or [], "evidence_id": str(uuid.uuid4()),
+            "episodic_id": str(uuid.uuid4()), "proof": proof, "text": text, "envelope": envelope}
+
+
+def test_verify_rows_reports_each_kind_of_mismatch():
+    envelope, proofs = _envelope()
+    forged = dict(envelope, id=str(uuid.uuid4()), merkle_root="00" * 32)
+    legacy_payload = {"method": "llm-distillation", "model": "m", "inputs": [text_hash("old")], "timestamp": "t"}
+    legacy_ok = dict(legacy_payload, signature=sign_envelope(legacy_payload))
+    legacy_bad = dict(legacy_payload, signature="0" * 64)
+    legacy_stored = dict(legacy_ok, id=str(uuid.uuid4()), merkle_root=None, leaf_count=None)
+
+    rows = [
+        _row("a1", "alpha", proofs[0], envelope, provenance=[legacy_ok]),
+        _row("a1", "beta", proofs[1], envelope),
+        _row("a2", "gamma (edited)", proofs[2], envelope),
+        _row("a3", "beta", None, envelope),
+        _row("a4", None, proofs[0], envelope),
+        _row("a5", "alpha", proofs[0], forged, provenance=[legacy_bad]),
+        _row("a6", "old", None, legacy_stored),
+        _row("a7", "new", None, legacy_stored),
+    ]
+    found = [(m["assertion_id"], m["kind"]) for m in verify_rows(rows)]
+
+    assert found == [
+        ("a2", "input_hash"),
+        ("a3", "missing_proof"),
+        ("a4", "missing_item"),
+        ("a5", "envelope_signature"),  # inline legacy envelope
+        ("a5", "envelope_signature"),  # stored envelope with a forged root
+        ("a5", "input_hash"),
+        ("a7", "input_hash"),
+    ]
+
+
+def _audit(checkpoint=None):
+    return ProvenanceAudit(id=uuid.uuid4(), project_id=uuid.uuid4(), status="queued",
+                           stats={"assertions": 0, "evidence": 0, "mismatches": 0}, checkpoint=checkpoint)
+
+
+def _stream_rows(n_assertions):
+    envelope, proofs = _envelope()
+    ids = sorted(str(uuid.uuid4()) for _ in range(n_assertions))
+    rows = []
+    for n, aid in enumerate(ids):
+        rows.append(_row(aid, "alpha", proofs[0], envelope))
+        # every third assertion has a tampered second evidence row
+        rows.append(_row(aid, "beta" if n % 3 else "tampered", proofs[1], envelope))
+    return ids, rows
+
+
+def test_audit_checkpoints_each_chunk_and_records_mismatches_incrementally():
+    db = MagicMock()
+    audit = _audit()
+    db.get.return_value = audit
+    ids, rows = _stream_rows(5)
+    checkpoints = []
+    db.commit.side_effect = lambda: checkpoints.append(audit.checkpoint)
+
+    auditor = ProvenanceAuditor(db, workers=1, chunk_size=2)
+    with patch.object(auditor, "_stream", return_value=iter(rows)) as mock_stream:
+        auditor.run(audit.id)
+
+    mock_stream.assert_called_once_with(audit.project_id, None)
+    assert audit.status == "completed"
+    assert audit.stats == {"assertions": 5, "evidence": 10, "mismatches": 2}
+    # Chunks hold whole assertions; the checkpoint advances once per chunk
+    assert [str(c) for c in checkpoints if c] == [ids[1], ids[3], ids[4], ids[4]]
+    added = [c.args[0] for c in db.add.call_args_list]
+    assert all(isinstance(m, ProvenanceMismatch) and m.audit_id == audit.id for m in added)
+    assert sorted(str(m.assertion_id) for m in added) == [ids[0], ids[3]]
+
+
+def test_audit_resumes_after_checkpoint_and_skips_claimed_runs():
+    db = MagicMock()
+    checkpoint = uuid.uuid4()
+    audit = _audit(checkpoint)
+    db.get.return_value = audit
+
+    auditor = ProvenanceAuditor(db, workers=1)
+    with patch.object(auditor, "_stream", return_value=iter([])) as mock_stream:
+        auditor.run(audit.id)
+    mock_stream.assert_called_once_with(audit.project_id, checkpoint)
+    assert audit.status == "completed"
+
+    # Finished, or running with a fresh heartbeat: nothing to claim
+    db.execute.return_value.first.return_value = None
+    with patch.object(auditor, "_stream") as mock_stream:
+        assert auditor.run(audit.id) is None
+    mock_stream.assert_not_called()
+
+
+def test_audit_checks_chunks_in_worker_processes():
+    db = MagicMock()
+    audit = _audit()
+    db.get.return_value = audit
+    ids, rows = _stream_rows(6)
+
+    auditor = ProvenanceAuditor(db, workers=2, chunk_size=2)
+    with patch.object(auditor, "_stream", return_value=iter(rows)):
+        auditor.run(audit.id)
+
+    assert audit.status == "completed", audit.error_log
+    assert audit.stats["mismatches"] == 2 and str(audit.checkpoint) == ids[-1]
@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock, patch
+import src.db.qdrant as qdrant_module
+from src.db.qdrant import init_qdrant, episodic_collection, PAYLOAD_INDEXES
+
+
+def _fresh_client(existing=False, indexed=()):
+    client = MagicMock()
+    client.collection_exists.return_value = existing
+    client.get_collection.return_value.payload_schema = {f: MagicMock() for f in indexed}
+    return client
+
+
+def test_init_qdrant_creates_collections_and_payload_indexes():
+    client = _fresh_client()
+    with patch.object(qdrant_module, "_known_collections", set()):
+        init_qdrant(client)
+
+    created = {c.kwargs["collection_name"] for c in client.create_collection.call_args_list}
+    assert created == {"episodic_chunks", "semantic_assertions", "entity_names"}
+
+    indexed = {(c.kwargs["collection_name"], c.kwargs["field_name"]) for c in client.create_payload_index.call_args_list}
+    for field in ("project_id", "source", "item_id", "occurred_at"):
+        assert ("episodic_chunks", field) in indexed
+    # Only the tenant key on collections that never carry episodic fields
+    for name in ("semantic_assertions", "entity_names"):
+        assert {f for c, f in indexed if c == name} == {"project_id"}
+
+
+def test_init_qdrant_skips_existing_indexes():
+    client = _fresh_client(existing=True, indexed=PAYLOAD_INDEXES.keys())
+    with patch.object(qdrant_module, "_known_collections", set()):
+        init_qdrant(client)
+
+    client.create_collection.assert_not_called()
+    client.create_payload_index.assert_not_called()
+
+
+def test_dedicated_project_gets_own_collection():
+    with patch.object(qdrant_module, "QDRANT_DEDICATED_PROJECTS", {"big-tenant"}):
+        assert episodic_collection("big-tenant") == "episodic_chunks__bigtenant"
+        assert episodic_collection("small-tenant") == "episodic_chunks"
+
+
+def _collection_info(on_disk=False, m=16, ef_construct=100, quantization=None):
+    info = MagicMock()
+    info.config.params.vectors.on_disk = on_disk
+    info.config.hnsw_config.m = m
+    info.config.hnsw_config.ef_construct = ef_construct
+    info.config.quantization_config = quantization
+    return info
+
+
+def test_apply_storage_config_noop_when_in_sync():
+    client = MagicMock()
+    client.get_collection.return_value = _collection_info()
+    with patch.object(qdrant_module, "QDRANT_QUANTIZATION", "none"), \
+         patch.object(qdrant_module, "QDRANT_ON_DISK", False):
+        assert qdrant_module.apply_storage_config(client, "episodic_chunks") is False
+    client.update_collection.assert_not_called()
+
+
+def test_apply_storage_config_enables_quantization_in_place():
+    from qdrant_client.http import models
+    client = MagicMock()
+    client.get_collection.return_value = _collection_info()
+    with patch.object(qdrant_module, "QDRANT_QUANTIZATION", "scalar"), \
+         patch.object(qdrant_module, "QDRANT_ON_DISK", True):
+        assert qdrant_module.apply_storage_config(client, "episodic_chunks") is True
+        assert qdrant_module.search_params().quantization.rescore is True
+
+    kwargs = client.update_collection.call_args.kwargs
+    assert isinstance(kwargs["quantization_config"], models.ScalarQuantization)
+    assert kwargs["vectors_config"][""].on_disk is True
+
+
+def test_managed_collections_covers_base_and_project_collections():
+    client = MagicMock()
+    names = ["episodic_chunks", "episodic_chunks__bigtenant", "semantic_assertions", "entity_names", "unrelated"]
+    collections = []
+    for name in names:
+        c = MagicMock()
+        c.name = name
+        collections.append(c)
+    client.get_collections.return_value.collections = collections
+
+    assert qdrant_module.managed_collections(client) == names[:-1]
@@ -0,0 +1,200 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.db.models import ReplayPartition, ReplayRun
+from src.engine import replay
+
+
+def _sql(db):
+    return [str(c.args[0]) for c in db.execute.call_args_list]
+
+
+def test_create_run_copies_semantic_tables_into_a_shadow_schema():
+    db = MagicMock()
+    pid = uuid.uuid4()
+
+    run = replay.create_run(db, [pid], note="model upgrade")
+
+    sql = _sql(db)
+    assert run.shadow_schema.startswith("replay_")
+    assert sql[0] == f"CREATE SCHEMA {run.shadow_schema}"
+    assert sql[1:7] == [f"CREATE TABLE {run.shadow_schema}.{t} (LIKE {t} INCLUDING ALL)" for t in replay.SHADOW_TABLES]
+    assert "INSERT INTO replay_partitions" in sql[7]
+    assert db.execute.call_args.args[1]["pids"] == [str(pid)]
+    db.commit.assert_called_once()
+
+
+def _items(start, n):
+    base = datetime(2026, 1, 1)
+    return [SimpleNamespace(id=uuid.uuid4(), occurred_at=base + timedelta(minutes=start + i)) for i in range(n)]
+
+
+def _worker(db):
+    return replay.ReplayWorker(uuid.uuid4(), worker_id="w1", session_factory=lambda: db,
+                               shadow_session_factory=lambda: MagicMock(), batch_size=2)
+
+
+def test_worker_replays_in_batches_and_checkpoints_each_one():
+    db = MagicMock()
+    part = SimpleNamespace(id=uuid.uuid4(), project_id=uuid.uuid4(), checkpoint_at=None, checkpoint_id=None)
+    batches = [_items(0, 2), _items(2, 1), []]
+    seen_after = []
+
+    def next_items(_db, _pid, after_at, after_id, limit):
+        seen_after.append(after_id)
+        return batches.pop(0)
+
+    condenser = MagicMock()
+    condenser.distill = AsyncMock()
+    with patch.object(replay, "claim_partition", return_value=part), \
+         patch.object(replay, "next_items", side_effect=next_items), \
+         patch.object(replay, "advance", return_value=True) as advance, \
+         patch.object(replay, "finish") as finish, \
+         patch("src.engine.condenser.Condenser", return_value=condenser) as cls:
+        first, second = batches[0], batches[1]
+        assert _worker(db).run_once() == 3
+
+    assert cls.call_args.kwargs == {"index_vectors": False}
+    assert [c.args[1] for c in condenser.distill.call_args_list] == [first, second]
+    # Each batch resumes after the previous batch's last item
+    assert seen_after == [None, first[-1].id, second[-1].id]
+    assert [c.args[3] for c in advance.call_args_list] == [first[-1], second[-1]]
+    finish.assert_called_once_with(db, part.id, "w1")
+
+
+def test_worker_resumes_from_checkpoint_and_stops_when_lease_is_lost():
+    db = MagicMock()
+    checkpoint = _items(0, 1)[0]
+    part = SimpleNamespace(id=uuid.uuid4(), project_id=uuid.uuid4(),
+                           checkpoint_at=checkpoint.occurred_at, checkpoint_id=checkpoint.id)
+    condenser = MagicMock()
+    condenser.distill = AsyncMock()
+    with patch.object(replay, "claim_partition", return_value=part), \
+         patch.object(replay, "next_items", return_value=_items(1, 2)) as next_items, \
+         patch.object(replay, "advance", return_value=False), \
+         patch.object(replay, "finish") as finish, \
+         patch("src.engine.condenser.Condenser", return_value=condenser):
+        _worker(db).run_once()
+
+    assert next_items.call_args.args[2:4] == (checkpoint.occurred_at, checkpoint.id)
+    assert condenser.distill.await_count == 1
+    finish.assert_not_called()
+
+
+def test_worker_releases_partition_for_retry_on_failure():
+    db = MagicMock()
+    part = SimpleNamespace(id=uuid.uuid4(), project_id=uuid.uuid4(), checkpoint_at=None, checkpoint_id=None)
+    condenser = MagicMock()
+    condenser.distill = AsyncMock(side_effect=RuntimeError("llm down"))
+    with patch.object(replay, "claim_partition", return_value=part), \
+         patch.object(replay, "next_items", return_value=_items(0, 2)), \
+         patch.object(replay, "advance") as advance, \
+         patch.object(replay, "fail") as fail, \
+         patch("src.engine.condenser.Condenser", return_value=condenser):
+        assert _worker(db).run_once() == 0
+
+    advance.assert_not_called()
+    fail.assert_called_once_with(db, part.id, "w1", "llm down")
+
+
+def test_claim_partition_uses_skip_locked_lease():
+    db = MagicMock()
+    with patch.object(replay, "REPLAY_LEASE_SECONDS", 60):
+        replay.claim_partition(db, uuid.uuid4(), "w1")
+    sql, params = str(db.execute.call_args.args[0]), db.execute.call_args.args[1]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert (params["lease_until"] - params["now"]).total_seconds() == 60
+    db.commit.assert_called_once()
+
+
+def test_claim_partition_parks_partitions_whose_worker_kept_crashing():
+    db = MagicMock()
+    with patch.object(replay, "REPLAY_MAX_ATTEMPTS", 3):
+        replay.claim_partition(db, uuid.uuid4(), "w2")
+
+    park, claim = [c.args for c in db.execute.call_args_list]
+    assert "SET status = 'failed'" in str(park[0]) and "attempts >= :max_attempts" in str(park[0])
+    assert "(status = 'pending' OR attempts < :max_attempts)" in str(claim[0])
+    assert park[1]["max_attempts"] == claim[1]["max_attempts"] == 3
+
+
+def _slow_distill(seconds):
+    async def distill(project_id, items):
+        await asyncio.sleep(seconds)
+    return distill
+
+
+def test_heartbeat_renews_the_lease_while_a_batch_distills():
+    db = MagicMock()
+    part = SimpleNamespace(id=uuid.uuid4(), project_id=uuid.uuid4(), checkpoint_at=None, checkpoint_id=None)
+    condenser = MagicMock()
+    condenser.distill = AsyncMock(side_effect=_slow_distill(0.2))
+    with patch.object(replay, "REPLAY_HEARTBEAT_SECONDS", 0.02), \
+         patch.object(replay, "claim_partition", return_value=part), \
+         patch.object(replay, "next_items", side_effect=[_items(0, 2), []]), \
+         patch.object(replay, "renew_lease", return_value=True) as renew, \
+         patch.object(replay, "advance", return_value=True), \
+         patch.object(replay, "finish"), \
+         patch("src.engine.condenser.Condenser", return_value=condenser):
+        assert _worker(db).run_once() == 2
+
+    assert renew.call_count >= 2
+    assert all(c.args[1:] == (part.id, "w1") for c in renew.call_args_list)
+
+
+def test_worker_stops_without_checkpoint_when_heartbeat_loses_the_lease():
+    db = MagicMock()
+    part = SimpleNamespace(id=uuid.uuid4(), project_id=uuid.uuid4(), checkpoint_at=None, checkpoint_id=None)
+    condenser = MagicMock()
+    condenser.distill = AsyncMock(side_effect=_slow_distill(0.1))
+    with patch.object(replay, "REPLAY_HEARTBEAT_SECONDS", 0.02), \
+         patch.object(replay, "claim_partition", return_value=part), \
+         patch.object(replay, "next_items", return_value=_items(0, 2)), \
+         patch.object(replay, "renew_lease", return_value=False), \
+         patch.object(replay, "advance") as advance, \
+         patch("src.engine.condenser.Condenser", return_value=condenser):
+        assert _worker(db).run_once() == 0
+
+    assert condenser.distill.await_count == 1
+    advance.assert_not_called()
+
+
+def _cutover_db(status="done"):
+    db = MagicMock()
+    run = ReplayRun(id=uuid.uuid4(), shadow_schema="replay_abc", status="running", created_at=datetime(2026, 1, 1))
+    part = ReplayPartition(id=uuid.uuid4(), run_id=run.id, project_id=uuid.uuid4(), status=status,
+                           checkpoint_at=datetime(2026, 1, 2), checkpoint_id=uuid.uuid4())
+    db.get.return_value = run
+    db.execute.return_value.scalar_one_or_none.return_value = part
+    db.execute.return_value.scalars.return_value.all.return_value = []
+    return db, run, part
+
+
+def test_cutover_swaps_project_rows_in_one_transaction():
+    db, run, part = _cutover_db()
+    with patch.object(replay, "_reindex") as reindex:
+        replay.cutover(db, run.id, part.project_id)
+
+    sql = _sql(db)[1:]  # after the partition lock
+    assert "UPDATE replay_abc.assertions" in sql[0] and "reviewed_at IS NOT NULL" in sql[0]
+    deletes = [s for s in sql if s.startswith("DELETE")]
+    inserts = [s for s in sql if s.startswith("INSERT")]
+    assert deletes[0].startswith("DELETE FROM assertion_evidence") and deletes[-1].startswith("DELETE FROM proof_envelopes")
+    assert [s.split()[2] for s in inserts] == replay.SHADOW_TABLES
+    assert all("FROM replay_abc." in s for s in inserts)
+    assert sql.index(deletes[-1]) < sql.index(inserts[0])
+    assert part.status == "cut_over"
+    db.commit.assert_called_once()
+    reindex.assert_called_once()
+
+
+def test_cutover_requires_a_finished_partition():
+    db, run, part = _cutover_db(status="running")
+    with pytest.raises(ValueError):
+        replay.cutover(db, run.id, part.project_id)
+    db.commit.assert_not_called()
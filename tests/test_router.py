@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock, AsyncMock, patch
 from src.retrieve.router import MemoryRouter
 
 @pytest.mark.asyncio
@@ -20,7 +20,7 @@ async def test_router_classification():
     router._vector_search = AsyncMock(return_value=("Vector Context", ["doc1"], 0.5))
     router._synthesize = AsyncMock(return_value="The answer is 42")
     
-    result = await router.route_and_retrieve("proj-123", "What is X?")
+    result = await router.route_and_retrieve("proj-123", "What is X?", retrieval_mode="vector")
     
     assert result["strategy"] == "recall"
     assert result["answer"] == "The answer is 42"
@@ -37,9 +37,102 @@ async def test_router_research_strategy():
     router._vector_search = AsyncMock(return_value=("Vector Context", ["doc1"], 0.9))
     router._synthesize = AsyncMock(return_value="Complex Answer")
     
-    result = await router.route_and_retrieve("proj-123", "Who is Bob?")
+    result = await router.route_and_retrieve("proj-123", "Who is Bob?", retrieval_mode="vector")
     
     assert result["strategy"] == "research"
     # Sources should combine
     assert "node1" in result["sources"]
     assert "doc1" in result["sources"]
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from src.retrieve.router import reciprocal_rank_fusion
+    vector = [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}]
+    lexical = [{"id": "b", "text": "B"}, {"id": "c", "text": "C"}]
+
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+    # "b" appears in both lists, so it outranks single-list hits
+    assert [h["id"] for h in fused] == ["b", "a", "c"]
+    assert fused[0]["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+
+@pytest.mark.asyncio
+async def test_router_hybrid_recall_fuses_lexical_hits():
+    db = MagicMock()
+    qdrant = MagicMock()
+    router = MemoryRouter(db, qdrant)
+
+    router._classify = AsyncMock(return_value={"strategy": "recall", "keywords": ["JIRA-4711"]})
+    router._vector_hits = AsyncMock(return_value=([{"id": "doc1", "text": "deploy notes", "score": 0.6}], None))
+    router._lexical_hits = MagicMock(return_value=[{"id": "doc2", "text": "JIRA-4711 fixed", "score": 0.4}])
+    router._assertion_hits = AsyncMock(return_value=[])
+    router._synthesize = AsyncMock(return_value="Answer")
+
+    result = await router.route_and_retrieve("proj-123", "status of JIRA-4711", retrieval_mode="hybrid")
+
+    assert set(result["sources"]) == {"doc1", "doc2"}
+    # Keywords from classification feed the lexical stage
+    assert router._lexical_hits.call_args[0][2] == ["JIRA-4711"]
+
+@pytest.mark.asyncio
+async def test_vector_hits_collapse_chunks_to_items():
+    db = MagicMock()
+    qdrant = MagicMock()
+    router = MemoryRouter(db, qdrant)
+
+    def point(pid, item_id, score):
+        p = MagicMock()
+        p.id = pid
+        p.score = score
+        p.payload = {"item_id": item_id, "text": f"{pid} text"}
+        return p
+
+    qdrant.search.return_value = [
+        point("c1", "item-a", 0.9),
+        point("c2", "item-a", 0.7),
+        point("c3", "item-b", 0.8),
+    ]
+
+    with patch.dict("sys.modules", {"fastembed": MagicMock()}) as modules:
+        vec = MagicMock()
+        vec.tolist.return_value = [0.0] * 384
+        modules["fastembed"].TextEmbedding.return_value.embed.return_value = [vec]
+        hits, error = await router._vector_hits("proj-123", "query", limit=10)
+
+    assert error is None
+    assert [h["id"] for h in hits] == ["item-a", "item-b"]
+    assert hits[0]["text"] == "c1 text"
+
+@pytest.mark.asyncio
+async def test_vector_search_includes_assertion_hits():
+    db = MagicMock()
+    qdrant = MagicMock()
+    router = MemoryRouter(db, qdrant)
+
+    router._vector_hits = AsyncMock(return_value=([{"id": "item-1", "text": "long raw text", "score": 0.55}], None))
+    router._assertion_hits = AsyncMock(return_value=[{"id": "fact-1", "text": "Bob uses Vim", "score": 0.82, "kind": "assertion"}])
+
+    context, sources, max_score = await router._vector_search("proj-123", "what editor does Bob use")
+
+    # Condensed facts are ranked alongside episodic chunks by cosine score
+    assert sources == ["fact-1", "item-1"]
+    assert max_score == 0.82
+    assert "Bob uses Vim" in context
+
+def test_resolve_retrieval_mode_rejects_unknown_modes():
+    from src.retrieve.router import resolve_retrieval_mode, RETRIEVAL_MODE
+    assert resolve_retrieval_mode(None) == RETRIEVAL_MODE
+    assert resolve_retrieval_mode("Lexical") == "lexical"
+    with pytest.raises(ValueError):
+        resolve_retrieval_mode("hybird")
+
+@pytest.mark.asyncio
+async def test_retrieve_endpoint_returns_400_for_unknown_mode():
+    from fastapi import HTTPException
+    from src.server.router_api import retrieve_memory, RetrieveRequest
+
+    with patch("src.server.router_api.MemoryRouter") as mock_router, \
+         pytest.raises(HTTPException) as exc:
+        await retrieve_memory(RetrieveRequest(project_id="proj-123", query="q", retrieval_mode="hybird"), MagicMock(), MagicMock())
+
+    assert exc.value.status_code == 400
+    mock_router.assert_not_called()
@@ -66,24 +66,18 @@ async def test_process_data_source(mock_db_session):
     with patch("src.engine.scheduler.fetch_source_data", new_callable=MagicMock) as mock_fetch, \
          patch("src.engine.scheduler.IngressAgent") as MockIngress, \
          patch("src.engine.scheduler.QdrantClient"), \
-         patch("src.engine.scheduler.Condenser") as MockCondenser:
+         patch("src.engine.scheduler.enqueue_condensation") as mock_enqueue:
         
         # Make fetch return an awaitable
         f = asyncio.Future()
         f.set_result("Mock Content")
         mock_fetch.return_value = f
 
-        # Make CondensationAgent.run awaitable
-        # Make Condenser.distill awaitable
-        mock_condenser_instance = MockCondenser.return_value
-        distill_future = asyncio.Future()
-        distill_future.set_result(None)
-        mock_condenser_instance.distill.return_value = distill_future
-        
         await process_data_source(sid)
         
         # Assertions
         mock_fetch.assert_called_once_with(source)
         MockIngress.return_value.process_memory.assert_called()
-        mock_condenser_instance.distill.assert_called_once()
+        mock_enqueue.assert_called_once()
+        assert mock_enqueue.call_args.args[1] == pid
         assert source.last_run is not None
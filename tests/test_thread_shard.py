@@ -30,3 +30,33 @@ def test_thread_shard_adaptation():
     assert shard.executor._max_workers == 4
     
     shard.shutdown()
+
+@pytest.mark.asyncio
+async def test_thread_shard_run_is_awaitable_without_blocking_loop():
+    import asyncio
+    shard = AdaptiveThreadShard(initial_workers=4, monitor_interval=1)
+
+    def slow_task(n):
+        time.sleep(0.2)
+        return n
+
+    ticks = []
+
+    async def heartbeat():
+        while len(ticks) < 5:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    start = time.monotonic()
+    beat = asyncio.ensure_future(heartbeat())
+    results = []
+    for next_done in asyncio.as_completed([shard.run(slow_task, n) for n in range(4)]):
+        results.append(await next_done)
+    await beat
+
+    assert sorted(results) == [0, 1, 2, 3]
+    # Tasks ran in parallel and the loop kept ticking while they did
+    assert time.monotonic() - start < 0.6
+    assert ticks[-1] - ticks[0] < 0.2
+
+    shard.shutdown()
@@ -0,0 +1,158 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from src.engine import work_queue
+from src.engine.worker import CondensationWorker
+
+
+def test_enqueue_inserts_one_task_per_item():
+    db = MagicMock()
+    pid, items = uuid.uuid4(), [uuid.uuid4(), uuid.uuid4()]
+
+    assert work_queue.enqueue_condensation(db, pid, items) == 2
+    rows = db.execute.call_args.args[1]
+    assert [r["item_id"] for r in rows] == items
+    assert all(r["project_id"] == pid and r["status"] == "pending" for r in rows)
+    db.commit.assert_called_once()
+
+
+def test_coalesced_enqueue_holds_items_for_the_window():
+    db = MagicMock()
+    with patch.object(work_queue, "CONDENSE_COALESCE_MS", 200):
+        work_queue.enqueue_condensation(db, uuid.uuid4(), [uuid.uuid4()], coalesce=True)
+    row = db.execute.call_args.args[1][0]
+    assert abs((row["available_at"] - row["created_at"]).total_seconds() - 0.2) < 0.01
+
+
+def test_claim_batch_leases_one_project_with_skip_locked():
+    db = MagicMock()
+    pid = uuid.uuid4()
+    rows = [SimpleNamespace(id=uuid.uuid4(), project_id=pid, item_id=uuid.uuid4()) for _ in range(3)]
+    db.execute.return_value.all.return_value = rows
+
+    batch = work_queue.claim_batch(db, "w1", batch_size=10, visibility_timeout=60)
+
+    sql = str(db.execute.call_args.args[0])
+    params = db.execute.call_args.args[1]
+    assert "FOR UPDATE SKIP LOCKED" in sql and "FOR UPDATE OF q SKIP LOCKED" in sql
+    assert params["worker_id"] == "w1" and params["batch_size"] == 10
+    # Projects with enough coalesced items are claimable before their window ends
+    assert "HAVING count(*) >= :coalesce_items" in sql
+    assert (params["lease_until"] - params["now"]).total_seconds() == 60
+    assert batch.project_id == pid
+    assert batch.item_ids == [r.item_id for r in rows]
+    db.commit.assert_called_once()
+
+
+def test_claim_batch_returns_none_when_empty():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = []
+    assert work_queue.claim_batch(db, "w1") is None
+
+
+def test_claim_batch_parks_tasks_whose_worker_kept_crashing():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = []
+    with patch.object(work_queue, "CONDENSE_MAX_ATTEMPTS", 3):
+        work_queue.claim_batch(db, "w2")
+
+    park, claim = [c.args for c in db.execute.call_args_list]
+    # A lease that expired on its last attempt is parked, not handed to another worker
+    assert "SET status = 'failed'" in str(park[0]) and "status = 'running' AND available_at <= :now" in str(park[0])
+    assert park[1]["max_attempts"] == 3
+    assert "(status = 'pending' OR attempts < :max_attempts)" in str(claim[0])
+    assert "(q.status = 'pending' OR q.attempts < :max_attempts)" in str(claim[0])
+    assert claim[1]["max_attempts"] == 3
+    db.commit.assert_called_once()
+
+
+def _worker_with_batch(db):
+    batch = work_queue.ClaimedBatch(project_id=uuid.uuid4(), task_ids=[uuid.uuid4()], item_ids=[uuid.uuid4()])
+    db.execute.return_value.scalars.return_value.all.return_value = [MagicMock()]
+    return CondensationWorker(worker_id="w1", session_factory=lambda: db), batch
+
+
+def test_worker_completes_condensed_batch():
+    db = MagicMock()
+    worker, batch = _worker_with_batch(db)
+    with patch.object(work_queue, "claim_batch", return_value=batch), \
+         patch.object(work_queue, "complete", return_value=1) as complete, \
+         patch.object(work_queue, "fail") as fail, \
+         patch("src.engine.condenser.Condenser") as MockCondenser:
+        async def distill(project_id, items):
+            return None
+        MockCondenser.return_value.distill.side_effect = distill
+
+        assert worker.run_once() == 1
+
+    complete.assert_called_once_with(db, "w1", batch.task_ids)
+    fail.assert_not_called()
+    db.close.assert_called_once()
+
+
+def test_worker_releases_failed_batch_for_retry():
+    db = MagicMock()
+    worker, batch = _worker_with_batch(db)
+    with patch.object(work_queue, "claim_batch", return_value=batch), \
+         patch.object(work_queue, "complete") as complete, \
+         patch.object(work_queue, "fail") as fail, \
+         patch("src.engine.condenser.Condenser") as MockCondenser:
+        async def distill(project_id, items):
+            raise RuntimeError("llm down")
+        MockCondenser.return_value.distill.side_effect = distill
+
+        assert worker.run_once() == 1
+
+    complete.assert_not_called()
+    fail.assert_called_once()
+    assert fail.call_args.args[2] == batch.task_ids
+    assert "llm down" in fail.call_args.args[3]
+    db.rollback.assert_called_once()
+
+
+def _slow_distill(seconds):
+    async def distill(project_id, items):
+        await asyncio.sleep(seconds)
+    return distill
+
+
+def test_worker_heartbeats_the_lease_while_distilling():
+    db = MagicMock()
+    worker, batch = _worker_with_batch(db)
+    with patch.object(work_queue, "CONDENSE_HEARTBEAT_SECONDS", 0.02), \
+         patch.object(work_queue, "claim_batch", return_value=batch), \
+         patch.object(work_queue, "renew", return_value=1) as renew, \
+         patch.object(work_queue, "complete", return_value=1) as complete, \
+         patch("src.engine.condenser.Condenser") as MockCondenser:
+        MockCondenser.return_value.distill.side_effect = _slow_distill(0.2)
+        assert worker.run_once() == 1
+
+    assert renew.call_count >= 2
+    assert all(c.args[1:] == ("w1", batch.task_ids) for c in renew.call_args_list)
+    complete.assert_called_once()
+
+
+def test_worker_logs_a_lease_lost_during_distill(caplog):
+    db = MagicMock()
+    worker, batch = _worker_with_batch(db)
+    with patch.object(work_queue, "CONDENSE_HEARTBEAT_SECONDS", 0.02), \
+         patch.object(work_queue, "claim_batch", return_value=batch), \
+         patch.object(work_queue, "renew", return_value=0), \
+         patch.object(work_queue, "complete", return_value=0), \
+         patch("src.engine.condenser.Condenser") as MockCondenser:
+        MockCondenser.return_value.distill.side_effect = _slow_distill(0.1)
+        worker.run_once()
+
+    assert "Lost the lease on 1 of 1 tasks" in caplog.text
+
+
+def test_renew_extends_only_this_workers_running_tasks():
+    db = MagicMock()
+    db.execute.return_value.rowcount = 2
+    with patch.object(work_queue, "CONDENSE_VISIBILITY_TIMEOUT", 60):
+        assert work_queue.renew(db, "w1", [uuid.uuid4(), uuid.uuid4()]) == 2
+    sql, params = str(db.execute.call_args.args[0]), db.execute.call_args.args[1]
+    assert "locked_by = :worker_id AND status = 'running'" in sql
+    assert params["worker_id"] == "w1"
+    db.commit.assert_called_once()